@@ -1,4 +1,3 @@
-import random
 from typing import Any, List
 
 import numpy as np
@@ -15,31 +14,61 @@ from strategyRLEnv.actions.WithdrawUnitAction import WithdrawUnitAction
 from strategyRLEnv.Agent import Agent, AgentState
 from strategyRLEnv.map.MapPosition import MapPosition
 
+# action_id of the unused rows of an action array
+ACTION_PADDING = -1
+
+
+def check_action_array(
+    actions: np.ndarray, num_action_types: int, width: int, height: int
+):
+    """
+    Vectorized check of an integer action array of shape (..., k, 3) with rows [action_id, x, y].
+    Rows with action_id ACTION_PADDING are ignored, their coordinates are not checked.
+
+    :raises ValueError: if the array is not an integer array of rows of three values,
+        or an action_id or position is out of bounds
+    """
+    if not np.issubdtype(actions.dtype, np.integer):
+        raise ValueError("actions should be an integer array")
+    if actions.ndim < 2 or actions.shape[-1] != 3:
+        raise ValueError(
+            "each individual action is should be defined by 3 integers, [action_id, x, y]"
+        )
+
+    action_ids = actions[..., 0]
+    if np.any((action_ids < ACTION_PADDING) | (action_ids >= num_action_types)):
+        raise ValueError(
+            f"action_id should be in [0, {num_action_types}) or {ACTION_PADDING} for padding"
+        )
+
+    used = action_ids != ACTION_PADDING
+    x = actions[..., 1]
+    y = actions[..., 2]
+    if np.any(used & ((x < 0) | (x >= width) | (y < 0) | (y >= height))):
+        raise ValueError("action position is outside of the map")
+
+
+# the action class per action name, its classmethods are the stateless handlers of the action type
+ACTION_HANDLERS = {
+    "claim": ClaimAction,
+    "build_city": BuildCityAction,
+    "build_road": BuildRoadAction,
+    "build_bridge": BuildBridgeAction,
+    "build_farm": BuildFarmAction,
+    "build_mine": BuildMineAction,
+    "destroy": DestroyAction,
+    "place_unit": PlaceUnitAction,
+    "withdraw_unit": WithdrawUnitAction,
+    # "move": MoveAction,
+}
+
 
 def create_action(agent: Agent, action_type, position: MapPosition):
-    if action_type == "claim":
-        return ClaimAction(agent, position)
-    elif action_type == "build_city":
-        return BuildCityAction(agent, position)
-    elif action_type == "build_road":
-        return BuildRoadAction(agent, position)
-    elif action_type == "build_bridge":
-        return BuildBridgeAction(agent, position)
-    elif action_type == "build_farm":
-        return BuildFarmAction(agent, position)
-    elif action_type == "build_mine":
-        return BuildMineAction(agent, position)
-    elif action_type == "destroy":
-        return DestroyAction(agent, position)
-    elif action_type == "place_unit":
-        return PlaceUnitAction(agent, position)
-    elif action_type == "withdraw_unit":
-        return WithdrawUnitAction(agent, position)
-    # elif action_type == "move":
-    #     return MoveAction(agent, position)
-    else:
+    handler = ACTION_HANDLERS.get(action_type)
+    if handler is None:
         # Handle unknown action type
         return None
+    return handler(agent, position)
 
 
 class ActionManager:
@@ -52,13 +81,43 @@ class ActionManager:
     def __init__(self, env):
         self.env = env
 
-        self.actions_definition = self.env.env_settings.get("actions")
-        self.invalid_action_penalty = self.actions_definition.get(
-            "invalid_action_penalty"
-        )
+        self.invalid_action_penalty = self.env.config.invalid_action_penalty
 
-        # Define a structured array with the fields 'action' and 'agent_id'.
-        self.conflict_map = {}
+        # handler class per action id, None for wait
+        self.handlers = [
+            ACTION_HANDLERS.get(action_name)
+            for action_name in self.env.config.action_names
+        ]
+
+    def validate_many(
+        self, agent_id: int, action_type, xs, ys, return_costs: bool = False
+    ):
+        """
+        Vectorized validate() of one action type of an agent at many positions,
+        the result matches create_action(agent, action_type, MapPosition(x, y)).validate(env).
+
+        Args:
+            agent_id (int): The id of the acting agent.
+            action_type (str | int): The action name, e.g. "build_city", or its action_id.
+            xs, ys: integer arrays of the candidate positions.
+            return_costs (bool): If True, also return the cost of every action.
+
+        Returns:
+            bool array with the shape of xs, and the float cost array if return_costs is set.
+        """
+        action_mapping = self.env.action_mapping
+        if action_type in action_mapping:
+            action_id = action_type
+        else:
+            action_ids = {name: i for i, name in action_mapping.items()}
+            if action_type not in action_ids:
+                raise ValueError(f"Unknown or disabled action type: {action_type}")
+            action_id = action_ids[action_type]
+
+        valid, costs = self.env.legal_actions.validate_many(agent_id, action_id, xs, ys)
+        if return_costs:
+            return valid, costs
+        return valid
 
     def apply_actions(self, actions: Any):
         """
@@ -66,19 +125,111 @@ class ActionManager:
         and returns the outcomes for each agent.
 
         Args:
-            actions (List[Dict[str, Any]]): List of action dictionaries from each agent.
-            agents (List[Agent]): List of agent instances.
+            actions: per agent [action_id, x, y] actions, either nested lists
+                or an integer array of shape (num_agents, k, 3) padded with ACTION_PADDING
 
         Returns:
             Dict[int, Dict[str, Any]]: A dictionary mapping agent IDs to their action outcomes.
         """
 
-        agents = self.env.agents
+        env = self.env
+        agents = env.agents
+        handlers = self.handlers
         rewards = np.full(len(agents), self.invalid_action_penalty, dtype=float)
         dones = np.zeros(len(agents), dtype=bool)
 
-        for agent, agent_actions in zip(agents, actions):
-            proposed_turn_actions = []
+        if isinstance(actions, np.ndarray):
+            action_ids, agent_ids, xs, ys = self._submitted_from_array(actions)
+        else:
+            action_ids, agent_ids, xs, ys = self._submitted_from_lists(actions)
+        if len(action_ids) == 0:
+            return rewards, dones
+
+        # validate all actions of a type at once, against the state before the step
+        valid = np.zeros(len(action_ids), dtype=bool)
+        spent = np.zeros(len(action_ids), dtype=float)
+        for action_id in np.unique(action_ids):
+            selected = np.flatnonzero(action_ids == action_id)
+            handler = handlers[action_id]
+            if handler.supports_batch():
+                validate = handler.validate_batch
+            else:
+                validate = handler.validate_each
+            valid[selected] = validate(
+                env, agent_ids[selected], xs[selected], ys[selected]
+            )
+            selected = selected[valid[selected]]
+            spent[selected] = handler.money_spent_batch(env, xs[selected], ys[selected])
+
+        # tile id y * width + x of the target tile of each action
+        tiles = ys * env.map.width + xs
+        proposed = np.flatnonzero(valid)
+        winners = np.array(
+            self.resolve_conflict(proposed.tolist(), tiles[proposed]), dtype=np.int64
+        )
+        # only the actions which won their tile are paid for, an action losing its conflict
+        # does not use up the budget of the later actions of its agent. A winner its agent
+        # cannot pay for is dropped and its tile goes to one of the other actions on it.
+        admitted = self.admit_within_budget(agent_ids[winners], spent[winners])
+        while not admitted.all():
+            dropped = winners[~admitted]
+            valid[dropped] = False
+            contenders = np.flatnonzero(valid & np.isin(tiles, tiles[dropped]))
+            new_winners = self.resolve_conflict(contenders.tolist(), tiles[contenders])
+            winners = np.sort(np.append(winners[admitted], new_winners)).astype(np.int64)
+            admitted = self.admit_within_budget(agent_ids[winners], spent[winners])
+
+        # Execute actions in order, consecutive actions of the same type as one batch
+        run_starts = np.flatnonzero(np.diff(action_ids[winners], prepend=-1) != 0)
+        run_ends = np.append(run_starts[1:], len(winners))
+        for start, end in zip(run_starts, run_ends):
+            run = winners[start:end]
+            handler = handlers[action_ids[run[0]]]
+            run_rewards = handler.execute_batch(env, agent_ids[run], xs[run], ys[run])
+            for agent_id, reward in zip(agent_ids[run].tolist(), run_rewards):
+                rewards[agent_id] = reward
+                dones[agent_id] = False
+
+        return rewards, dones
+
+    def _submitted_from_array(self, actions: np.ndarray):
+        """
+        The submitted actions besides wait of an integer action array of shape (num_agents, k, 3),
+        as (action_ids, agent_ids, xs, ys) arrays in agent order. Padding and wait rows and the
+        actions of done agents are dropped with one mask over the whole array.
+        """
+        action_mapping = self.env.action_mapping
+        num_agents = actions.shape[0]
+        action_ids = actions[..., 0]
+
+        active = np.array(
+            [agent.state != AgentState.DONE for agent in self.env.agents[:num_agents]],
+            dtype=bool,
+        )
+        wait_ids = [i for i, name in action_mapping.items() if name == "wait"]
+        used = (
+            (action_ids != ACTION_PADDING)
+            & ~np.isin(action_ids, wait_ids)
+            & active[:, None]
+        )
+
+        unknown = used & ((action_ids < 0) | (action_ids >= len(action_mapping)))
+        if np.any(unknown):
+            raise ValueError(f"Unknown action type: {action_ids[unknown][0]}")
+
+        agent_ids = np.repeat(np.arange(num_agents), used.sum(axis=1))
+        action_ids, xs, ys = actions[used].astype(np.int64, copy=False).T
+        return action_ids, agent_ids, xs, ys
+
+    def _submitted_from_lists(self, actions: List):
+        """
+        The submitted actions besides wait of per agent lists of [action_id, x, y] actions,
+        as (action_ids, agent_ids, xs, ys) arrays in agent order.
+        """
+        action_mapping = self.env.action_mapping
+        # submitted actions besides wait as (action_id, agent_id, x, y)
+        submitted = []
+        for agent, agent_actions in zip(self.env.agents, actions):
             if agent.state == AgentState.DONE:
                 continue
 
@@ -86,52 +237,76 @@ class ActionManager:
                 if action is None:
                     continue
 
-                action_type = self.env.action_mapping.get(action[0])
+                action_id = action[0]
+                action_type = action_mapping.get(action_id)
                 if action_type == "wait":
                     continue
 
                 if action_type is None:
                     # Handle unknown action type
-                    raise ValueError(f"Unknown action type: {action[0]}")
+                    raise ValueError(f"Unknown action type: {action_id}")
 
-                x = action[1]
-                y = action[2]
-                position = MapPosition(x, y)
+                submitted.append((action_id, agent.id, action[1], action[2]))
 
-                action = create_action(agent, action_type, position)
+        if not submitted:
+            return (np.zeros(0, dtype=np.int64),) * 4
+        return np.array(submitted, dtype=np.int64).reshape(-1, 4).T
 
-                if action.validate(self.env):
-                    proposed_turn_actions.append(action)
-                    position_key = action.position
-                    self.conflict_map.setdefault(position_key, []).append(action)
+    def admit_within_budget(
+        self, agent_ids: np.ndarray, spent: np.ndarray
+    ) -> np.ndarray:
+        """
+        Budget admission of the actions of a step which won their tile conflicts. The actions of an
+        agent are admitted in submission order as long as the agent can pay for all of them together,
+        the later ones are rejected.
 
-        determined_actions = self.resolve_conflict()
+        Args:
+            agent_ids (np.ndarray): The acting agent of every action.
+            spent (np.ndarray): The money every action costs its agent, 0 for rejected actions.
+
+        Returns:
+            np.ndarray: bool array, True for the actions the agents can pay for.
+        """
+        money = np.array([agent.money for agent in self.env.agents], dtype=float)
 
-        # Execute actions
-        for action in determined_actions:
-            agent_id = action.agent.id
-            reward = action.execute(self.env)
-            rewards[agent_id] = reward
-            dones[agent_id] = False
+        # the actions grouped by agent, in submission order within each agent
+        order = np.argsort(agent_ids, kind="stable")
+        sorted_agents = agent_ids[order]
+        sorted_spent = spent[order]
+        group_starts = np.ones(len(order), dtype=bool)
+        group_starts[1:] = sorted_agents[1:] != sorted_agents[:-1]
 
-        # Clear the conflict map for the next turn
-        self.conflict_map = {}
+        # one cumsum over all actions, minus the total of the agents before each group
+        totals = np.cumsum(sorted_spent)
+        offsets = (totals - sorted_spent)[group_starts]
+        totals -= offsets[np.cumsum(group_starts) - 1]
 
-        return rewards, dones
+        admitted = np.empty(len(order), dtype=bool)
+        admitted[order] = totals <= money[sorted_agents]
+        return admitted
 
-    def resolve_conflict(self):
-        winner_actions = []
-        for position, actions_at_position in self.conflict_map.items():
-            if len(actions_at_position) == 1:
-                winner_actions.append(actions_at_position[0])
-                continue
+    def resolve_conflict(self, actions: List, tiles: np.ndarray) -> List:
+        """
+        Picks one winner per tile among the proposed actions, chosen at random with the env's np_random.
+
+        The actions are sorted by tile and a random priority and the first action of each tile wins,
+        so the cost is O(n log n) for n proposed actions.
+
+        Args:
+            actions (List): The proposed actions.
+            tiles (np.ndarray): The tile id of the target of every action.
 
-            # Implement your conflict resolution strategy here.
-            # What when multiple actions of same agent on same position?
-            # what how do the different actions interact with each other? of different agents
+        Returns:
+            List: The winning actions, in the order in which they were proposed.
+        """
+        if len(actions) == 0:
+            return []
 
-            # For fairness, we can randomly select a winner.
-            winner = random.choice(actions_at_position)
-            winner_actions.append(winner)
+        priorities = self.env.np_random.random(len(actions))
+        order = np.lexsort((priorities, tiles))
+        sorted_tiles = tiles[order]
+        first_of_tile = np.ones(len(order), dtype=bool)
+        first_of_tile[1:] = sorted_tiles[1:] != sorted_tiles[:-1]
 
-        return winner_actions
+        winners = np.sort(order[first_of_tile])
+        return [actions[i] for i in winners]
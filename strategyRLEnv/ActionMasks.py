@@ -0,0 +1,268 @@
+from typing import List
+
+import numpy as np
+
+from strategyRLEnv.ActionManager import ACTION_PADDING
+from strategyRLEnv.Agent import AgentState
+from strategyRLEnv.map.Map import DIRTY_BLOCK_SIZE
+
+
+class ActionMasks:
+    """
+    Legal action masks of all agents over the action space MultiDiscrete([action types, width, height]).
+
+    The masks are built from the action handlers: the rules come from their rules_batch kernels and
+    the costs from their action_cost_batch, the same methods validate_batch uses. They are maintained
+    incrementally: the map marks the blocks of tiles changed by the executed actions in
+    Map.dirty_blocks, and on the next query only these blocks and the blocks within reach of
+    the rules are recomputed. Whether an agent can afford an action is checked at query time,
+    agents which are done have no legal actions. Action types without a kernel (see
+    Action.supports_batch) are validated per tile with validate_at on every query.
+
+    The masks are stored bit-packed along y with np.packbits, one bit per agent, action type and tile,
+    so 63 agents with 10 action types on a 1000x1000 map take 79 MB instead of 630 MB. DIRTY_BLOCK_SIZE
+    is a multiple of 8, so a block of tiles is written as whole bytes.
+
+    Attributes:
+        env: The environment object.
+        action_names (List[str]): The action name per action_id.
+        handlers (List): The handler class per action_id, None for wait.
+    """
+
+    def __init__(self, env):
+        self.env = env
+        self.action_names = [
+            env.action_mapping[i] for i in range(len(env.action_mapping))
+        ]
+        self.handlers = env.action_manager.handlers[: len(self.action_names)]
+        self.clearance_radius = env.config.city_clearance_radius
+
+        self._map = None
+        self._masks = None
+
+    def update(self):
+        """
+        Recompute the masks of the tiles around the changes recorded in the map since the last update.
+        """
+        map = self.env.map
+        if map is not self._map:
+            self._map = map
+            self._masks = np.zeros(
+                (
+                    len(self.env.agents),
+                    len(self.action_names),
+                    map.width,
+                    -(-map.height // 8),
+                ),
+                dtype=np.uint8,
+            )
+            map.dirty_blocks[...] = True
+
+        batched = []
+        for action_id, handler in enumerate(self.handlers):
+            if handler is None or handler.supports_batch():
+                batched.append(action_id)
+            else:
+                # validate_at checks the money, which the dirty blocks do not track
+                self._masks[:, action_id] = np.packbits(
+                    self._region_masks([action_id], 0, map.width, 0, map.height)[:, 0],
+                    axis=-1,
+                )
+
+        dirty_blocks = map.dirty_blocks
+        if not dirty_blocks.any():
+            return
+
+        # a change reaches the legality of tiles up to the city clearance radius away
+        reach = -(-max(1, self.clearance_radius) // DIRTY_BLOCK_SIZE)
+        padded = np.pad(dirty_blocks, reach)
+        blocks = np.zeros_like(dirty_blocks)
+        for dx in range(2 * reach + 1):
+            for dy in range(2 * reach + 1):
+                blocks |= padded[
+                    dx : dx + dirty_blocks.shape[0], dy : dy + dirty_blocks.shape[1]
+                ]
+
+        for block_x in range(blocks.shape[0]):
+            # recompute runs of consecutive blocks in one go
+            column = np.concatenate(([False], blocks[block_x], [False]))
+            edges = np.flatnonzero(column[1:] != column[:-1])
+            x0 = block_x * DIRTY_BLOCK_SIZE
+            x1 = min(map.width, x0 + DIRTY_BLOCK_SIZE)
+            for start, end in zip(edges[::2], edges[1::2]):
+                y0 = start * DIRTY_BLOCK_SIZE
+                y1 = min(map.height, end * DIRTY_BLOCK_SIZE)
+                self._masks[:, batched, x0:x1, y0 // 8 : -(-y1 // 8)] = np.packbits(
+                    self._region_masks(batched, x0, x1, y0, y1), axis=-1
+                )
+
+        dirty_blocks[...] = False
+
+    def dense(self) -> np.ndarray:
+        """
+        :return: bool array of shape (num_agents, action types, width, height)
+        """
+        self.update()
+        map = self.env.map
+        masks = self._unpack(self._masks)
+        money = self._money()
+        xs, ys = np.meshgrid(np.arange(map.width), np.arange(map.height), indexing="ij")
+        for action_id, name in enumerate(self.action_names):
+            if name == "wait":
+                continue
+            costs = self._costs(action_id, xs.ravel(), ys.ravel())
+            masks[:, action_id] &= money.reshape(-1, 1, 1) >= costs.reshape(xs.shape)
+        masks[self._done_agents()] = False
+        return masks
+
+    def sparse(self) -> List[np.ndarray]:
+        """
+        The legal actions as rows [action_id, x, y], wait is listed once at (0, 0) since it ignores the position.
+
+        :return: per agent an integer array of shape (legal actions, 3)
+        """
+        self.update()
+        money = self._money()
+        done = self._done_agents()
+
+        legal_actions = []
+        for agent_id in range(len(self.env.agents)):
+            rows = [np.zeros((0, 3), dtype=np.int64)]
+            if done[agent_id]:
+                legal_actions.append(rows[0])
+                continue
+
+            for action_id, name in enumerate(self.action_names):
+                if name == "wait":
+                    rows.append(np.array([[action_id, 0, 0]], dtype=np.int64))
+                    continue
+
+                xs, ys = np.nonzero(self._unpack(self._masks[agent_id, action_id]))
+                affordable = money[agent_id] >= self._costs(action_id, xs, ys)
+                xs, ys = xs[affordable], ys[affordable]
+                rows.append(
+                    np.stack([np.full(len(xs), action_id, dtype=np.int64), xs, ys], 1)
+                )
+            legal_actions.append(np.concatenate(rows))
+        return legal_actions
+
+    def sample(self, k_per_agent: int, rng: np.random.Generator) -> np.ndarray:
+        """
+        Draw legal actions uniformly from the legal actions of each agent, the same set as sparse() lists.
+        The actions are drawn as flat indices into the legal entries of the masks, with replacement.
+
+        :return: integer array of shape (num_agents, k_per_agent, 3) of [action_id, x, y] rows,
+            the rows of agents without legal actions are ACTION_PADDING
+        """
+        self.update()
+        money = self._money()
+        done = self._done_agents()
+        map = self.env.map
+        has_wait = "wait" in self.action_names
+
+        samples = np.full(
+            (len(self.env.agents), k_per_agent, 3), ACTION_PADDING, dtype=np.int64
+        )
+        for agent_id in range(len(self.env.agents)):
+            if done[agent_id]:
+                continue
+
+            legal = self._unpack(self._masks[agent_id])
+            for action_id, name in enumerate(self.action_names):
+                if name == "wait":
+                    # wait ignores the position and counts once
+                    legal[action_id] = False
+                    continue
+                xs, ys = np.nonzero(legal[action_id])
+                too_expensive = money[agent_id] < self._costs(action_id, xs, ys)
+                legal[action_id, xs[too_expensive], ys[too_expensive]] = False
+
+            flat = np.flatnonzero(legal)
+            if len(flat) + has_wait == 0:
+                continue
+            draws = rng.integers(len(flat) + has_wait, size=k_per_agent)
+
+            rows = samples[agent_id]
+            drawn = draws < len(flat)
+            action_ids, xs, ys = np.unravel_index(
+                flat[draws[drawn]], (len(self.action_names), map.width, map.height)
+            )
+            rows[drawn] = np.stack([action_ids, xs, ys], 1)
+            if has_wait:
+                rows[~drawn] = [self.action_names.index("wait"), 0, 0]
+        return samples
+
+    def validate_many(self, agent_id: int, action_id: int, xs, ys):
+        """
+        Whether the actions would pass validate(), like validate() it does not check if the agent is done.
+
+        :param xs: integer array of x coordinates, positions outside the map are invalid
+        :param ys: integer array of y coordinates, same shape as xs
+        :return: bool array and the cost array of the actions, both with the shape of xs
+        """
+        self.update()
+        map = self.env.map
+        xs, ys = np.broadcast_arrays(np.asarray(xs), np.asarray(ys))
+        on_map = (xs >= 0) & (xs < map.width) & (ys >= 0) & (ys < map.height)
+        xs = np.where(on_map, xs, 0)
+        ys = np.where(on_map, ys, 0)
+
+        name = self.action_names[action_id]
+        if name == "wait":
+            return on_map, np.zeros(xs.shape)
+
+        costs = self._costs(action_id, xs.ravel(), ys.ravel()).reshape(xs.shape)
+
+        bits = self._masks[agent_id, action_id, xs, ys // 8] >> (7 - ys % 8)
+        valid = (bits & 1).astype(bool) & on_map
+        valid &= self.env.agents[agent_id].money >= costs
+        return valid, costs
+
+    def _region_masks(self, action_ids: List[int], x0, x1, y0, y1) -> np.ndarray:
+        """
+        The legality of the actions of all agents on the tiles [x0:x1, y0:y1], without the money check
+        for the action types with a kernel.
+
+        :return: bool array of shape (agents, len(action_ids), x1 - x0, y1 - y0)
+        """
+        num_agents = len(self.env.agents)
+        xs, ys = np.meshgrid(np.arange(x0, x1), np.arange(y0, y1), indexing="ij")
+        shape = (num_agents,) + xs.shape
+        # every tile once per agent, agent-major
+        agent_ids = np.repeat(np.arange(num_agents), xs.size)
+        xs = np.tile(xs.ravel(), num_agents)
+        ys = np.tile(ys.ravel(), num_agents)
+
+        masks = np.ones((len(action_ids),) + shape, dtype=bool)
+        for i, action_id in enumerate(action_ids):
+            handler = self.handlers[action_id]
+            if handler is None:
+                continue
+            if handler.supports_batch():
+                valid = handler.rules_batch(self.env, agent_ids, xs, ys)
+            else:
+                valid = handler.validate_each(self.env, agent_ids, xs, ys)
+            masks[i] = valid.reshape(shape)
+        return masks.swapaxes(0, 1)
+
+    def _unpack(self, masks: np.ndarray) -> np.ndarray:
+        """
+        The bool masks of packed masks, the last axis is unpacked to the map height.
+        """
+        return np.unpackbits(masks, axis=-1, count=self.env.map.height).view(bool)
+
+    def _costs(self, action_id: int, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """
+        The cost of the action at the positions on the map, as checked by validate().
+        """
+        return (
+            self.handlers[action_id].action_cost_batch(self.env, xs, ys).astype(float)
+        )
+
+    def _money(self) -> np.ndarray:
+        return np.array([agent.money for agent in self.env.agents], dtype=float)
+
+    def _done_agents(self) -> np.ndarray:
+        return np.array(
+            [agent.state == AgentState.DONE for agent in self.env.agents], dtype=bool
+        )
@@ -5,7 +5,7 @@ import numpy as np
 
 from strategyRLEnv.actions.BuildCityAction import BuildCityAction
 from strategyRLEnv.map.map_settings import AGENT_COLORS, PLAYER_COLOR
-from strategyRLEnv.map.MapPosition import MapPosition
+from strategyRLEnv.map.MapPosition import MapPosition, Tile
 
 
 def get_visible_mask(agent_id: int, map_v):
@@ -98,23 +98,21 @@ class Agent:
         self.position = position
 
         self._claimed_tiles.clear()
-        self._claimed_tiles.add(self.position)  # initial spawn is a claimed tile
+        # initial spawn is a claimed tile
+        self._claimed_tiles.add(self.env.map.tile_id(self.position))
 
         # create capital
-        action = BuildCityAction(self, self.position)
-        action.perform_build(self.env)
+        BuildCityAction.create_building(self.env, self, self.position)
 
         self.state = AgentState.ACTIVE
 
-        initial_money = self.env.env_settings.get("agent_initial_budget")
-        distribution_mode = self.env.env_settings.get(
-            "agent_initial_budget_distribution"
-        )
+        initial_money = self.env.config.agent_initial_budget
+        distribution_mode = self.env.config.agent_initial_budget_distribution
         if distribution_mode == "equal":
             self.money = initial_money
         elif distribution_mode == "gauss":
             # gauss distributed around initial
-            self.money = self.env.np_random.gauss(initial_money, 100)
+            self.money = self.env.np_random.normal(initial_money, 100)
         else:
             # randomly distributed money
             self.money = self.env.np_random.integers(0, 1000)
@@ -129,8 +127,11 @@ class Agent:
 
         init_money = self.money
         round_money = 0
-        for _, tile in enumerate(self._claimed_tiles):
-            round_money += self.env.map.get_tile(tile).get_tile_income()
+        if self._claimed_tiles:
+            map = self.env.map
+            tile_ids = np.fromiter(self._claimed_tiles, dtype=np.int64)
+            incomes = map.tile_income_map[tile_ids % map.width, tile_ids // map.width]
+            round_money = float(incomes.sum())
 
         for unit in self.units:
             unit.step(self.env)
@@ -146,10 +147,10 @@ class Agent:
         for unit in unit_copy:
             unit.kill(self.env)
 
-        for pos in self._claimed_tiles:
-            self.env.map.get_tile(pos).reset(False)
-            self.env.map.remove_building(pos)
-            self.env.map.unclaim_tile(pos)
+        for tile_id in self._claimed_tiles:
+            self.env.map.get_tile(tile_id).reset(False)
+            self.env.map.remove_building(tile_id)
+            self.env.map.unclaim_tile(tile_id)
         self._claimed_tiles.clear()
 
         self.env.done_agents.append(self.id)
@@ -162,13 +163,17 @@ class Agent:
         if self.money < 0:
             self.kill()
 
-    def draw(self, square_size, zoom_level, pan_x, pan_y):
-        # draw the units
-        for unit in self.units:
-            unit.draw(self.env.screen, square_size, self.color)
-
-    def get_observation(self):
-        agent_observation = np.zeros((len(self.env.agent_features)), dtype=np.float32)
+    def get_observation(self, out=None):
+        """
+        :param out: optional array of length len(env.agent_features) to fill in place instead of allocating
+        """
+        if out is None:
+            agent_observation = np.zeros(
+                (len(self.env.agent_features)), dtype=np.float32
+            )
+        else:
+            agent_observation = out
+            agent_observation.fill(0)
 
         features = self.env.agent_features
 
@@ -193,24 +198,17 @@ class Agent:
         return agent_observation
 
     # visibility stuff #
-    def update_local_visibility(self, position: MapPosition):
+    def update_local_visibility(self, position: Tile):
         """
         Update the local visibility of the agent based on the map visibility.
 
         :param map:
-        :param position: The position of the agent.
+        :param position: The tile id or position of the agent.
         """
 
-        surrounding_tiles = self.env.map.get_surrounding_tiles(
-            position, self.visibility_range
-        )
-        discovered_tiles = 0
-        for tile in surrounding_tiles:
-            if not self.env.map.is_visible(tile.position, self.id):
-                self.env.map.set_visible(tile.position, self.id)
-                discovered_tiles += 1
-
-        return discovered_tiles
+        x, y = self.env.map.tile_xy(position)
+        surrounding = self.env.map.neighbour_ids(x, y, self.visibility_range)
+        return self.env.map.set_visible_ids(surrounding, self.id)
 
     def add_unit(self, unit):
         if unit.owner.id == self.id:
@@ -221,15 +219,18 @@ class Agent:
             self.units.remove(unit)
 
     # claiming stuff
-    def add_claimed_tile(self, position: MapPosition):
-        self._claimed_tiles.add(position)
+    def add_claimed_tile(self, position: Tile):
+        self._claimed_tiles.add(self.env.map.tile_id(position))
+
+    def add_claimed_tiles(self, tile_ids: np.ndarray):
+        self._claimed_tiles.update(tile_ids.tolist())
 
     def get_claimed_tiles(self):
+        """The tile ids of the tiles claimed by the agent."""
         return self._claimed_tiles
 
-    def remove_claimed_tile(self, position: MapPosition):
-        if position in self._claimed_tiles:
-            self._claimed_tiles.remove(position)
+    def remove_claimed_tile(self, position: Tile):
+        self._claimed_tiles.discard(self.env.map.tile_id(position))
 
         if len(self._claimed_tiles) == 0:
             self.kill()
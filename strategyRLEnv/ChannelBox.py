@@ -0,0 +1,75 @@
+from copy import deepcopy
+from typing import Sequence
+
+import numpy as np
+from gymnasium import spaces
+from gymnasium.vector.utils import batch_space
+
+
+class ChannelBox(spaces.Box):
+    """
+    A Box whose bounds only vary along some axes, e.g. one min and max per feature channel.
+
+    Only the compact bounds are stored, low, high, bounded_below and bounded_above are read-only
+    broadcast views of the full shape. Building the space costs O(channels) memory and time instead of
+    O(width * height), for every other use it behaves like a Box with the full bounds.
+
+    Attributes:
+        compact_low (np.ndarray): The lower bounds, broadcastable to the shape.
+        compact_high (np.ndarray): The upper bounds, broadcastable to the shape.
+    """
+
+    def __init__(
+        self,
+        low,
+        high,
+        shape: Sequence[int],
+        dtype=np.float32,
+        seed=None,
+    ):
+        """
+        :param low: lower bound, a scalar or an array broadcastable to shape, e.g. (channels, 1, 1)
+        :param high: upper bound, a scalar or an array broadcastable to shape
+        :param shape: shape of the elements of the space
+        """
+        shape = tuple(int(dim) for dim in shape)
+        low, high = np.broadcast_arrays(np.asarray(low), np.asarray(high))
+        np.broadcast_shapes(low.shape, shape)  # raises ValueError if not broadcastable
+
+        # validate and cast the compact bounds like any Box
+        super().__init__(low=low.copy(), high=high.copy(), dtype=dtype, seed=seed)
+
+        self.compact_low = self.low
+        self.compact_high = self.high
+        self._compact_bounded_below = self.bounded_below
+        self._compact_bounded_above = self.bounded_above
+        self._shape = shape
+        self._broadcast_bounds()
+
+    def _broadcast_bounds(self):
+        self.low = np.broadcast_to(self.compact_low, self._shape)
+        self.high = np.broadcast_to(self.compact_high, self._shape)
+        self.bounded_below = np.broadcast_to(self._compact_bounded_below, self._shape)
+        self.bounded_above = np.broadcast_to(self._compact_bounded_above, self._shape)
+
+    def __getstate__(self):
+        # the broadcast views would be pickled as full arrays
+        state = self.__dict__.copy()
+        for key in ("low", "high", "bounded_below", "bounded_above"):
+            del state[key]
+        return state
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        self._broadcast_bounds()
+
+
+@batch_space.register(ChannelBox)
+def _batch_space_channel_box(space: ChannelBox, n: int = 1):
+    return ChannelBox(
+        space.compact_low[np.newaxis],
+        space.compact_high[np.newaxis],
+        (n,) + space.shape,
+        dtype=space.dtype,
+        seed=deepcopy(space.np_random),
+    )
@@ -0,0 +1,118 @@
+from dataclasses import dataclass
+from numbers import Real
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+import numpy as np
+
+# per action settings read into the vectors of EnvConfig, with their default if missing
+ACTION_VALUES = {
+    "cost": -1,
+    "reward": 0,
+    "money_gain_per_turn": 0,
+    "maintenance_cost_per_turn": 0,
+}
+
+
+def _check_number(value, name: str) -> float:
+    if isinstance(value, bool) or not isinstance(value, Real):
+        raise ValueError(f"{name} should be a number, got {value!r}")
+    return float(value)
+
+
+def _read_only(values) -> np.ndarray:
+    array = np.array(values, dtype=np.float64)
+    array.flags.writeable = False
+    return array
+
+
+@dataclass(frozen=True, slots=True)
+class EnvConfig:
+    """
+    The env_settings parsed and validated once, read by the actions on every step.
+
+    All configured actions have an id, the enabled ones (cost >= 0) first in the order of the
+    settings, so their ids are the action_ids of the action space. Disabled actions follow, e.g.
+    the claim settings which DestroyAction pays are available even if claim is disabled.
+
+    Attributes:
+        action_names (Tuple[str, ...]): The action name per id.
+        action_ids (Mapping[str, int]): The id per action name.
+        num_action_types (int): The number of enabled actions.
+        cost, reward, money_gain_per_turn, maintenance_cost_per_turn (np.ndarray):
+            Read-only vectors of the action settings indexed by id, cost -1 and 0 for the others if not set.
+        invalid_action_penalty (float): Reward of an agent without a successful action.
+        city_clearance_radius (int): Minimum distance between cities.
+        agent_initial_budget (float): The money of an agent after reset, None for random money.
+        agent_initial_budget_distribution (str): "equal", "gauss" or any other value for random money.
+    """
+
+    action_names: Tuple[str, ...]
+    action_ids: Mapping[str, int]
+    num_action_types: int
+    cost: np.ndarray
+    reward: np.ndarray
+    money_gain_per_turn: np.ndarray
+    maintenance_cost_per_turn: np.ndarray
+    invalid_action_penalty: float
+    city_clearance_radius: int
+    agent_initial_budget: Optional[float]
+    agent_initial_budget_distribution: Optional[str]
+
+    @classmethod
+    def from_settings(cls, env_settings: Dict[str, Any]) -> "EnvConfig":
+        """
+        :raises ValueError: if a setting is missing or has the wrong type
+        """
+        actions = env_settings.get("actions")
+        if not isinstance(actions, Dict):
+            raise ValueError("env_settings['actions'] should be a dictionary")
+
+        values = {}
+        for action_name, action_properties in actions.items():
+            if action_name == "invalid_action_penalty":
+                continue
+            if not isinstance(action_properties, Dict):
+                raise ValueError(
+                    f"settings of action {action_name} should be a dictionary"
+                )
+            values[action_name] = {
+                key: _check_number(
+                    action_properties.get(key, default), f"{action_name} {key}"
+                )
+                for key, default in ACTION_VALUES.items()
+            }
+
+        enabled = [name for name in values if values[name]["cost"] >= 0]
+        disabled = [name for name in values if values[name]["cost"] < 0]
+        action_names = tuple(enabled + disabled)
+
+        def vector(key):
+            return _read_only([values[name][key] for name in action_names])
+
+        city_clearance_radius = env_settings.get("city_clearance_radius", 2)
+        if not isinstance(city_clearance_radius, int) or city_clearance_radius < 0:
+            raise ValueError("city_clearance_radius should be a non negative integer")
+
+        distribution = env_settings.get("agent_initial_budget_distribution")
+        initial_budget = env_settings.get("agent_initial_budget")
+        if distribution in ("equal", "gauss"):
+            initial_budget = _check_number(initial_budget, "agent_initial_budget")
+
+        return cls(
+            action_names=action_names,
+            action_ids=MappingProxyType(
+                {name: i for i, name in enumerate(action_names)}
+            ),
+            num_action_types=len(enabled),
+            cost=vector("cost"),
+            reward=vector("reward"),
+            money_gain_per_turn=vector("money_gain_per_turn"),
+            maintenance_cost_per_turn=vector("maintenance_cost_per_turn"),
+            invalid_action_penalty=_check_number(
+                actions.get("invalid_action_penalty"), "invalid_action_penalty"
+            ),
+            city_clearance_radius=city_clearance_radius,
+            agent_initial_budget=initial_budget,
+            agent_initial_budget_distribution=distribution,
+        )
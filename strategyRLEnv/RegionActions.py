@@ -0,0 +1,141 @@
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from strategyRLEnv.ActionManager import ACTION_PADDING
+from strategyRLEnv.map.Map import MAP_FEATURE_EXTRACTORS
+
+
+def land_money_score(env) -> np.ndarray:
+    """
+    Default score of the region mode, the land money value of every tile.
+    """
+    return MAP_FEATURE_EXTRACTORS["land_money_value"](env.map)
+
+
+class RegionActions:
+    """
+    Region level action mode for very large maps.
+
+    The map is split into square regions of region_size x region_size tiles, an action is
+    [action_id, region_x, region_y]. Each action is resolved to the legal tile of its region with
+    the highest score, ties go to the first tile in x-major order. An action in a region without a
+    legal tile is resolved to the first tile of the region, so it fails validation as before.
+    Wait keeps its position. The resolved actions are applied per tile by the ActionManager.
+
+    Attributes:
+        env: The environment object.
+        region_size (int): The width and height of a region in tiles.
+        score (Callable): Returns the (width, height) score of the tiles for an environment.
+    """
+
+    def __init__(
+        self,
+        env,
+        region_size: int,
+        score: Optional[Callable[..., np.ndarray]] = None,
+    ):
+        if not isinstance(region_size, int) or region_size < 1:
+            raise ValueError("region_size should be a positive integer")
+        self.env = env
+        self.region_size = region_size
+        self.score = land_money_score if score is None else score
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        """The number of regions along x and y, the last regions may be cut off by the map border."""
+        size = self.region_size
+        return -(-self.env.map.width // size), -(-self.env.map.height // size)
+
+    def masks(self, tile_masks: np.ndarray) -> np.ndarray:
+        """
+        A region action is legal if the action is legal on any tile of the region.
+
+        :param tile_masks: bool array of shape (..., width, height)
+        :return: bool array of shape (..., regions x, regions y)
+        """
+        size = self.region_size
+        regions_x, regions_y = self.shape
+        padded = np.zeros(
+            tile_masks.shape[:-2] + (regions_x * size, regions_y * size), dtype=bool
+        )
+        padded[..., : tile_masks.shape[-2], : tile_masks.shape[-1]] = tile_masks
+        blocks = padded.reshape(
+            tile_masks.shape[:-2] + (regions_x, size, regions_y, size)
+        )
+        return blocks.any(axis=(-3, -1))
+
+    def to_regions(self, rows: np.ndarray) -> np.ndarray:
+        """
+        The region actions of tile actions, padding rows stay padding.
+
+        :param rows: integer array of shape (..., 3) of [action_id, x, y] rows
+        """
+        regions = rows.copy()
+        used = regions[..., 0] != ACTION_PADDING
+        regions[..., 1:][used] //= self.region_size
+        return regions
+
+    def sparse(self, tile_rows: List[np.ndarray]) -> List[np.ndarray]:
+        """
+        The legal region actions as rows, from the legal tile actions of action_masks(sparse=True).
+        """
+        return [
+            np.unique(self.to_regions(rows), axis=0).reshape(-1, 3)
+            for rows in tile_rows
+        ]
+
+    def resolve(self, actions):
+        """
+        Resolve region actions to tile actions.
+
+        :param actions: per agent [action_id, region_x, region_y] actions, nested lists or an
+            integer array of shape (num_agents, k, 3) padded with ACTION_PADDING
+        :return: the tile actions, an array of the same shape or per agent an array of rows
+        """
+        if isinstance(actions, np.ndarray):
+            rows = actions.reshape(-1, 3)
+            agent_ids = np.repeat(np.arange(actions.shape[0]), actions.shape[1])
+        else:
+            agent_rows = [
+                np.array(
+                    [action for action in agent_actions if action is not None],
+                    dtype=np.int64,
+                ).reshape(-1, 3)
+                for agent_actions in actions
+            ]
+            lengths = [len(agent_actions) for agent_actions in agent_rows]
+            rows = np.concatenate(agent_rows) if agent_rows else np.zeros((0, 3), int)
+            agent_ids = np.repeat(np.arange(len(agent_rows)), lengths)
+
+        env = self.env
+        size = self.region_size
+        resolved = rows.copy()
+        selected = (rows[:, 0] != ACTION_PADDING) & (
+            rows[:, 0] != env.config.action_ids.get("wait", ACTION_PADDING)
+        )
+        if selected.any():
+            score = np.asarray(self.score(env), dtype=float)
+            offsets = np.arange(size)
+            pairs = np.unique(
+                np.stack([agent_ids[selected], rows[selected, 0]], 1), axis=0
+            )
+            for agent_id, action_id in pairs.tolist():
+                indices = np.flatnonzero(
+                    selected & (agent_ids == agent_id) & (rows[:, 0] == action_id)
+                )
+                # the tiles of the regions, shape (actions, size, size)
+                xs = rows[indices, 1, None, None] * size + offsets[None, :, None]
+                ys = rows[indices, 2, None, None] * size + offsets[None, None, :]
+                legal, _ = env.legal_actions.validate_many(agent_id, action_id, xs, ys)
+                # the tiles past the map border are not legal, clip them to index the scores
+                clipped_xs = np.minimum(xs, env.map.width - 1)
+                clipped_ys = np.minimum(ys, env.map.height - 1)
+                tile_scores = np.where(legal, score[clipped_xs, clipped_ys], -np.inf)
+                best = np.argmax(tile_scores.reshape(len(indices), -1), axis=1)
+                resolved[indices, 1] = rows[indices, 1] * size + best // size
+                resolved[indices, 2] = rows[indices, 2] * size + best % size
+
+        if isinstance(actions, np.ndarray):
+            return resolved.reshape(actions.shape)
+        return np.split(resolved, np.cumsum(lengths)[:-1])
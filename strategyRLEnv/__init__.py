@@ -1 +1,9 @@
+from gymnasium.envs.registration import register
+
 from .map.mapGenerator import generate_maps
+
+register(
+    id="strategyRLEnv/MapEnvironment-v0",
+    entry_point="strategyRLEnv.environment:MapEnvironment",
+    vector_entry_point="strategyRLEnv.vector.BatchedMapEnvironment:BatchedMapEnvironment",
+)
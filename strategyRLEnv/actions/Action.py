@@ -1,7 +1,10 @@
 from abc import ABC, abstractmethod
 from enum import Enum, auto
 
+import numpy as np
+
 from strategyRLEnv.map import MapPosition
+from strategyRLEnv.map.map_settings import max_agent_id
 
 
 class ActionType(Enum):
@@ -13,6 +16,26 @@ class ActionType(Enum):
 
 
 class Action(ABC):
+    """
+    Base of all actions.
+
+    The rules of an action type are stateless classmethods on the (agent, x, y) of the action, the
+    ActionManager calls them through a dispatch table without creating action objects. An action
+    object wraps them for a single agent and position.
+
+    validate_batch and execute_batch handle all actions of a type in a step at once. By default they
+    loop over validate_at and execute_at, an action type can override rules_batch with a vectorized
+    kernel of its rules on the map layers, see supports_batch. validate_batch adds the money check
+    to the kernel, the legal action masks use the kernel and action_cost_batch on their own. The
+    action types override execute_batch with the layer scatters and money updates of execute_at
+    done at once, with the result of executing the actions in order.
+
+    Attributes:
+        action_name (str): The actions settings whose cost and reward the action uses.
+    """
+
+    action_name: str = None
+
     def __init__(self, agent, position: MapPosition, action_type: ActionType):
         self.agent = agent
 
@@ -21,30 +44,184 @@ class Action(ABC):
         self.position = position
         self.action_type = action_type
 
-    def validate(self, env) -> bool:
+    @classmethod
+    def validate_at(cls, env, agent, x: int, y: int) -> bool:
         """
         Validate if the action is possible given the current state of the environment and the agent.
         """
-        action_cost = self.get_cost(env)
-        if self.agent.money < action_cost:
+        action_cost = cls.action_cost(env, x, y)
+        if agent.money < action_cost:
             return False
 
-        if not env.map.check_position_on_map(self.position):
+        if not (0 <= x < env.map.width and 0 <= y < env.map.height):
             return False
 
         return True
 
+    @classmethod
     @abstractmethod
-    def execute(self, env) -> int:
+    def execute_at(cls, env, agent, x: int, y: int) -> float:
         """
         Execute the action, updating the environment and the agent's state. Returns the reward.
         """
         pass
 
+    @classmethod
+    def validate_tile(cls, env, agent, tile_id: int) -> bool:
+        """validate_at for the tile with the tile id y * width + x."""
+        x, y = env.map.tile_xy(tile_id)
+        return cls.validate_at(env, agent, x, y)
+
+    @classmethod
+    def execute_tile(cls, env, agent, tile_id: int) -> float:
+        """execute_at for the tile with the tile id y * width + x."""
+        x, y = env.map.tile_xy(tile_id)
+        return cls.execute_at(env, agent, x, y)
+
+    @classmethod
+    def supports_batch(cls) -> bool:
+        """
+        Whether rules_batch implements the rules of validate_at of this class. False if a subclass
+        changes validate_at but inherits the kernel of its parent.
+        """
+        return issubclass(
+            _defining_class(cls, "rules_batch"), _defining_class(cls, "validate_at")
+        )
+
+    @classmethod
+    def validate_each(cls, env, agent_ids, xs, ys) -> np.ndarray:
+        """
+        validate_batch by calling validate_at for every action.
+        """
+        agents = env.agents
+        return np.array(
+            [
+                cls.validate_at(env, agents[agent_id], x, y)
+                for agent_id, x, y in zip(agent_ids.tolist(), xs.tolist(), ys.tolist())
+            ],
+            dtype=bool,
+        )
+
+    @classmethod
+    def validate_batch(cls, env, agent_ids, xs, ys) -> np.ndarray:
+        """
+        validate_at of many actions of this type, all against the same state.
+
+        :param agent_ids: integer array of the acting agents
+        :param xs: integer array of the x coordinates
+        :param ys: integer array of the y coordinates
+        :return: bool array, True for the valid actions
+        """
+        if not cls.supports_batch():
+            return cls.validate_each(env, agent_ids, xs, ys)
+        valid, xs, ys = cls.validate_batch_basics(env, agent_ids, xs, ys)
+        return valid & cls.rules_batch(env, agent_ids, xs, ys)
+
+    @classmethod
+    def rules_batch(cls, env, agent_ids, xs, ys) -> np.ndarray:
+        """
+        The kernel of the rules of validate_at besides the checks of Action.validate_at, that is
+        without the money check. Only called with positions on the map.
+
+        :return: bool array, True for the actions following the rules
+        """
+        return np.ones(len(xs), dtype=bool)
+
+    @classmethod
+    def execute_batch(cls, env, agent_ids, xs, ys) -> np.ndarray:
+        """
+        execute_at of many valid actions of this type, in order.
+        :return: float array of the rewards
+        """
+        agents = env.agents
+        return np.array(
+            [
+                cls.execute_at(env, agents[agent_id], x, y)
+                for agent_id, x, y in zip(agent_ids.tolist(), xs.tolist(), ys.tolist())
+            ],
+            dtype=float,
+        )
+
+    @classmethod
+    def validate_batch_basics(cls, env, agent_ids, xs, ys):
+        """
+        The checks of Action.validate_at as a kernel: the agent can pay and the position is on the map.
+        :return: the bool array of the actions passing, and xs and ys with the positions outside
+            the map moved to (0, 0), so the kernels can index the layers with them
+        """
+        on_map = env.map.positions_on_map(xs, ys)
+        xs = np.where(on_map, xs, 0)
+        ys = np.where(on_map, ys, 0)
+        money = np.array([agent.money for agent in env.agents], dtype=float)
+        costs = cls.action_cost_batch(env, xs, ys)
+        return (money[agent_ids] >= costs) & on_map, xs, ys
+
+    @classmethod
+    def action_cost_batch(cls, env, xs, ys) -> np.ndarray:
+        """Return the cost of the action at many positions."""
+        config = env.config
+        return np.full(len(xs), config.cost[config.action_ids[cls.action_name]])
+
+    @classmethod
+    def money_spent_batch(cls, env, xs, ys) -> np.ndarray:
+        """Return the money the agents pay for the actions at many positions."""
+        return cls.action_cost_batch(env, xs, ys)
+
+    @classmethod
+    def action_cost(cls, env, x: int, y: int) -> float:
+        """Return the cost of the action at the position."""
+        config = env.config
+        return config.cost[config.action_ids[cls.action_name]]
+
+    @classmethod
+    def action_reward(cls, env) -> float:
+        """Return the reward for the action."""
+        config = env.config
+        return config.reward[config.action_ids[cls.action_name]]
+
+    def validate(self, env) -> bool:
+        return self.validate_at(env, self.agent, self.position.x, self.position.y)
+
+    def execute(self, env) -> float:
+        return self.execute_at(env, self.agent, self.position.x, self.position.y)
+
     def get_cost(self, env) -> float:
         """Return the cost of the action."""
-        return env.env_settings.get("actions")[self.action_type.value]["cost"]
+        return self.action_cost(env, self.position.x, self.position.y)
 
     def get_reward(self, env) -> float:
         """Return the reward for the action."""
-        return env.env_settings.get("actions")[self.action_type.value]["reward"]
+        return self.action_reward(env)
+
+
+def _defining_class(cls, name: str):
+    return next(klass for klass in cls.__mro__ if name in vars(klass))
+
+
+def visible_batch(env, agent_ids, xs, ys) -> np.ndarray:
+    """
+    Vectorized Map.is_visible_at, the positions must be on the map.
+    """
+    visibility = env.map.visibility_map[xs, ys]
+    valid_ids = (agent_ids >= 0) & (agent_ids < max_agent_id)
+    return valid_ids & ((visibility >> np.where(valid_ids, agent_ids, 0)) & 1 == 1)
+
+
+def change_money_batch(env, agent_ids, ufunc, amounts) -> None:
+    """
+    Change the money of the agents with one ufunc.at in the order of the actions, np.subtract pays
+    the amounts like agent.money -= amount and np.add pays them out.
+    """
+    money = np.array([agent.money for agent in env.agents], dtype=float)
+    ufunc.at(money, agent_ids, amounts)
+    for agent_id in np.unique(agent_ids).tolist():
+        env.agents[agent_id].money = float(money[agent_id])
+
+
+def discover_batch(env, agent_ids, tile_ids) -> np.ndarray:
+    """
+    Agent.update_local_visibility of many tiles at once, in order.
+    :return: integer array of the number of tiles each of them made visible
+    """
+    radii = np.array([agent.visibility_range for agent in env.agents])[agent_ids]
+    return env.map.set_visible_around(tile_ids, agent_ids, radii)
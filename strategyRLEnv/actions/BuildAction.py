@@ -1,28 +1,37 @@
 from abc import ABC, abstractmethod
 from typing import Dict
 
-from strategyRLEnv.actions.Action import Action, ActionType
+import numpy as np
+
+from strategyRLEnv.actions.Action import (Action, ActionType,
+                                          change_money_batch, discover_batch,
+                                          visible_batch)
 from strategyRLEnv.map.map_settings import (ALLOWED_BUILDING_PLACEMENTS,
-                                            BuildingType, discovery_reward)
+                                            DEFAULT_BUILDING_VALUE,
+                                            OWNER_DEFAULT_TILE, BuildingType,
+                                            LandType, discovery_reward)
 from strategyRLEnv.map.MapPosition import MapPosition
 from strategyRLEnv.objects.Ownable import Ownable
 
 
 class BuildAction(Action, ABC):
+    building_type: BuildingType = None
+
     def __init__(self, agent, position: MapPosition, building_type: BuildingType):
         super().__init__(agent, position, ActionType.BUILD)
         self.building_type = building_type
 
-    def validate(self, env) -> bool:
-        if not super().validate(env):
+    @classmethod
+    def validate_at(cls, env, agent, x: int, y: int) -> bool:
+        if not super().validate_at(env, agent, x, y):
             return False
 
-        tile = env.map.get_tile(self.position)
+        tile = env.map.tile_at(x, y)
 
-        if not fit_building_to_land_type(env, self.position, self.building_type):
+        if tile.get_land_type() not in ALLOWED_BUILDING_PLACEMENTS[cls.building_type]:
             return False
 
-        if not env.map.is_visible(self.position, self.agent.id):
+        if not env.map.is_visible_at(x, y, agent.id):
             return False
 
         if tile.has_any_building():
@@ -30,48 +39,101 @@ class BuildAction(Action, ABC):
 
         # check no opponent unit on the tile
         if tile.unit is not None:
-            if tile.unit.owner.id != self.agent.id:
+            if tile.unit.owner.id != agent.id:
                 return False
 
         return True
 
-    def execute(self, env) -> float:
-        building = self.perform_build(env)
-        env.map.add_building(building, self.position)
-        env.map.get_tile(self.position).update(env)
-        env.map.trigger_surrounding_tile_update(self.position)
-        self.agent.money -= self.get_cost(env)
+    @classmethod
+    def rules_batch(cls, env, agent_ids, xs, ys):
+        map = env.map
 
-        if isinstance(self, Ownable):
-            env.map.claim_tile(self.agent, self.position)
-            self.agent.add_claimed_tile(self.position)
+        land_types = map.landtype_map[xs, ys]
+        valid = allowed_land_types(cls.building_type)[land_types]
+        valid &= visible_batch(env, agent_ids, xs, ys)
+        valid &= map.building_map[xs, ys] == DEFAULT_BUILDING_VALUE
 
-        discovered = self.agent.update_local_visibility(self.position)
-        reward = self.get_reward(env) + discovered * discovery_reward
+        # check no opponent unit on the tile
+        unit_owners = map.unit_owner_map[xs, ys]
+        valid &= (unit_owners == OWNER_DEFAULT_TILE) | (unit_owners == agent_ids)
+        return valid
+
+    @classmethod
+    def execute_at(cls, env, agent, x: int, y: int) -> float:
+        tile_id = y * env.map.width + x
+        building = cls.create_building(env, agent, MapPosition(x, y))
+        env.map.add_building(building, tile_id)
+        env.map.get_tile(tile_id).update(env)
+        env.map.trigger_surrounding_tile_update(tile_id)
+        agent.money -= cls.action_cost(env, x, y)
+
+        if issubclass(cls, Ownable):
+            env.map.claim_tile(agent, tile_id)
+            agent.add_claimed_tile(tile_id)
+
+        discovered = agent.update_local_visibility(tile_id)
+        reward = cls.action_reward(env) + discovered * discovery_reward
         return reward
 
+    @classmethod
+    def execute_batch(cls, env, agent_ids, xs, ys) -> np.ndarray:
+        # the building objects are created one by one, the tiles are updated once after all of them
+        map = env.map
+        agents = env.agents
+        tile_ids = ys * map.width + xs
+        for agent_id, x, y, tile_id in zip(
+            agent_ids.tolist(), xs.tolist(), ys.tolist(), tile_ids.tolist()
+        ):
+            building = cls.create_building(env, agents[agent_id], MapPosition(x, y))
+            map.add_building(building, tile_id)
+        map.update_tiles_around(tile_ids)
+        change_money_batch(
+            env, agent_ids, np.subtract, cls.action_cost_batch(env, xs, ys)
+        )
+
+        if issubclass(cls, Ownable):
+            map.claim_ids(tile_ids, agent_ids)
+            for agent_id in np.unique(agent_ids).tolist():
+                agents[agent_id].add_claimed_tiles(tile_ids[agent_ids == agent_id])
+
+        discovered = discover_batch(env, agent_ids, tile_ids)
+        return cls.action_reward(env) + discovered * discovery_reward
+
+    @classmethod
     @abstractmethod
-    def perform_build(self, env):
-        """Execute the build on the map."""
+    def create_building(cls, env, agent, position: MapPosition):
+        """Create the building object of the agent at the position."""
         pass
 
-    def get_cost(self, env) -> float:
-        """Return the cost of the action."""
-        return env.env_settings.get("actions")[self.building_type.value]["cost"]
-
-    def get_reward(self, env) -> float:
-        """Return the reward for the action."""
-        return env.env_settings.get("actions")[self.building_type.value]["reward"]
+    def perform_build(self, env):
+        """Execute the build on the map."""
+        return self.create_building(env, self.agent, self.position)
 
-    def get_building_parameters(self, env) -> Dict:
-        """Return the building type id."""
-        action = env.env_settings.get("actions")[self.building_type.value]
+    @classmethod
+    def building_parameters(cls, env) -> Dict:
+        """Return the income and maintenance of the building."""
+        config = env.config
+        action_id = config.action_ids[cls.action_name]
         params = {
-            "money_gain_per_turn": action.get("money_gain_per_turn", 0),
-            "maintenance_cost_per_turn": action.get("maintenance_cost_per_turn", 0),
+            "money_gain_per_turn": config.money_gain_per_turn[action_id],
+            "maintenance_cost_per_turn": config.maintenance_cost_per_turn[action_id],
         }
         return params
 
+    def get_building_parameters(self, env) -> Dict:
+        """Return the building type id."""
+        return self.building_parameters(env)
+
+
+def allowed_land_types(build_type) -> np.ndarray:
+    """
+    Lookup table of LandType value to whether the building type (or "UNIT") can be placed on it.
+    """
+    table = np.zeros(len(LandType), dtype=bool)
+    for land_type in ALLOWED_BUILDING_PLACEMENTS[build_type]:
+        table[land_type.value] = True
+    return table
+
 
 def fit_building_to_land_type(
     env, position: MapPosition, build_type: BuildingType
@@ -1,29 +1,36 @@
+import numpy as np
+
 from strategyRLEnv.actions.BuildAction import BuildAction
-from strategyRLEnv.map.map_settings import OWNER_DEFAULT_TILE, BuildingType
+from strategyRLEnv.map.map_settings import (BUILDING_IDS, OWNER_DEFAULT_TILE,
+                                            BuildingType)
 from strategyRLEnv.map.MapPosition import MapPosition
 from strategyRLEnv.objects.City import City
 
 
 class BuildCityAction(BuildAction):
+    action_name = BuildingType.CITY.value
+    building_type = BuildingType.CITY
+
     def __init__(self, agent, position: MapPosition):
         super().__init__(agent, position, BuildingType.CITY)
 
-    def validate(self, env) -> bool:
-        if not super().validate(env):
+    @classmethod
+    def validate_at(cls, env, agent, x: int, y: int) -> bool:
+        if not super().validate_at(env, agent, x, y):
             return False
 
-        city_clearance_radius = env.env_settings.get("city_clearance_radius", 2)
+        city_clearance_radius = env.config.city_clearance_radius
 
-        too_close_to_city, _ = env.map.tile_is_next_to_building_type(
-            self.position, BuildingType.CITY, radius=city_clearance_radius
+        _, buildings = env.map.neighbour_values(
+            env.map.building_map, x, y, city_clearance_radius
         )
-        if too_close_to_city:
+        if (buildings == BUILDING_IDS[BuildingType.CITY]).any():
             return False
 
-        tile = env.map.get_tile(self.position)
+        tile = env.map.tile_at(x, y)
         tile_owner_id = tile.get_owner()
 
-        if tile_owner_id == self.agent.id:
+        if tile_owner_id == agent.id:
             if tile.has_any_building():
                 return False
             else:
@@ -34,9 +41,32 @@ class BuildCityAction(BuildAction):
 
         return True
 
-    def perform_build(self, env):
-        params = self.get_building_parameters(env)
-        city = City(self.agent, self.position, params)
+    @classmethod
+    def rules_batch(cls, env, agent_ids, xs, ys):
+        valid = super().rules_batch(env, agent_ids, xs, ys)
+        map = env.map
+
+        # no city within the clearance radius of the actions valid so far, looked up once per tile
+        candidates = np.flatnonzero(valid)
+        tiles, inverse = np.unique(
+            ys[candidates] * map.width + xs[candidates], return_inverse=True
+        )
+        groups, _, buildings = map.neighbour_values_of(
+            map.building_map, tiles, env.config.city_clearance_radius
+        )
+        city_id = BUILDING_IDS[BuildingType.CITY]
+        cities = np.bincount(groups[buildings == city_id], minlength=len(tiles))
+        valid[candidates] = cities[inverse.ravel()] == 0
+
+        # the tile has no building, see BuildAction
+        owners = map.ownership_map[xs, ys]
+        valid &= (owners == agent_ids) | (owners == OWNER_DEFAULT_TILE)
+        return valid
+
+    @classmethod
+    def create_building(cls, env, agent, position: MapPosition):
+        params = cls.building_parameters(env)
+        city = City(agent, position, params)
 
-        self.agent.add_city(city)
+        agent.add_city(city)
         return city
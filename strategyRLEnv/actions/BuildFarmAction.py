@@ -6,17 +6,21 @@ from strategyRLEnv.objects.Farm import Farm
 
 
 class BuildFarmAction(BuildAction):
+    action_name = BuildingType.FARM.value
+    building_type = BuildingType.FARM
+
     def __init__(self, agent: Agent, position: MapPosition):
         super().__init__(agent, position, BuildingType.FARM)
 
-    def validate(self, env) -> bool:
-        if not super().validate(env):
+    @classmethod
+    def validate_at(cls, env, agent, x: int, y: int) -> bool:
+        if not super().validate_at(env, agent, x, y):
             return False
 
-        tile = env.map.get_tile(self.position)
+        tile = env.map.tile_at(x, y)
         tile_owner_id = tile.get_owner()
 
-        if tile_owner_id == self.agent.id:
+        if tile_owner_id == agent.id:
             if tile.has_any_building():
                 return False
             else:
@@ -24,10 +28,17 @@ class BuildFarmAction(BuildAction):
 
         return False
 
-    def perform_build(self, env):
-        farm = Farm(self.agent, self.position, self.get_building_parameters(env))
+    @classmethod
+    def rules_batch(cls, env, agent_ids, xs, ys):
+        valid = super().rules_batch(env, agent_ids, xs, ys)
+        # the tile has no building, see BuildAction
+        return valid & (env.map.ownership_map[xs, ys] == agent_ids)
+
+    @classmethod
+    def create_building(cls, env, agent, position: MapPosition):
+        farm = Farm(agent, position, cls.building_parameters(env))
 
-        tile = env.map.get_tile(self.position)
+        tile = env.map.get_tile(position)
         if tile.get_resources() != ResourceType.NONE:
             farm.income_per_turn = 2 * farm.get_income()
 
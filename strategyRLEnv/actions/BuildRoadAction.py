@@ -1,48 +1,55 @@
+import numpy as np
+
 from strategyRLEnv.actions.BuildAction import BuildAction
 from strategyRLEnv.Agent import Agent
 from strategyRLEnv.map import MapPosition
-from strategyRLEnv.map.map_settings import BuildingType, LandType
+from strategyRLEnv.map.map_settings import (BUILDING_IDS, OWNER_DEFAULT_TILE,
+                                            BuildingType, LandType)
 from strategyRLEnv.objects.Road import Bridge, Road, update_road_bridge_shape
 
 
 class BuildRoadAction(BuildAction):
+    action_name = BuildingType.ROAD.value
+    building_type = BuildingType.ROAD
+
     def __init__(self, agent: Agent, position: MapPosition):
         super().__init__(agent, position, BuildingType.ROAD)
 
-    def get_cost(self, env) -> float:
-        """Return the cost of the action."""
-        cost = super().get_cost(env)
-        if env.map.get_tile(self.position).land_type == LandType.MOUNTAIN:
+    @classmethod
+    def action_cost(cls, env, x: int, y: int) -> float:
+        """Return the cost of the action at the position."""
+        cost = super().action_cost(env, x, y)
+        if env.map.tile_at(x, y).land_type == LandType.MOUNTAIN:
             cost *= 2
         return cost
 
-    def validate(self, env) -> bool:
-        if not super().validate(env):
-            return False
+    @classmethod
+    def action_cost_batch(cls, env, xs, ys) -> np.ndarray:
+        """Return the cost of the action at many positions."""
+        costs = super().action_cost_batch(env, xs, ys)
+        land_types = env.map.values_at(env.map.landtype_map, xs, ys, -1)
+        return np.where(land_types == LandType.MOUNTAIN.value, 2 * costs, costs)
 
-        next_to_road, _ = env.map.tile_is_next_to_building_type(
-            self.position, BuildingType.ROAD, diagonal=False
-        )
-        if next_to_road:
-            return True
+    @classmethod
+    def validate_at(cls, env, agent, x: int, y: int) -> bool:
+        if not super().validate_at(env, agent, x, y):
+            return False
 
-        next_to_bridge, _ = env.map.tile_is_next_to_building_type(
-            self.position, BuildingType.BRIDGE, diagonal=False
-        )
-        if next_to_bridge:
-            return True
+        return is_connected_to_roads(env, agent, x, y)
 
-        next_to_city, tile = env.map.tile_is_next_to_building_type(
-            self.position, BuildingType.CITY, diagonal=False
+    @classmethod
+    def rules_batch(cls, env, agent_ids, xs, ys):
+        valid = super().rules_batch(env, agent_ids, xs, ys)
+        candidates = np.flatnonzero(valid)
+        valid[candidates] = is_connected_to_roads_batch(
+            env, agent_ids[candidates], xs[candidates], ys[candidates]
         )
-        if next_to_city and tile.get_owner() == self.agent.id:
-            return True
-
-        return False
+        return valid
 
-    def perform_build(self, env):
-        building_type_id = self.get_building_parameters(env)
-        road = Road(self.position, building_type_id)
+    @classmethod
+    def create_building(cls, env, agent, position: MapPosition):
+        building_type_id = cls.building_parameters(env)
+        road = Road(position, building_type_id)
 
         update_road_bridge_shape(road, env.map)
 
@@ -50,36 +57,80 @@ class BuildRoadAction(BuildAction):
 
 
 class BuildBridgeAction(BuildAction):
+    action_name = BuildingType.BRIDGE.value
+    building_type = BuildingType.BRIDGE
+
     def __init__(self, agent: Agent, position: MapPosition):
         super().__init__(agent, position, BuildingType.BRIDGE)
 
-    def validate(self, env) -> bool:
-        if not super().validate(env):
+    @classmethod
+    def validate_at(cls, env, agent, x: int, y: int) -> bool:
+        if not super().validate_at(env, agent, x, y):
             return False
 
-        next_to_road, _ = env.map.tile_is_next_to_building_type(
-            self.position, BuildingType.ROAD, diagonal=False
-        )
-        if next_to_road:
-            return True
-
-        next_to_bridge, _ = env.map.tile_is_next_to_building_type(
-            self.position, BuildingType.BRIDGE, diagonal=False
-        )
-        if next_to_bridge:
-            return True
+        return is_connected_to_roads(env, agent, x, y)
 
-        next_to_city, tile = env.map.tile_is_next_to_building_type(
-            self.position, BuildingType.CITY, diagonal=False
+    @classmethod
+    def rules_batch(cls, env, agent_ids, xs, ys):
+        valid = super().rules_batch(env, agent_ids, xs, ys)
+        candidates = np.flatnonzero(valid)
+        valid[candidates] = is_connected_to_roads_batch(
+            env, agent_ids[candidates], xs[candidates], ys[candidates]
         )
-        if next_to_city and tile.get_owner() == self.agent.id:
-            return True
+        return valid
 
-        return False
-
-    def perform_build(self, env):
-        building_type_id = self.get_building_parameters(env)
-        bridge = Bridge(self.position, building_type_id)
+    @classmethod
+    def create_building(cls, env, agent, position: MapPosition):
+        building_type_id = cls.building_parameters(env)
+        bridge = Bridge(position, building_type_id)
 
         update_road_bridge_shape(bridge, env.map)
         return bridge
+
+
+def is_connected_to_roads(env, agent: Agent, x: int, y: int) -> bool:
+    """
+    Whether a road or bridge at x, y would be next to a road, a bridge or the agent's city.
+    Only the first adjacent city counts, in the order left, right, up, down.
+    """
+    map = env.map
+    tile_ids, buildings = map.neighbour_values(
+        map.building_map, x, y, 1, diagonal=False
+    )
+
+    road_ids = (BUILDING_IDS[BuildingType.ROAD], BUILDING_IDS[BuildingType.BRIDGE])
+    if np.isin(buildings, road_ids).any():
+        return True
+
+    cities = tile_ids[buildings == BUILDING_IDS[BuildingType.CITY]]
+    if len(cities):
+        city = int(cities[0])
+        return bool(map.ownership_map[city % map.width, city // map.width] == agent.id)
+
+    return False
+
+
+def is_connected_to_roads_batch(env, agent_ids, xs, ys) -> np.ndarray:
+    """
+    Vectorized is_connected_to_roads.
+    """
+    map = env.map
+    # the neighbours are looked up once per tile for all agents
+    tiles, inverse = np.unique(ys * map.width + xs, return_inverse=True)
+    inverse = inverse.ravel()
+    groups, neighbour_ids, buildings = map.neighbour_values_of(
+        map.building_map, tiles, 1, diagonal=False
+    )
+
+    road_ids = (BUILDING_IDS[BuildingType.ROAD], BUILDING_IDS[BuildingType.BRIDGE])
+    roads = np.bincount(groups[np.isin(buildings, road_ids)], minlength=len(tiles))
+
+    # owner of the first adjacent city, OWNER_DEFAULT_TILE if there is none
+    is_city = buildings == BUILDING_IDS[BuildingType.CITY]
+    city_tiles, first_city = np.unique(groups[is_city], return_index=True)
+    city_owners = np.full(len(tiles), OWNER_DEFAULT_TILE)
+    city_owners[city_tiles] = map.ownership_map.T.flat[
+        neighbour_ids[is_city][first_city]
+    ]
+
+    return (roads[inverse] > 0) | (city_owners[inverse] == agent_ids)
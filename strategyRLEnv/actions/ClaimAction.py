@@ -1,52 +1,93 @@
 from typing import Tuple
 
-from strategyRLEnv.actions.Action import Action, ActionType
+import numpy as np
+
+from strategyRLEnv.actions.Action import (Action, ActionType,
+                                          change_money_batch, discover_batch,
+                                          visible_batch)
 from strategyRLEnv.Agent import Agent
 from strategyRLEnv.map.map_settings import OWNER_DEFAULT_TILE, discovery_reward
 from strategyRLEnv.map.MapPosition import MapPosition
 
 
 class ClaimAction(Action):
+    action_name = ActionType.CLAIM.value
+
     def __init__(self, agent: Agent, position: MapPosition):
         super().__init__(agent, position, ActionType.CLAIM)
 
-    def validate(self, env) -> bool:
-        if not super().validate(env):
+    @classmethod
+    def validate_at(cls, env, agent, x: int, y: int) -> bool:
+        if not super().validate_at(env, agent, x, y):
             return False
 
-        tile = env.map.get_tile(self.position)
+        tile = env.map.tile_at(x, y)
 
         if tile.get_owner() != OWNER_DEFAULT_TILE:
             return False
 
         # check if visible for agent
-        if not env.map.is_visible(self.position, self.agent.id):
+        if not env.map.is_visible_at(x, y, agent.id):
             return False
 
         # check no unit on the tile
         if tile.unit is not None:
-            if tile.unit.owner.id != self.agent.id:
+            if tile.unit.owner.id != agent.id:
                 return False
 
         # surrounding tiles
-        adjacent_claimed, _ = env.map.tile_is_next_to_own_tile(
-            self.position, self.agent.id, 1
-        )
-        if not adjacent_claimed:
-            return False
+        _, owners = env.map.neighbour_values(env.map.ownership_map, x, y, 1)
+        return bool((owners == agent.id).any())
 
-        return True
+    @classmethod
+    def rules_batch(cls, env, agent_ids, xs, ys):
+        map = env.map
+
+        valid = map.ownership_map[xs, ys] == OWNER_DEFAULT_TILE
+        valid &= visible_batch(env, agent_ids, xs, ys)
+
+        # check no unit on the tile
+        unit_owners = map.unit_owner_map[xs, ys]
+        valid &= (unit_owners == OWNER_DEFAULT_TILE) | (unit_owners == agent_ids)
+
+        # surrounding tiles, of the actions which are valid so far
+        candidates = np.flatnonzero(valid)
+        groups, _, owners = map.neighbour_values_of(
+            map.ownership_map, ys[candidates] * map.width + xs[candidates], 1
+        )
+        own_neighbours = np.bincount(
+            groups[owners == agent_ids[candidates][groups]], minlength=len(candidates)
+        )
+        valid[candidates] = own_neighbours > 0
+        return valid
 
-    def execute(self, env):
-        env.map.claim_tile(self.agent, self.position)
-        self.agent.add_claimed_tile(self.position)
-        discovered = self.agent.update_local_visibility(self.position)
+    @classmethod
+    def execute_at(cls, env, agent, x: int, y: int) -> float:
+        tile_id = y * env.map.width + x
+        env.map.claim_tile(agent, tile_id)
+        agent.add_claimed_tile(tile_id)
+        discovered = agent.update_local_visibility(tile_id)
 
-        self.agent.money -= self.get_cost(env)
+        agent.money -= cls.action_cost(env, x, y)
 
-        reward = self.get_reward(env) + discovered * discovery_reward
+        reward = cls.action_reward(env) + discovered * discovery_reward
         return reward
 
+    @classmethod
+    def execute_batch(cls, env, agent_ids, xs, ys) -> np.ndarray:
+        map = env.map
+        tile_ids = ys * map.width + xs
+        map.claim_ids(tile_ids, agent_ids)
+        for agent_id in np.unique(agent_ids).tolist():
+            env.agents[agent_id].add_claimed_tiles(tile_ids[agent_ids == agent_id])
+        discovered = discover_batch(env, agent_ids, tile_ids)
+
+        change_money_batch(
+            env, agent_ids, np.subtract, cls.action_cost_batch(env, xs, ys)
+        )
+
+        return cls.action_reward(env) + discovered * discovery_reward
+
 
 def is_claimable(agent: Agent, position: Tuple[int, int]) -> bool:
     # check if position is in agent's claimable_tiles list
@@ -1,38 +1,75 @@
-from strategyRLEnv.actions.Action import Action, ActionType
+import numpy as np
+
+from strategyRLEnv.actions.Action import (Action, ActionType,
+                                          change_money_batch, visible_batch)
 from strategyRLEnv.Agent import Agent
-from strategyRLEnv.map.map_settings import OWNER_DEFAULT_TILE
+from strategyRLEnv.map.map_settings import (DEFAULT_BUILDING_VALUE,
+                                            OWNER_DEFAULT_TILE)
 from strategyRLEnv.map.MapPosition import MapPosition
 
 
 class DestroyAction(Action):
+    # pays the cost and gets the reward of a claim
+    action_name = ActionType.CLAIM.value
+
     def __init__(self, agent: Agent, position: MapPosition):
         super().__init__(agent, position, ActionType.CLAIM)
 
-    def validate(self, env) -> bool:
-        if not super().validate(env):
+    @classmethod
+    def validate_at(cls, env, agent, x: int, y: int) -> bool:
+        if not super().validate_at(env, agent, x, y):
             return False
 
-        tile = env.map.get_tile(self.position)
+        tile = env.map.tile_at(x, y)
 
         if tile.get_building() is None:
             return False
 
-        if tile.get_owner() != OWNER_DEFAULT_TILE and tile.get_owner() != self.agent.id:
+        if tile.get_owner() != OWNER_DEFAULT_TILE and tile.get_owner() != agent.id:
             return False
 
         # check if visible for agent
-        if not env.map.is_visible(self.position, self.agent.id):
+        if not env.map.is_visible_at(x, y, agent.id):
             return False
 
         return True
 
-    def execute(self, env) -> int:
-        building = env.map.get_tile(self.position).get_building()
+    @classmethod
+    def rules_batch(cls, env, agent_ids, xs, ys):
+        map = env.map
+
+        valid = map.building_map[xs, ys] != DEFAULT_BUILDING_VALUE
+        owners = map.ownership_map[xs, ys]
+        valid &= (owners == OWNER_DEFAULT_TILE) | (owners == agent_ids)
+        return valid & visible_batch(env, agent_ids, xs, ys)
+
+    @classmethod
+    def execute_at(cls, env, agent, x: int, y: int) -> float:
+        tile_id = y * env.map.width + x
+        building = env.map.get_tile(tile_id).get_building()
         income = building.get_income()
-        env.map.get_tile(self.position).update(env)
-        env.map.remove_building(self.position)  # remove no matter what
+        env.map.get_tile(tile_id).update(env)
+        env.map.remove_building(tile_id)  # remove no matter what
 
-        self.agent.money -= env.action_manager.actions_definition["claim"]["cost"]
-        recuperation_factor = env.action_manager.actions_definition["claim"]["reward"]
+        agent.money -= cls.action_cost(env, x, y)
+        recuperation_factor = cls.action_reward(env)
         money_return = income * recuperation_factor
         return money_return
+
+    @classmethod
+    def execute_batch(cls, env, agent_ids, xs, ys) -> np.ndarray:
+        map = env.map
+        tile_ids = ys * map.width + xs
+        incomes = np.zeros(len(tile_ids))
+        for i, tile_id in enumerate(tile_ids.tolist()):
+            building = map.buildings[tile_id]
+            # the removals before it in the batch may have changed its income
+            building.update(env)
+            incomes[i] = building.get_income()
+            map.get_tile(tile_id).remove_building()
+        map.update_tiles_around(tile_ids)
+
+        change_money_batch(
+            env, agent_ids, np.subtract, cls.action_cost_batch(env, xs, ys)
+        )
+        return incomes * cls.action_reward(env)
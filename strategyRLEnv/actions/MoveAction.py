@@ -31,6 +31,8 @@ def calculate_new_position(
 
 
 class MoveAction(Action):
+    action_name = "move"
+
     def __init__(self, agent: Agent, direction: int):
         super().__init__(agent, (-1, -1), ActionType.MOVE)
 
@@ -39,8 +41,12 @@ class MoveAction(Action):
         self.direction = direction
         self.position = calculate_new_position(self.agent.position, self.direction)
 
-    def execute(self, env) -> int:
-        self.agent.position = self.position
-        self.agent.money -= env.action_manager.actions_definition["move"]["cost"]
-        reward = env.action_manager.actions_definition["move"]["reward"]
+    @classmethod
+    def execute_at(cls, env, agent, x: int, y: int) -> float:
+        agent.position = (x, y)
+        agent.money -= cls.action_cost(env, x, y)
+        reward = cls.action_reward(env)
         return reward
+
+    def execute(self, env) -> float:
+        return self.execute_at(env, self.agent, *self.position)
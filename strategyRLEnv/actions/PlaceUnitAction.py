@@ -1,77 +1,171 @@
-from strategyRLEnv.actions.Action import Action, ActionType
-from strategyRLEnv.actions.BuildAction import (fit_building_to_land_type)
+import numpy as np
+
+from strategyRLEnv.actions.Action import (Action, ActionType,
+                                          change_money_batch, discover_batch,
+                                          visible_batch)
+from strategyRLEnv.actions.BuildAction import allowed_land_types
 from strategyRLEnv.Agent import Agent
-from strategyRLEnv.map.map_settings import (OWNER_DEFAULT_TILE,
-                                            conquer_threshold, discovery_reward)
-from strategyRLEnv.map.MapPosition import MapPosition
+from strategyRLEnv.map.map_settings import (ALLOWED_BUILDING_PLACEMENTS,
+                                            OWNER_DEFAULT_TILE,
+                                            conquer_threshold,
+                                            discovery_reward,
+                                            max_unit_strength)
+from strategyRLEnv.map.MapPosition import MapPosition, Tile
 from strategyRLEnv.objects.Unit import Unit
 
 
 class PlaceUnitAction(Action):
+    action_name = "place_unit"
+
     def __init__(self, agent: Agent, position: MapPosition):
         super().__init__(agent, position, ActionType.UNIT)
 
-    def validate(self, env) -> bool:
-        if not super().validate(env):
+    @classmethod
+    def validate_at(cls, env, agent, x: int, y: int) -> bool:
+        if not super().validate_at(env, agent, x, y):
             return False
 
         # check if visible for agent
-        if not env.map.is_visible(self.position, self.agent.id):
+        if not env.map.is_visible_at(x, y, agent.id):
             return False
 
-        if not fit_building_to_land_type(env, self.position, "UNIT"):
+        tile = env.map.tile_at(x, y)
+        if tile.get_land_type() not in ALLOWED_BUILDING_PLACEMENTS["UNIT"]:
             return False
 
-        if not check_if_claiming_enemy_tile(env, self.position, self.agent.id):
+        if not can_claim_tile(env, tile, x, y, agent.id):
             return False
 
         # check if there is a enemy unit on the tile
-        tile = env.map.get_tile(self.position)
         if tile.unit is not None:
-            if tile.unit.owner.id != self.agent.id:
+            if tile.unit.owner.id != agent.id:
                 return False
 
         return True
 
-    def execute(self, env):
-        tile = env.map.get_tile(self.position)
+    @classmethod
+    def rules_batch(cls, env, agent_ids, xs, ys):
+        map = env.map
+
+        valid = visible_batch(env, agent_ids, xs, ys)
+        valid &= allowed_land_types("UNIT")[map.landtype_map[xs, ys]]
+        valid &= can_claim_tile_batch(env, agent_ids, xs, ys)
+
+        # check if there is a enemy unit on the tile
+        unit_owners = map.unit_owner_map[xs, ys]
+        valid &= (unit_owners == OWNER_DEFAULT_TILE) | (unit_owners == agent_ids)
+        return valid
+
+    @classmethod
+    def execute_at(cls, env, agent, x: int, y: int) -> float:
+        tile_id = y * env.map.width + x
+        tile = env.map.get_tile(tile_id)
         discovery = 0
-        if tile.owner_id != OWNER_DEFAULT_TILE and tile.owner_id != self.agent.id:
+        if tile.owner_id != OWNER_DEFAULT_TILE and tile.owner_id != agent.id:
             # also claim the tile
-            env.map.claim_tile(self.agent, self.position)
-            self.agent.add_claimed_tile(self.position)
-            discovery = self.agent.update_local_visibility(self.position)
+            env.map.claim_tile(agent, tile_id)
+            agent.add_claimed_tile(tile_id)
+            discovery = agent.update_local_visibility(tile_id)
 
-        if tile.unit is not None and tile.unit.owner.id == self.agent.id:
+        if tile.unit is not None and tile.unit.owner.id == agent.id:
             # add strength to unit
             tile.unit.increase_strength(env, 50)
 
         else:
-            unit = Unit(self.agent, self.position)
-            env.agents[self.agent.id].add_unit(unit)
-            env.map.add_unit(unit, self.position)
-            discovery = self.agent.update_local_visibility(self.position)
+            unit = Unit(agent, MapPosition(x, y))
+            env.agents[agent.id].add_unit(unit)
+            env.map.add_unit(unit, tile_id)
+            discovery = agent.update_local_visibility(tile_id)
 
-        self.agent.money -= self.get_cost(env)
+        agent.money -= cls.action_cost(env, x, y)
         reward = discovery * discovery_reward
         return reward
 
-    def get_cost(self, env) -> float:
-        """Return the cost of the action."""
-        return env.env_settings.get("actions")["place_unit"]["cost"]
+    @classmethod
+    def execute_batch(cls, env, agent_ids, xs, ys) -> np.ndarray:
+        map = env.map
+        agents = env.agents
+        tile_ids = ys * map.width + xs
+
+        # also claim the enemy tiles
+        owners = map.ownership_map[xs, ys]
+        enemy = (owners != OWNER_DEFAULT_TILE) & (owners != agent_ids)
+        map.claim_ids(tile_ids[enemy], agent_ids[enemy])
+        for agent_id in np.unique(agent_ids[enemy]).tolist():
+            agents[agent_id].add_claimed_tiles(
+                tile_ids[enemy & (agent_ids == agent_id)]
+            )
+
+        # add strength to the units of the agents, place a unit on the other tiles
+        reinforced = map.unit_owner_map[xs, ys] == agent_ids
+        strengths = np.minimum(
+            max_unit_strength,
+            map.unit_strength_map[xs[reinforced], ys[reinforced]] + 50,
+        )
+        map.unit_strength_map[xs[reinforced], ys[reinforced]] = strengths
+        for tile_id, strength in zip(tile_ids[reinforced].tolist(), strengths.tolist()):
+            map.units[tile_id].strength = strength
+        placed = np.flatnonzero(~reinforced)
+        for agent_id, x, y, tile_id in zip(
+            agent_ids[placed].tolist(),
+            xs[placed].tolist(),
+            ys[placed].tolist(),
+            tile_ids[placed].tolist(),
+        ):
+            unit = Unit(agents[agent_id], MapPosition(x, y))
+            agents[agent_id].add_unit(unit)
+            map.add_unit(unit, tile_id)
 
+        # the visibility is updated once for a claim or a new unit, execute_at updates it
+        # a second time for a claim with a new unit, which discovers nothing
+        updated = np.flatnonzero(enemy | ~reinforced)
+        discovered = np.zeros(len(tile_ids))
+        discovered[updated] = discover_batch(env, agent_ids[updated], tile_ids[updated])
+        discovered[enemy & ~reinforced] = 0
 
-def check_if_claiming_enemy_tile(env, position: MapPosition, agent_id: int) -> bool:
+        change_money_batch(
+            env, agent_ids, np.subtract, cls.action_cost_batch(env, xs, ys)
+        )
+        return discovered * discovery_reward
+
+
+def check_if_claiming_enemy_tile(env, position: Tile, agent_id: int) -> bool:
     tile = env.map.get_tile(position)
+    return can_claim_tile(env, tile, tile.x, tile.y, agent_id)
+
+
+def can_claim_tile(env, tile, x: int, y: int, agent_id: int) -> bool:
+    """
+    Whether the tile is unclaimed, the agent's or an enemy tile surrounded by enough of the agent's units.
+    """
     if tile.owner_id != OWNER_DEFAULT_TILE and tile.owner_id != agent_id:
-        surrounding = env.map.get_surrounding_tiles(position, 1, diagonal=True)
-        friendly_unit_count = 0
-        for tile in surrounding:
-            if tile.unit is not None and tile.unit.owner.id == agent_id:
-                friendly_unit_count += 1
+        _, unit_owners = env.map.neighbour_values(
+            env.map.unit_owner_map, x, y, 1, diagonal=True
+        )
+        friendly_unit_count = np.count_nonzero(unit_owners == agent_id)
         if friendly_unit_count >= conquer_threshold:
             return True
         else:
             return False
     # our own tile
     return True
+
+
+def can_claim_tile_batch(env, agent_ids, xs, ys) -> np.ndarray:
+    """
+    Vectorized can_claim_tile, the positions must be on the map.
+    """
+    map = env.map
+    owners = map.ownership_map[xs, ys]
+    claimable = (owners == OWNER_DEFAULT_TILE) | (owners == agent_ids)
+
+    # enemy tiles, count the agent's units around them
+    enemy = np.flatnonzero(~claimable)
+    groups, _, unit_owners = map.neighbour_values_of(
+        map.unit_owner_map, ys[enemy] * map.width + xs[enemy], 1
+    )
+    friendly_unit_count = np.bincount(
+        groups[unit_owners == agent_ids[enemy][groups]], minlength=len(enemy)
+    )
+    claimable[enemy] = friendly_unit_count >= conquer_threshold
+    return claimable
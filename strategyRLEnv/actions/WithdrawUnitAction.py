@@ -1,41 +1,73 @@
-from strategyRLEnv.actions.Action import Action, ActionType
+import numpy as np
+
+from strategyRLEnv.actions.Action import (Action, ActionType,
+                                          change_money_batch, visible_batch)
 from strategyRLEnv.Agent import Agent
 from strategyRLEnv.map.MapPosition import MapPosition
 
 
 class WithdrawUnitAction(Action):
+    action_name = "withdraw_unit"
+
     def __init__(self, agent: Agent, position: MapPosition):
         super().__init__(agent, position, ActionType.UNIT)
 
-    def validate(self, env) -> bool:
-        if not super().validate(env):
+    @classmethod
+    def validate_at(cls, env, agent, x: int, y: int) -> bool:
+        if not super().validate_at(env, agent, x, y):
             return False
 
         # check if visible for agent
-        if not env.map.is_visible(self.position, self.agent.id):
+        if not env.map.is_visible_at(x, y, agent.id):
             return False
 
         # check if there is a unit on the tile
-        if env.map.get_tile(self.position).unit is None:
+        unit = env.map.tile_at(x, y).unit
+        if unit is None:
             return False
 
         # check if the unit is owned by the agent
-        if env.map.get_tile(self.position).unit.owner.id != self.agent.id:
+        if unit.owner.id != agent.id:
             return False
 
         return True
 
-    def execute(self, env):
-        unit = env.map.get_tile(self.position).unit
-        env.map.remove_unit(self.position)
+    @classmethod
+    def rules_batch(cls, env, agent_ids, xs, ys):
+        valid = visible_batch(env, agent_ids, xs, ys)
+        # there is a unit of the agent on the tile
+        return valid & (env.map.unit_owner_map[xs, ys] == agent_ids)
+
+    @classmethod
+    def money_spent_batch(cls, env, xs, ys):
+        # the cost setting is the share of the unit strength paid back, nothing is spent
+        return np.zeros(len(xs))
 
-        self.agent.remove_unit(unit)
+    @classmethod
+    def execute_at(cls, env, agent, x: int, y: int) -> float:
+        tile_id = y * env.map.width + x
+        unit = env.map.get_tile(tile_id).unit
+        env.map.remove_unit(tile_id)
 
-        ratio = self.get_cost(env)  # in this case a ration how much is returned
-        self.agent.money += unit.strength * ratio
+        agent.remove_unit(unit)
+
+        # in this case a ration how much is returned
+        ratio = cls.action_cost(env, x, y)
+        agent.money += unit.strength * ratio
         reward = unit.strength * ratio
         return reward
 
-    def get_cost(self, env) -> float:
-        """Return the cost of the action."""
-        return env.env_settings.get("actions")["withdraw_unit"]["cost"]
+    @classmethod
+    def execute_batch(cls, env, agent_ids, xs, ys) -> np.ndarray:
+        map = env.map
+        strengths = map.unit_strength_map[xs, ys].astype(float)
+        for agent_id, tile_id in zip(
+            agent_ids.tolist(), (ys * map.width + xs).tolist()
+        ):
+            unit = map.units[tile_id]
+            map.remove_unit(tile_id)
+            env.agents[agent_id].remove_unit(unit)
+
+        refunds = strengths * cls.action_cost_batch(env, xs, ys)
+        change_money_batch(env, agent_ids, np.add, refunds)
+        return refunds
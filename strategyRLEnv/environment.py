@@ -1,20 +1,20 @@
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Union
 
 import gymnasium as gym
 import numpy as np
-import pygame
 from gymnasium import spaces
+from gymnasium.utils import seeding
 
-from strategyRLEnv.ActionManager import ActionManager
+from strategyRLEnv.ActionManager import ActionManager, check_action_array
+from strategyRLEnv.ActionMasks import ActionMasks
 from strategyRLEnv.Agent import Agent
-from strategyRLEnv.map.map_settings import killed_punish_value
+from strategyRLEnv.ChannelBox import ChannelBox
+from strategyRLEnv.EnvConfig import EnvConfig
+from strategyRLEnv.map.Map import STATIC_MAP_FEATURES, compile_map_features
+from strategyRLEnv.map.map_settings import killed_punish_value, max_agent_id
 from strategyRLEnv.map.mapGenerator import generate_finished_map
 from strategyRLEnv.map.MapPosition import MapPosition
-
-
-def capture_game_state_as_image():
-    screen_capture = pygame.display.get_surface()
-    return np.transpose(pygame.surfarray.array3d(screen_capture), axes=[1, 0, 2])
+from strategyRLEnv.RegionActions import RegionActions
 
 
 class MapEnvironment(gym.Env):
@@ -23,9 +23,18 @@ class MapEnvironment(gym.Env):
 
     Attributes:
         env_settings (Dict[str, Any]): A dictionary containing environment settings.
+        config (EnvConfig): The env_settings parsed into the cost and reward tables read by the actions.
         num_agents (int): The number of agents in the environment.
-        render_mode (str): The mode to render with. Options are 'human' or 'rgb_array'.
+        render_mode (Optional[str]): The mode to render with. Options are None (headless), 'human' or 'rgb_array'.
         seed (Optional[int]): The seed for the environment's random number generator.
+        reuse_observation_buffers (bool): If True, observations are written into buffers owned by the
+            environment and returned as read-only views. The views are overwritten by the next
+            reset() or step(), copy them to keep an observation.
+        split_static_observation (bool): If True, the terrain features (land_type, resources) are left out of
+            the "map" observation. They are returned once per episode in the reset() info as "static_observation"
+            and by static_observation(), described by static_observation_space.
+        region_actions (RegionActions): If region_size is set, actions pick a region of
+            region_size x region_size tiles instead of a tile, None for per tile actions.
     """
 
     metadata = {"render.modes": ["human", "rgb_array"]}
@@ -34,8 +43,12 @@ class MapEnvironment(gym.Env):
         self,
         env_settings: Any,
         num_agents: int,
-        render_mode: str = "rgb_array",
+        render_mode: Optional[str] = "rgb_array",
         seed: Optional[int] = None,
+        reuse_observation_buffers: bool = False,
+        split_static_observation: bool = False,
+        region_size: Optional[int] = None,
+        region_score: Optional[Callable[..., np.ndarray]] = None,
     ):
         super(MapEnvironment, self).__init__()
 
@@ -43,22 +56,34 @@ class MapEnvironment(gym.Env):
             raise ValueError("env_settings should be a dictionary")
         if not isinstance(num_agents, int):
             raise ValueError("num_agents should be an integer")
-        if render_mode not in ["human", "rgb_array"]:
-            raise ValueError("render_mode should be either 'human' or 'rgb_array'")
+        if num_agents > max_agent_id:
+            raise ValueError(f"num_agents should be at most {max_agent_id}")
+        if render_mode not in [None, "human", "rgb_array"]:
+            raise ValueError(
+                "render_mode should be either None, 'human' or 'rgb_array'"
+            )
         if seed is not None:
             if not isinstance(seed, int):
                 raise ValueError("seed should be an integer")
 
         self.env_settings = env_settings
+        self.config = EnvConfig.from_settings(env_settings)
+
+        # np_random and the child streams of the map generation derive from the same seed
+        self._seed_sequence = np.random.SeedSequence(seed)
+        self._np_random, self._np_random_seed = seeding.np_random(seed)
         self.num_agents = num_agents
 
         self.render_mode = render_mode
         self.screen_width = 1000
         self.screen_height = 1000
-        self.screen = self.setup_screen()
+        # created on the first render() call, headless until then
+        self.screen = None
 
         # Initialize the map
-        self.map = generate_finished_map(self, self.env_settings)
+        self.map = generate_finished_map(self, self.env_settings, rng=self.spawn_rng())
+        # sample_legal_actions draws from its own stream, it does not change the game's draws
+        self._sample_rng = self.spawn_rng()
 
         # Initialize agents
         self.agents: List[Agent] = [Agent(i, self) for i in range(self.num_agents)]
@@ -68,31 +93,79 @@ class MapEnvironment(gym.Env):
         self.action_manager = ActionManager(self)
         self.action_mapping = None
 
+        self.region_actions = None
+        if region_size is not None:
+            self.region_actions = RegionActions(self, region_size, region_score)
+
         # Define action and observation spaces
+        self.split_static_observation = split_static_observation
+        self._static_observation = None
         self.observation_space = self._define_observation_space()
         self.action_space = self._define_action_space()
+        self.legal_actions = ActionMasks(self)
+
+        self.reuse_observation_buffers = reuse_observation_buffers
+        self._observation_buffers = None
+        self._observation_views = None
+        if reuse_observation_buffers:
+            self._observation_buffers = {
+                key: np.zeros(space.shape, dtype=space.dtype)
+                for key, space in self.observation_space.spaces.items()
+            }
+            self._observation_views = {}
+            for key, buffer in self._observation_buffers.items():
+                view = buffer.view()
+                view.flags.writeable = False
+                self._observation_views[key] = view
 
-    def reset(self, seed=None, map_file=None):
+    def reset(self, seed=None, map_file=None, options: Optional[dict] = None):
         """
         Resets the environment to an initial state and returns an initial observation.
         Args:
             seed: The seed for the environment's random number generator.
             map_file: if defined, the map will be created from the topology defined in the file
+            options: may contain "map_file", used instead of the map_file argument
         """
 
         if seed is not None:
             if not isinstance(seed, int):
                 raise ValueError("seed should be an integer")
+        if options is not None:
+            map_file = options.get("map_file", map_file)
 
         super().reset(seed=seed)
-        self.map = generate_finished_map(self, self.env_settings, map_file)
+        if seed is not None:
+            self._seed_sequence = np.random.SeedSequence(seed)
+        self.map = generate_finished_map(
+            self, self.env_settings, map_file, rng=self.spawn_rng()
+        )
+        if seed is not None:
+            self._sample_rng = self.spawn_rng()
+        self.done_agents = []
+        self._static_observation = None
         for agent in self.agents:
             agent.reset()
         observations = self._get_observation()
         info = {"info": "no info here"}
+        if self.split_static_observation:
+            info["static_observation"] = self.static_observation()
         return observations, info
 
-    def step(self, actions: List[List[List[int]]]):
+    def static_observation(self):
+        """
+        The map features which do not change during an episode, in the order of static_observation_space.
+        Computed once per episode, the returned array is read-only and stays valid until the next reset().
+
+        Returns:
+            np.ndarray: array of shape (static features, width, height)
+        """
+        if self._static_observation is None:
+            static_observation = self.map.get_static_observation()
+            static_observation.flags.writeable = False
+            self._static_observation = static_observation
+        return self._static_observation
+
+    def step(self, actions: Union[List[List[List[int]]], np.ndarray]):
         """
         Executes the actions for all agents and updates the environment state.
 
@@ -101,24 +174,47 @@ class MapEnvironment(gym.Env):
             dimension 1 : list of agents,
             dimension 2 : list of agents per action,
             dimension 3 : ndarray of action parameters
+            or an integer array of shape (num_agents, k, 3), rows with action_id -1 (ACTION_PADDING) are ignored
         """
         # input validation
-        if (not isinstance(actions, list)) or (not isinstance(actions[0], list)):
-            raise ValueError("actions should be a 3D list of integers")
-        if not len(actions[0][0]) == 3:
-            raise ValueError(
-                "each individual action is should be defined by 3 integers, [action_id, x, y]"
-            )
+        if isinstance(actions, np.ndarray):
+            if actions.ndim != 3 or actions.shape[0] > self.num_agents:
+                raise ValueError(
+                    "actions should be an integer array of shape (num_agents, k, 3)"
+                )
+            check_action_array(actions, *self.action_space.nvec)
+        else:
+            if (not isinstance(actions, list)) or (not isinstance(actions[0], list)):
+                raise ValueError("actions should be a 3D list of integers")
+            if not len(actions[0][0]) == 3:
+                raise ValueError(
+                    "each individual action is should be defined by 3 integers, [action_id, x, y]"
+                )
 
         info = {}
+        rewards, dones, truncated = self._apply_step(actions)
+        observations = self._get_observation()
+
+        return observations, rewards, dones, truncated, info
+
+    def _apply_step(self, actions):
+        """
+        Applies the actions and advances the game state by one turn, without building an observation.
+
+        Args:
+            actions: per agent sequence of [action_id, x, y] actions, see step()
+
+        Returns:
+            rewards, dones, truncated for all agents
+        """
         old_done_numb = len(self.done_agents)
 
+        if self.region_actions is not None:
+            actions = self.region_actions.resolve(actions)
         rewards, dones = self.action_manager.apply_actions(actions)
 
         self._update_environment_state()
 
-        observations = self._get_observation()
-
         truncated = [False for _ in range(self.num_agents)]  # always False for now
         dones = [False for _ in range(self.num_agents)]
         for i in self.done_agents:
@@ -131,7 +227,58 @@ class MapEnvironment(gym.Env):
                 died_id = self.done_agents[old_done_numb + i]
                 rewards[died_id] -= killed_punish_value
 
-        return observations, rewards, dones, truncated, info
+        return rewards, dones, truncated
+
+    def action_masks(self, sparse: bool = False):
+        """
+        The actions of all agents which would pass validation in the current state.
+        The masks are updated incrementally from the tiles changed since the last call.
+
+        Args:
+            sparse: if True, return the legal actions as rows instead of a dense mask
+
+        Returns:
+            bool array of shape (num_agents, action types, width, height) matching the action space,
+            or if sparse per agent an integer array of [action_id, x, y] rows, wait is listed once at (0, 0).
+            In the region mode the positions are regions, legal if the action is legal on any tile of it.
+        """
+        if self.region_actions is not None:
+            if sparse:
+                return self.region_actions.sparse(self.legal_actions.sparse())
+            return self.region_actions.masks(self.legal_actions.dense())
+        if sparse:
+            return self.legal_actions.sparse()
+        return self.legal_actions.dense()
+
+    def spawn_rng(self) -> np.random.Generator:
+        """
+        A generator on a new child stream of the environment's seed, independent of np_random
+        and of the other child streams. Reproducible for the same seed and order of calls.
+        """
+        return np.random.default_rng(self._seed_sequence.spawn(1)[0])
+
+    def sample_legal_actions(
+        self, k_per_agent: int = 1, rng: Optional[np.random.Generator] = None
+    ) -> np.ndarray:
+        """
+        Draw actions uniformly from the legal actions of each agent, see action_masks(sparse=True).
+
+        Args:
+            k_per_agent: the number of actions drawn per agent, with replacement
+            rng: the random generator to draw with. If None, a generator spawned from the env's seed,
+                separate from np_random, so sampling does not change the game's random draws
+
+        Returns:
+            integer array of shape (num_agents, k_per_agent, 3) which can be passed to step(),
+            agents without legal actions get ACTION_PADDING rows
+        """
+        if rng is None:
+            rng = self._sample_rng
+        samples = self.legal_actions.sample(k_per_agent, rng)
+        if self.region_actions is not None:
+            # the regions of legal tiles, drawn in proportion to their legal tiles
+            return self.region_actions.to_regions(samples)
+        return samples
 
     def render(self):
         """
@@ -143,13 +290,22 @@ class MapEnvironment(gym.Env):
         Returns:
             Optional[np.ndarray]: The rendered image array if mode is 'rgb_array', else None.
         """
-        self.map.draw(self.screen, 1, 0, 0)
-        for agent in self.agents:
-            agent.draw(self.map.tile_size, 0, 0, 0)
+        if self.render_mode is None:
+            gym.logger.warn(
+                "render() was called without a render_mode, "
+                "create the environment with render_mode 'human' or 'rgb_array'"
+            )
+            return None
+
+        from strategyRLEnv import renderer
+
+        if self.screen is None:
+            self.screen = self.setup_screen()
+        renderer.draw_env(self.screen, self)
 
         if self.render_mode == "human":
             # Update the display
-            pygame.display.flip()
+            renderer.flip()
 
             print(
                 f"Player: Money: {self.agents[0].money}, Last Money PL: {self.agents[0].last_money_pl}"
@@ -158,8 +314,7 @@ class MapEnvironment(gym.Env):
 
         elif self.render_mode == "rgb_array":
             # Return an RGB array of the current frame
-            pygame.display.flip()
-            screen_capture = capture_game_state_as_image()
+            screen_capture = renderer.capture_game_state_as_image(self.screen)
             return screen_capture
         else:
             raise NotImplementedError("Unknown render mode !!")
@@ -168,7 +323,11 @@ class MapEnvironment(gym.Env):
         """
         Closes the environment.
         """
-        pygame.quit()
+        if self.screen is not None:
+            from strategyRLEnv import renderer
+
+            renderer.close()
+            self.screen = None
 
     def _define_observation_space(self):
         data = self.env_settings["map_features"]
@@ -183,35 +342,38 @@ class MapEnvironment(gym.Env):
         ]
         self.agent_features = selected_features
 
-        # map observation space
-        map_feature_mins = np.zeros(
-            (len(self.features_per_tile), 1, 1), dtype=np.float32
+        self.static_map_features = [
+            feature
+            for feature in self.features_per_tile
+            if feature["name"] in STATIC_MAP_FEATURES
+        ]
+        self.dynamic_map_features = [
+            feature
+            for feature in self.features_per_tile
+            if feature["name"] not in STATIC_MAP_FEATURES
+        ]
+        # unselected features are never computed
+        self.map_feature_extractors = compile_map_features(self.features_per_tile)
+        self.static_map_feature_extractors = compile_map_features(
+            self.static_map_features
         )
-        map_feature_maxs = np.zeros(
-            (len(self.features_per_tile), 1, 1), dtype=np.float32
+        self.dynamic_map_feature_extractors = compile_map_features(
+            self.dynamic_map_features
         )
 
-        i = 0
-        for feature in self.features_per_tile:
-            map_feature_mins[i] = float(feature["values"]["min"])
-            map_feature_maxs[i] = float(feature["values"]["max"])
-            i += 1
+        self.static_observation_space = self._define_map_feature_space(
+            self.static_map_features
+        )
 
-        map_low = (
-            np.zeros(
-                (len(self.features_per_tile), self.map.width, self.map.height),
-                dtype=np.float32,
+        # map observation space
+        if self.split_static_observation:
+            map_observation_space = self._define_map_feature_space(
+                self.dynamic_map_features
             )
-            + map_feature_mins
-        )
-        map_high = (
-            np.zeros(
-                (len(self.features_per_tile), self.map.width, self.map.height),
-                dtype=np.float32,
+        else:
+            map_observation_space = self._define_map_feature_space(
+                self.features_per_tile
             )
-            + map_feature_maxs
-        )
-        map_observation_space = spaces.Box(low=map_low, high=map_high, dtype=np.float32)
 
         # agent observation space
         agent_feature_mins = np.zeros(len(self.agent_features), dtype=np.float32)
@@ -223,38 +385,18 @@ class MapEnvironment(gym.Env):
             agent_feature_maxs[i] = float(feature["values"]["max"])
             i += 1
 
-        agent_low = (
-            np.zeros(
-                (self.num_agents, len(self.agent_features)),
-                dtype=np.float32,
-            )
-            + agent_feature_mins
-        )
-        agent_high = (
-            np.zeros(
-                (self.num_agents, len(self.agent_features)),
-                dtype=np.float32,
-            )
-            + agent_feature_maxs
-        )
-
-        agents_observation_space = spaces.Box(
-            low=agent_low,
-            high=agent_high,
+        agents_observation_space = ChannelBox(
+            low=agent_feature_mins,
+            high=agent_feature_maxs,
             shape=(self.num_agents, len(self.agent_features)),
             dtype=np.float32,
         )
 
         # define visibility map observation space
-        visibility_map_low = np.zeros((self.map.width, self.map.height), dtype=np.int64)
-        visibility_map_high = np.zeros(
-            (self.map.width, self.map.height), dtype=np.int64
-        )
         highest_value = 2**63 - 1
-        visibility_map_high.fill(highest_value)
-        visibility_map_observation_space = spaces.Box(
-            low=visibility_map_low,
-            high=visibility_map_high,
+        visibility_map_observation_space = ChannelBox(
+            low=0,
+            high=highest_value,
             shape=(self.map.width, self.map.height),
             dtype=np.int64,
         )
@@ -267,21 +409,33 @@ class MapEnvironment(gym.Env):
             }
         )
 
-    def _define_action_space(self):
-        actions = self.env_settings["actions"]
+    def _define_map_feature_space(self, features):
+        # bounds per feature channel, broadcast over the map
+        map_feature_mins = np.zeros((len(features), 1, 1), dtype=np.float32)
+        map_feature_maxs = np.zeros((len(features), 1, 1), dtype=np.float32)
 
-        enabled_actions = []
+        i = 0
+        for feature in features:
+            map_feature_mins[i] = float(feature["values"]["min"])
+            map_feature_maxs[i] = float(feature["values"]["max"])
+            i += 1
 
-        for action_name, action_properties in actions.items():
-            if action_name == "invalid_action_penalty":
-                continue
-            # Check if the action is enabled (cost is not -1)
-            if action_properties.get("cost", -1) >= 0:
-                enabled_actions.append(action_name)
+        return ChannelBox(
+            low=map_feature_mins,
+            high=map_feature_maxs,
+            shape=(len(features), self.map.width, self.map.height),
+            dtype=np.float32,
+        )
+
+    def _define_action_space(self):
+        # the enabled actions (cost is not -1) come first in the config
+        num_action_types = self.config.num_action_types
+        enabled_actions = self.config.action_names[:num_action_types]
 
-        num_action_types = len(enabled_actions)
         grid_width = self.map.width
         grid_height = self.map.height
+        if self.region_actions is not None:
+            grid_width, grid_height = self.region_actions.shape
 
         self.action_mapping = {
             i: action_name for i, action_name in enumerate(enabled_actions)
@@ -295,26 +449,41 @@ class MapEnvironment(gym.Env):
         Updates the environment state after actions have been applied.
         """
         # update agents in random order
-        copy = self.agents.copy()
-        np.random.shuffle(copy)
-        for agent in self.agents:
-            agent.update()
+        for agent_id in self.np_random.permutation(len(self.agents)).tolist():
+            self.agents[agent_id].update()
 
-    def _get_observation(self):
+    def _get_observation(self, out=None):
         """
         Constructs the observation dictionary.
 
+        Args:
+            out: optional dict of arrays matching the observation space to fill in place,
+                e.g. slots of a vectorized buffer. If not given and reuse_observation_buffers is set,
+                the environment's own buffers are filled and read-only views of them are returned.
+
         Returns:
             observation (Dict[str, Any]): The current observation.
         """
-
-        map_observation, visibility_map = self.map.get_observation()
-        agent_observations = np.zeros(
-            (self.num_agents, len(self.agent_features)), dtype=np.float32
-        )
+        if out is None and self.reuse_observation_buffers:
+            self._get_observation(self._observation_buffers)
+            return dict(self._observation_views)
+
+        include_static = not self.split_static_observation
+        if out is None:
+            map_observation, visibility_map = self.map.get_observation(
+                include_static=include_static
+            )
+            agent_observations = np.zeros(
+                (self.num_agents, len(self.agent_features)), dtype=np.float32
+            )
+        else:
+            map_observation, visibility_map = self.map.get_observation(
+                out["map"], out["visibility_map"], include_static
+            )
+            agent_observations = out["agents"]
 
         for i, agent in enumerate(self.agents):
-            agent_observations[i] = agent.get_observation()
+            agent.get_observation(agent_observations[i])
 
         return {
             "map": map_observation,
@@ -323,14 +492,9 @@ class MapEnvironment(gym.Env):
         }
 
     def setup_screen(self):
-        pygame.init()
+        # pygame is only loaded once a screen is needed
+        from strategyRLEnv import renderer
 
-        if self.render_mode != "human":
-            screen = pygame.display.set_mode(
-                (self.screen_width, self.screen_height), pygame.HIDDEN
-            )
-        else:
-            screen = pygame.display.set_mode((self.screen_width, self.screen_height))
-        pygame.display.set_caption("Agent-based Strategy RL")
-        screen.fill((0, 0, 0))  # Fill the screen with black color
-        return screen
+        return renderer.setup_screen(
+            self.screen_width, self.screen_height, self.render_mode
+        )
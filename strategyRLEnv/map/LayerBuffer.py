@@ -0,0 +1,85 @@
+from typing import Dict
+
+import numpy as np
+
+# byte alignment of the layers in the buffer, one cache line
+LAYER_ALIGNMENT = 64
+
+
+def layer_buffer_nbytes(width: int, height: int, dtypes: Dict[str, type]) -> int:
+    """
+    The size in bytes of the buffer holding (width, height) layers of the given dtypes.
+    """
+    nbytes = 0
+    for dtype in dtypes.values():
+        size = width * height * np.dtype(dtype).itemsize
+        nbytes += -(-size // LAYER_ALIGNMENT) * LAYER_ALIGNMENT
+    return nbytes
+
+
+class LayerBuffer:
+    """
+    Per tile layers stored channels-first in one contiguous byte buffer.
+
+    Every layer is a (width, height) array of its own dtype at a fixed, aligned offset of the buffer,
+    the layers are views into it. Copying, snapshotting or sharing the buffer moves all layers at
+    once. The buffer may have leading dimensions, e.g. (num_envs, nbytes) for the maps of several
+    worlds, the layers then have the same leading dimensions.
+
+    Attributes:
+        width (int): The width of the layers.
+        height (int): The height of the layers.
+        dtypes (Dict[str, np.dtype]): The dtype of every layer, in buffer order.
+        offsets (Dict[str, int]): The byte offset of every layer.
+        nbytes (int): The size of the buffer in bytes, without leading dimensions.
+        buffer (np.ndarray): uint8 array of shape (..., nbytes).
+    """
+
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        dtypes: Dict[str, type],
+        buffer: np.ndarray = None,
+    ):
+        """
+        :param dtypes: layer name to dtype, in buffer order
+        :param buffer: optional uint8 array of shape (..., nbytes) to use, e.g. a row of a batched
+            buffer or an array on a shared memory block. A new zeroed buffer is allocated if None.
+        """
+        self.width = width
+        self.height = height
+        self.dtypes = {name: np.dtype(dtype) for name, dtype in dtypes.items()}
+        self.nbytes = layer_buffer_nbytes(width, height, dtypes)
+
+        self.offsets = {}
+        offset = 0
+        for name, dtype in self.dtypes.items():
+            self.offsets[name] = offset
+            size = width * height * dtype.itemsize
+            offset += -(-size // LAYER_ALIGNMENT) * LAYER_ALIGNMENT
+
+        if buffer is None:
+            buffer = np.zeros(self.nbytes, dtype=np.uint8)
+        if buffer.dtype != np.uint8 or buffer.shape[-1:] != (self.nbytes,):
+            raise ValueError(f"buffer should be a uint8 array of {self.nbytes} bytes")
+        self.buffer = buffer
+
+    def layer(self, name: str) -> np.ndarray:
+        """
+        The view of a layer, of shape buffer.shape[:-1] + (width, height).
+        """
+        dtype = self.dtypes[name]
+        start = self.offsets[name]
+        size = self.width * self.height * dtype.itemsize
+        return (
+            self.buffer[..., start : start + size]
+            .view(dtype)
+            .reshape(self.buffer.shape[:-1] + (self.width, self.height))
+        )
+
+    def snapshot(self) -> np.ndarray:
+        """
+        A copy of the buffer, a single memcpy of all layers. Read it with LayerBuffer(..., snapshot).
+        """
+        return self.buffer.copy()
@@ -1,20 +1,104 @@
 import uuid
+from operator import attrgetter
+from typing import Tuple
 
 import numpy as np
 
 from strategyRLEnv.Agent import Agent
-from strategyRLEnv.map.map_settings import (OWNER_DEFAULT_TILE, BuildingType,
-                                            max_agent_id)
-from strategyRLEnv.map.MapPosition import MapPosition
+from strategyRLEnv.map.LayerBuffer import LayerBuffer
+from strategyRLEnv.map.map_settings import (BUILDING_IDS,
+                                            DEFAULT_BUILDING_VALUE,
+                                            LAND_MONEY_VALUES,
+                                            OWNER_DEFAULT_TILE, BuildingType,
+                                            LandType, max_agent_id)
+from strategyRLEnv.map.MapPosition import MapPosition, Tile
 from strategyRLEnv.map.MapSquare import Map_Square
-
-DEFAULT_BUILDING_VALUE = -1
+from strategyRLEnv.map.NeighbourTable import (NeighbourTable,
+                                              neighbour_offsets,
+                                              neighbour_table)
+
+# side length in tiles of the blocks in which changes of the map are tracked, see Map.dirty_blocks
+DIRTY_BLOCK_SIZE = 16
+
+# per tile numpy layers of the map and their dtype, in the order of the layer buffer, all indexed [x, y]
+# the narrowest dtype holding the values: agent ids are below max_agent_id, unit strength is at most
+# max_unit_strength and the visibility holds one bit per agent. The observation widens them to float32.
+MAP_LAYER_DTYPES = {
+    "landtype_map": np.int8,
+    "resources_map": np.int8,
+    "ownership_map": np.int8,
+    "building_map": np.int8,
+    "unit_strength_map": np.int16,
+    "unit_owner_map": np.int8,
+    "visibility_map": np.int64,
+    "tile_income_map": np.float64,
+}
+MAP_LAYER_NAMES = tuple(MAP_LAYER_DTYPES)
 
 
 def check_valid_agent_id(agent_id: int) -> bool:
     return 0 <= agent_id < max_agent_id
 
 
+# map features that never change during an episode
+STATIC_MAP_FEATURES = ("land_type", "resources")
+
+# land money value of every land type, indexed by LandType value
+LAND_MONEY_VALUE_TABLE = np.array(
+    [LAND_MONEY_VALUES[LandType(value)] for value in range(len(LandType))],
+    dtype=np.int64,
+)
+
+
+def _land_money_value(layers):
+    return LAND_MONEY_VALUE_TABLE[layers.landtype_map]
+
+
+# map feature name of the settings to the function computing its layer from the map layers
+MAP_FEATURE_EXTRACTORS = {
+    "land_type": attrgetter("landtype_map"),
+    "resources": attrgetter("resources_map"),
+    "tile_ownership": attrgetter("ownership_map"),
+    "buildings": attrgetter("building_map"),
+    "unit_strength": attrgetter("unit_strength_map"),
+    "unit_ownership": attrgetter("unit_owner_map"),
+    "visibility": attrgetter("visibility_map"),
+    "land_money_value": _land_money_value,
+}
+
+
+def compile_map_features(features):
+    """
+    Look up the extractor of every feature, in the order of the features.
+
+    :param features: list of map feature settings, e.g. the selected env_settings["map_features"]
+    :return: list of extractors, channel i of the observation is extractors[i](map)
+    :raises ValueError: if a feature has no extractor
+    """
+    extractors = []
+    for feature in features:
+        name = feature["name"]
+        if name not in MAP_FEATURE_EXTRACTORS:
+            raise ValueError(f"unknown map feature: {name}")
+        extractors.append(MAP_FEATURE_EXTRACTORS[name])
+    return extractors
+
+
+def write_map_features(layers, map_features, extractors):
+    """
+    Write the observed map layers into the feature array, only the compiled features are computed.
+    Works for a single map (feature, x, y) and for stacked maps (env, feature, x, y),
+    as long as the layers of the source have the same leading dimensions as map_features.
+
+    :param layers: object holding the map layers as attributes, e.g. Map
+    :param map_features: output array, feature dimension is the third to last
+    :param extractors: one extractor per channel, see compile_map_features
+    """
+    for channel, extractor in enumerate(extractors):
+        map_features[..., channel, :, :] = extractor(layers)
+    return map_features
+
+
 class Map:
     """
     Represents the map of the environment.
@@ -27,9 +111,18 @@ class Map:
         tile_size: The size of each tile in pixels.
         width: The width of the map.
         height: The height of the map.
-        squares: A 2D list of Map_Square objects representing the map.
+        squares: The tiles as Map_Square views, squares[x][y], created on access.
         continuous_map: Whether the map is continuous or not.
         visibility_map: A 2D numpy array to store the visibility of each tile.
+
+    The (width, height) layers are the only copy of the tile state: landtype_map, resources_map,
+    ownership_map, building_map, unit_strength_map, unit_owner_map, visibility_map and
+    tile_income_map. They are views into one channels-first buffer, layers, so the whole tile state
+    is copied, snapshot or shared as a single block, see bind_buffer and snapshot. The building and
+    unit objects are kept in buildings and units, keyed by the tile id y * width + x. No object is
+    created per tile.
+
+    Tiles are addressed by their tile id, the methods taking a position also accept a MapPosition.
     """
 
     def __init__(self, topology_array):
@@ -41,193 +134,363 @@ class Map:
         self.width = None
         self.height = None
 
-        self.squares = []
         self.continuous_map = None
 
         # 2D numpy array to store the visibility of each tile
         self.visibility_map = None
         self.tile_size = 1
 
-        # ownership map
-        # reorder dimensions of numpy array to [feature, x, y]
-        topology_array = np.moveaxis(topology_array, 2, 0)
-        self.landtype_map = topology_array[0]
-        self.resources_map = topology_array[1]
+        # the buffer of all layers, created on the first reset
+        self.layers = None
+
+        # the topology is indexed [y, x, feature], reorder to [feature, x, y]
+        topology_array = np.transpose(topology_array, (2, 1, 0))
+        self.landtype_map = np.ascontiguousarray(topology_array[0])
+        self.resources_map = np.ascontiguousarray(topology_array[1])
 
         self.ownership_map = None
         self.building_map = None
 
         self.unit_strength_map = None
         self.unit_owner_map = None
+        self.tile_income_map = None
+
+        # the objects on the tiles by tile id, and the colors of the owners
+        self.buildings = {}
+        self.units = {}
+        self.owner_colors = {}
+        # land money values and colors set on single tiles, instead of the ones of their land type
+        self.land_money_values = {}
+        self.land_colors = {}
+
+        # blocks of DIRTY_BLOCK_SIZE tiles with a change since the last clear, used to update action masks
+        self.dirty_blocks = None
+
+        # the neighbour tables used by this map, shared with the maps of the same size
+        self._neighbour_tables = {}
 
     def reset(self):
         """
         Reset the map to its initial state. Keeps topology, but resets ownership, buildings, visibility.
         """
-        for row in self.squares:
-            for square in row:
-                square.reset()
-
-        self.visibility_map = np.zeros((self.width, self.height), dtype=np.int64)
-        self.ownership_map = np.full(
-            (self.width, self.height), OWNER_DEFAULT_TILE, dtype=np.int64
-        )
-        self.building_map = np.full(
-            (self.width, self.height), DEFAULT_BUILDING_VALUE, dtype=np.int64
-        )
-        self.unit_strength_map = np.zeros((self.width, self.height), dtype=np.int64)
-        self.unit_owner_map = np.full(
-            (self.width, self.height), OWNER_DEFAULT_TILE, dtype=np.int64
+        self.buildings = {}
+        self.units = {}
+        self.owner_colors = {}
+        self.land_money_values = {}
+
+        if self.layers is None:
+            # move the topology into the buffer
+            landtype_map = self.landtype_map
+            resources_map = self.resources_map
+            self.use_buffer(LayerBuffer(self.width, self.height, MAP_LAYER_DTYPES))
+            self.landtype_map[...] = landtype_map
+            self.resources_map[...] = resources_map
+
+        self.visibility_map.fill(0)
+        self.ownership_map.fill(OWNER_DEFAULT_TILE)
+        self.building_map.fill(DEFAULT_BUILDING_VALUE)
+        self.unit_strength_map.fill(0)
+        self.unit_owner_map.fill(OWNER_DEFAULT_TILE)
+        self.tile_income_map.fill(0)
+        self.dirty_blocks = np.ones(
+            (
+                -(-self.width // DIRTY_BLOCK_SIZE),
+                -(-self.height // DIRTY_BLOCK_SIZE),
+            ),
+            dtype=bool,
         )
 
-    def trigger_surrounding_tile_update(self, position, radius=1):
-        surrounding_tiles = self.get_surrounding_tiles(position, radius)
-        for tile in surrounding_tiles:
-            tile.update(self.env)
+    # tile addressing #
+    def tile_id(self, position: Tile) -> int:
+        """
+        The tile id y * width + x of a position, a tile id is returned unchanged.
+        :param position: tile id or anything with x and y, e.g. a MapPosition or a Map_Square
+        """
+        if isinstance(position, (int, np.integer)):
+            return int(position)
+        return position.y * self.width + position.x
+
+    def tile_xy(self, position: Tile) -> Tuple[int, int]:
+        """
+        x, y of a tile id or of anything with x and y.
+        """
+        if isinstance(position, (int, np.integer)):
+            return int(position) % self.width, int(position) // self.width
+        return position.x, position.y
+
+    def position_of(self, tile_id: int) -> MapPosition:
+        return MapPosition.from_tile_id(tile_id, self.width)
+
+    def mark_dirty(self, position: Tile) -> None:
+        """
+        Record that the ownership, buildings, units or visibility of the tile changed.
+        """
+        x, y = self.tile_xy(position)
+        self.dirty_blocks[x // DIRTY_BLOCK_SIZE, y // DIRTY_BLOCK_SIZE] = True
+
+    def trigger_surrounding_tile_update(self, position: Tile, radius=1):
+        width = self.width
+        x, y = self.tile_xy(position)
+        for tile_id in self.neighbour_ids(x, y, radius).tolist():
+            Map_Square.view(self, tile_id % width, tile_id // width).update(self.env)
+
+    def update_tiles_around(self, tile_ids: np.ndarray) -> None:
+        """
+        Update the tiles and the tiles around them once each, after all of them changed. The same as
+        updating every tile and triggering its surrounding tile update after each change, since the
+        income and road shape of a tile only depend on the tiles next to it.
+        """
+        width = self.width
+        _, neighbour_ids, _ = self.neighbour_values_of(self.building_map, tile_ids, 1)
+        for tile_id in np.unique(np.concatenate((tile_ids, neighbour_ids))).tolist():
+            Map_Square.view(self, tile_id % width, tile_id // width).update(self.env)
 
     def get_random_position_on_map(self):
-        x = np.random.randint(0, self.width)
-        y = np.random.randint(0, self.height)
-        return MapPosition(x, y)
+        x, y = self.env.np_random.integers((self.width, self.height))
+        return MapPosition(int(x), int(y))
 
-    def get_observation(self):
+    def get_observation(self, map_out=None, visibility_out=None, include_static=True):
         """
         define here what info is visible to all agents
         Assuming full observability of map for now
+
+        :param map_out: optional (features, width, height) array to fill in place instead of allocating
+        :param visibility_out: optional (width, height) array the visibility map is copied into,
+            without it the live visibility layer is returned
+        :param include_static: if False only the dynamic features are written, see get_static_observation
         """
 
-        features = self.env.features_per_tile
-        feature_lenght = len(features)
-        map_features = np.zeros(
-            (feature_lenght, self.width, self.height), dtype=np.float32
-        )
+        if include_static:
+            extractors = self.env.map_feature_extractors
+        else:
+            extractors = self.env.dynamic_map_feature_extractors
+        if map_out is None:
+            feature_lenght = len(extractors)
+            map_out = np.zeros(
+                (feature_lenght, self.width, self.height), dtype=np.float32
+            )
+
+        write_map_features(self, map_out, extractors)
 
-        map_features[0] = self.landtype_map
-        map_features[1] = self.resources_map
-        map_features[2] = self.ownership_map
-        map_features[3] = self.building_map
-        map_features[4] = self.unit_strength_map
-        map_features[5] = self.unit_owner_map
+        if visibility_out is None:
+            return map_out, self.visibility_map
+        visibility_out[...] = self.visibility_map
+        return map_out, visibility_out
+
+    def get_static_observation(self, out=None):
+        """
+        The map features which are fixed for the whole episode, the terrain.
+        :param out: optional (static features, width, height) array to fill in place instead of allocating
+        """
+        extractors = self.env.static_map_feature_extractors
+        if out is None:
+            out = np.zeros(
+                (len(extractors), self.width, self.height),
+                dtype=np.float32,
+            )
+        return write_map_features(self, out, extractors)
 
-        return map_features, self.visibility_map
+    def use_buffer(self, layers: LayerBuffer) -> None:
+        """
+        Make the layer attributes views into the given layer buffer.
+        """
+        self.layers = layers
+        for name in MAP_LAYER_NAMES:
+            setattr(self, name, layers.layer(name))
 
-    def claim_tile(self, agent: Agent, position: MapPosition) -> None:
+    def bind_buffer(self, buffer: np.ndarray) -> None:
+        """
+        Move the map layers into an externally owned buffer, e.g. a row of a batched buffer or an array
+        on a shared memory block. The current layer content is copied over with one memcpy, afterwards
+        the map reads and writes the given buffer.
+        :param buffer: uint8 array of layers.nbytes bytes
+        """
+        buffer[...] = self.layers.buffer
+        self.use_buffer(LayerBuffer(self.width, self.height, MAP_LAYER_DTYPES, buffer))
+
+    def snapshot(self) -> np.ndarray:
+        """
+        A copy of all layers as one uint8 array, see LayerBuffer.snapshot.
+        The building and unit objects are not part of it, their layers are.
+        """
+        return self.layers.snapshot()
+
+    @property
+    def squares(self) -> "SquareGrid":
+        return SquareGrid(self)
+
+    def tile_at(self, x: int, y: int) -> Map_Square:
+        """
+        The square of the tile at x, y, which must be on the map.
+        """
+        return Map_Square.view(self, x, y)
+
+    def claim_tile(self, agent: Agent, position: Tile) -> None:
         """
         Claim a tile at position (x,y) for an agent
         :param position:
         :param agent:
         :return:
         """
-        self.squares[position.x][position.y].set_owner(agent)
-        self.ownership_map[(position.x, position.y)] = agent.id
+        self.tile_at(*self.tile_xy(position)).set_owner(agent)
 
-    def unclaim_tile(self, position: MapPosition) -> None:
+    def unclaim_tile(self, position: Tile) -> None:
         """
         Unclaim a tile at position (x,y)
         :param position:
         :return:
         """
-        self.squares[position.x][position.y].set_owner(None, default=True)
-        self.ownership_map[(position.x, position.y)] = OWNER_DEFAULT_TILE
+        self.tile_at(*self.tile_xy(position)).set_owner(None, default=True)
 
-    def add_building(self, building_object, position: MapPosition) -> None:
+    def claim_ids(self, tile_ids: np.ndarray, agent_ids: np.ndarray) -> None:
+        """
+        claim_tile of many tiles at once, the tile with tile_ids[i] for the agent agent_ids[i].
+        """
+        xs = tile_ids % self.width
+        ys = tile_ids // self.width
+        self.ownership_map[xs, ys] = agent_ids
+        self.dirty_blocks[xs // DIRTY_BLOCK_SIZE, ys // DIRTY_BLOCK_SIZE] = True
+        for agent_id in np.unique(agent_ids).tolist():
+            self.owner_colors[agent_id] = self.env.agents[agent_id].color
+
+    def add_building(self, building_object, position: Tile) -> None:
         if self.check_position_on_map(position):
             self.get_tile(position).add_building(building_object)
-            self.building_map[position.x][position.y] = float(
-                building_object.get_building_type_id()
-            )
 
-    def add_unit(self, unit, position: MapPosition) -> None:
+    def add_unit(self, unit, position: Tile) -> None:
         self.get_tile(position).unit = unit
-        self.unit_strength_map[position.x][position.y] = unit.strength
-        self.unit_owner_map[position.x][position.y] = unit.owner.id
 
-    def remove_unit(self, position: MapPosition) -> None:
+    def remove_unit(self, position: Tile) -> None:
         tile = self.get_tile(position)
         tile.unit = None
-        self.unit_strength_map[position.x][position.y] = 0
-        self.unit_owner_map[position.x][position.y] = OWNER_DEFAULT_TILE
 
     def remove_building(
         self,
-        position: MapPosition,
+        position: Tile,
         building_type: BuildingType = None,
     ) -> None:
         tile = self.get_tile(position)
         tile.remove_building(building_type)
         tile.update(self.env)
         self.trigger_surrounding_tile_update(position, 1)
-        self.building_map[position.x][position.y] = DEFAULT_BUILDING_VALUE
 
-    def draw(self, screen, zoom_level, pan_x, pan_y):
-        """
-        Draw the map on the screen
-        :param screen:
-        :param zoom_level:
-        :param pan_x:
-        :param pan_y:
-        :return:
-        """
-        for row in self.squares:
-            for square in row:
-                new_x = (square.position.x * zoom_level) + pan_x
-                new_y = (square.position.x * zoom_level) + pan_y
-                new_size = self.tile_size * zoom_level
-                square.draw(screen, self.tile_size, new_x, new_y, new_size)
+    # tile state updates, the squares write through these #
+    def write_owner(self, position: Tile, owner_id: int) -> None:
+        x, y = self.tile_xy(position)
+        self.ownership_map[x, y] = owner_id
+        self.mark_dirty(position)
+
+    def write_building(self, position: Tile, building) -> None:
+        x, y = self.tile_xy(position)
+        tile_id = y * self.width + x
+        if building is None:
+            self.buildings.pop(tile_id, None)
+            building_id = DEFAULT_BUILDING_VALUE
+        else:
+            self.buildings[tile_id] = building
+            building_id = building.get_building_type_id()
+        self.building_map[x, y] = building_id
+        self.mark_dirty(position)
+
+    def write_unit(self, position: Tile, unit) -> None:
+        x, y = self.tile_xy(position)
+        tile_id = y * self.width + x
+        if unit is None:
+            self.units.pop(tile_id, None)
+            self.unit_strength_map[x, y] = 0
+            self.unit_owner_map[x, y] = OWNER_DEFAULT_TILE
+        else:
+            self.units[tile_id] = unit
+            self.unit_strength_map[x, y] = unit.strength
+            self.unit_owner_map[x, y] = unit.owner.id
+        self.mark_dirty(position)
+
+    def write_land_type(self, position: Tile, land_type: LandType) -> None:
+        x, y = self.tile_xy(position)
+        self.landtype_map[x, y] = land_type.value
+        self.mark_dirty(position)
 
-    def get_tile(self, position: MapPosition) -> Map_Square | None:
+    def get_tile(self, position: Tile) -> Map_Square | None:
         """
         Get the tile at position x, y
-        :param position:
+        :param position: tile id or MapPosition
         :return: Map_Square object or None if position is not on the map
         """
         if self.check_position_on_map(position):
-            return self.squares[position.x][position.y]
+            return Map_Square.view(self, *self.tile_xy(position))
         return None
 
     def tile_is_next_to_own_tile(
         self,
-        position: MapPosition,
+        position: Tile,
         agent_id: int,
         radius: int = 1,
         diagonal: bool = True,
     ):
-        surrounding_tiles = self.get_surrounding_tiles(position, radius, diagonal)
-        for tile in surrounding_tiles:
-            if tile.get_owner() == agent_id:
-                return True, tile
-        return False, None
+        x, y = self.tile_xy(position)
+        tile_ids, owners = self.neighbour_values(
+            self.ownership_map, x, y, radius, diagonal
+        )
+        return self._first_tile(tile_ids, owners == agent_id)
 
     def tile_is_next_to_building_type(
         self,
-        position: MapPosition,
+        position: Tile,
         building_type,
         radius: int = 1,
         diagonal: bool = True,
     ):
         # check if any of the neighbouring tiles in radius have a building of the given type
-        surroundings = self.get_surrounding_tiles(position, radius, diagonal)
-
-        for tile in surroundings:
-            if tile.has_building(building_type):
-                return True, tile
-        return False, None
+        x, y = self.tile_xy(position)
+        tile_ids, buildings = self.neighbour_values(
+            self.building_map, x, y, radius, diagonal
+        )
+        return self._first_tile(tile_ids, buildings == BUILDING_IDS[building_type])
 
     def tile_is_next_to_any_building(
-        self, position: MapPosition, radius: int = 1, diagonal: bool = True
+        self, position: Tile, radius: int = 1, diagonal: bool = True
     ):
         # check if any of the neighbouring tiles in radius have a building of the given type
-        surroundings = self.get_surrounding_tiles(position, radius, diagonal)
-        for tile in surroundings:
-            if tile.has_any_building():
-                return True, tile
-        return False, None
+        x, y = self.tile_xy(position)
+        tile_ids, buildings = self.neighbour_values(
+            self.building_map, x, y, radius, diagonal
+        )
+        return self._first_tile(tile_ids, buildings != DEFAULT_BUILDING_VALUE)
 
-    def check_position_on_map(self, position: MapPosition) -> bool:
+    def _first_tile(self, tile_ids: np.ndarray, hits: np.ndarray):
         """
-        :param position:
+        (True, square) of the first of the tiles with a hit, (False, None) without any hit.
+        """
+        first = hits.argmax() if len(hits) else 0
+        if len(hits) == 0 or not hits[first]:
+            return False, None
+        tile_id = int(tile_ids[first])
+        return True, self.tile_at(tile_id % self.width, tile_id // self.width)
+
+    def positions_on_map(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """
+        Vectorized check_position_on_map of integer coordinate arrays.
+        """
+        return (xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height)
+
+    def values_at(
+        self, layer: np.ndarray, xs: np.ndarray, ys: np.ndarray, fill
+    ) -> np.ndarray:
+        """
+        layer[xs, ys] for integer coordinate arrays, fill for the coordinates outside the map.
+        """
+        on_map = self.positions_on_map(xs, ys)
+        values = layer[np.where(on_map, xs, 0), np.where(on_map, ys, 0)]
+        return np.where(on_map, values, fill)
+
+    def check_position_on_map(self, position: Tile) -> bool:
+        """
+        :param position: tile id or MapPosition
         :return:
         """
+        if isinstance(position, (int, np.integer)):
+            return 0 <= position < self.width * self.height
+
         x = position.x
         y = position.y
 
@@ -235,61 +498,188 @@ class Map:
             return True
         return False
 
-    def get_surrounding_tiles(
-        self, position: MapPosition, radius: int, diagonal: bool = True
+    def get_surrounding_tiles(self, position: Tile, radius: int, diagonal: bool = True):
+        x, y = self.tile_xy(position)
+        return self.get_surrounding_tiles_at(x, y, radius, diagonal)
+
+    def get_surrounding_tiles_at(
+        self, x: int, y: int, radius: int, diagonal: bool = True
     ):
+        """
+        get_surrounding_tiles for the tile at x, y, without creating MapPositions.
+        """
+        width = self.width
+        view = Map_Square.view
+        return [
+            view(self, tile_id % width, tile_id // width)
+            for tile_id in self.neighbour_ids(x, y, radius, diagonal).tolist()
+        ]
+
+    # neighbour queries #
+    def neighbours(self, radius: int, diagonal: bool = True) -> NeighbourTable:
+        """
+        The neighbour table of all tiles of the map for a radius, shared by the maps of the same size.
+        """
+        key = (self.width, self.height, radius, diagonal)
+        table = self._neighbour_tables.get(key)
+        if table is None:
+            table = neighbour_table(*key)
+            self._neighbour_tables[key] = table
+        return table
+
+    def neighbour_ids(
+        self, x: int, y: int, radius: int, diagonal: bool = True
+    ) -> np.ndarray:
+        """
+        The tile ids y * width + x of the tiles around x, y within radius that are on the map,
+        in the order of get_surrounding_tiles.
+
+        Answered from the neighbour table if the map already uses one for the radius. A single tile
+        does not build a table, e.g. the visibility updates with a radius of 3 would otherwise hold
+        a table of 48 neighbours for every tile of the map.
+        """
         if radius < 1:
-            return []
+            return np.zeros(0, dtype=np.int32)
+        table = self._neighbour_tables.get((self.width, self.height, radius, diagonal))
+        if table is not None and 0 <= x < self.width and 0 <= y < self.height:
+            return table.of(y * self.width + x)
+
+        offsets = np.array(neighbour_offsets(radius, diagonal)).reshape(-1, 2)
+        xs = x + offsets[:, 0]
+        ys = y + offsets[:, 1]
+        return (ys * self.width + xs)[self.positions_on_map(xs, ys)]
+
+    def neighbour_values(
+        self, layer: np.ndarray, x: int, y: int, radius: int, diagonal: bool = True
+    ):
+        """
+        The neighbour_ids of x, y and the values of a (width, height) layer at them.
+        """
+        tile_ids = self.neighbour_ids(x, y, radius, diagonal)
+        # the transposed layer is indexed [y, x], its flat index in C order is the tile id
+        return tile_ids, layer.T.flat[tile_ids]
 
-        x = position.x
-        y = position.y
-        surrounding_tiles = []
-
-        if not diagonal:
-            for i in range(-radius, radius + 1):
-                if i != 0:
-                    tmp_pos = MapPosition(x + i, y)
-                    if self.check_position_on_map(tmp_pos):
-                        surrounding_tiles.append(self.get_tile(tmp_pos))
-
-            for j in range(-radius, radius + 1):
-                if j != 0:
-                    tmp_pos = MapPosition(x, y + j)
-                    if self.check_position_on_map(tmp_pos):
-                        surrounding_tiles.append(self.get_tile(tmp_pos))
-        else:
-            for i in range(-radius, radius + 1):
-                for j in range(-radius, radius + 1):
-                    # Skip the center tile
-                    if i == 0 and j == 0:
-                        continue
+    def neighbour_values_of(
+        self,
+        layer: np.ndarray,
+        tile_ids: np.ndarray,
+        radius: int,
+        diagonal: bool = True,
+    ):
+        """
+        The neighbours of many tiles of the map at once, from the neighbour table, and the values
+        of a (width, height) layer at them.
 
-                    tmp_pos = MapPosition(x + i, y + j)
-                    if self.check_position_on_map(tmp_pos):
-                        surrounding_tiles.append(self.get_tile(tmp_pos))
-        return surrounding_tiles
+        :param tile_ids: integer array of tile ids on the map
+        :return: (groups, neighbour_ids, values), per neighbour the index into tile_ids of its tile,
+            its tile id and the value of the layer at it, in the order of get_surrounding_tiles per tile
+        """
+        table = self.neighbours(radius, diagonal)
+        starts = table.indptr[tile_ids]
+        counts = table.indptr[tile_ids + 1] - starts
+        groups = np.repeat(np.arange(len(tile_ids)), counts)
+
+        # the position in the table of every neighbour, the start of its tile plus its rank
+        ends = np.cumsum(counts)
+        positions = np.arange(len(groups)) + (starts - (ends - counts))[groups]
+        neighbour_ids = table.indices[positions]
+        return groups, neighbour_ids, layer.T.flat[neighbour_ids]
 
     # visibility stuff #
-    def set_visible(self, position: MapPosition, agent_id: int):
+    def set_visible(self, position: Tile, agent_id: int):
         if check_valid_agent_id(agent_id):
-            self.visibility_map[(position.x, position.y)] |= 1 << agent_id
+            self.visibility_map[self.tile_xy(position)] |= 1 << agent_id
+            self.mark_dirty(position)
 
-    def set_invisible(self, position: MapPosition, agent_id: int):
+    def set_visible_ids(self, tile_ids: np.ndarray, agent_id: int) -> int:
+        """
+        Make the tiles with the given tile ids visible to an agent.
+        :return: the number of the tiles which were not visible to the agent before
+        """
+        if not check_valid_agent_id(agent_id):
+            return len(tile_ids)
+
+        bit = 1 << agent_id
+        xs = tile_ids % self.width
+        ys = tile_ids // self.width
+        hidden = (self.visibility_map[xs, ys] & bit) == 0
+        xs = xs[hidden]
+        ys = ys[hidden]
+        self.visibility_map[xs, ys] |= bit
+        self.dirty_blocks[xs // DIRTY_BLOCK_SIZE, ys // DIRTY_BLOCK_SIZE] = True
+        return int(np.count_nonzero(hidden))
+
+    def set_visible_around(
+        self, tile_ids: np.ndarray, agent_ids: np.ndarray, radii: np.ndarray
+    ) -> np.ndarray:
+        """
+        set_visible_ids of the neighbour_ids of many tiles at once, the tiles around
+        tile_ids[i] within radii[i] for the agent agent_ids[i].
+
+        :return: per tile the number of tiles it made visible. A hidden tile seen from several
+            tiles of one agent counts for the first of them, as if they were made visible in order.
+        """
+        if len(tile_ids) == 0:
+            return np.zeros(0, dtype=np.int64)
+        width = self.width
+        groups = []
+        neighbour_ids = []
+        # the neighbours from the offsets, a table of the visibility radius would hold 48 per tile
+        for radius in np.unique(radii).tolist():
+            selected = np.flatnonzero(radii == radius)
+            offsets = np.array(neighbour_offsets(radius, True), dtype=np.int64)
+            offsets = offsets.reshape(-1, 2)
+            xs = (tile_ids[selected] % width)[:, None] + offsets[:, 0]
+            ys = (tile_ids[selected] // width)[:, None] + offsets[:, 1]
+            on_map = self.positions_on_map(xs, ys)
+            groups.append(np.broadcast_to(selected[:, None], xs.shape)[on_map])
+            neighbour_ids.append((ys * width + xs)[on_map])
+        groups = np.concatenate(groups)
+        order = np.argsort(groups, kind="stable")
+        groups = groups[order]
+        neighbour_ids = np.concatenate(neighbour_ids)[order]
+
+        agents = agent_ids[groups]
+        bits = np.left_shift(1, agents).astype(self.visibility_map.dtype)
+        xs = neighbour_ids % width
+        ys = neighbour_ids // width
+        hidden = np.flatnonzero((self.visibility_map[xs, ys] & bits) == 0)
+
+        # the first neighbour of an agent on a hidden tile discovers it
+        keys = agents[hidden] * (width * self.height) + neighbour_ids[hidden]
+        _, first = np.unique(keys, return_index=True)
+        discovered = hidden[first]
+        np.bitwise_or.at(
+            self.visibility_map, (xs[discovered], ys[discovered]), bits[discovered]
+        )
+        self.dirty_blocks[
+            xs[discovered] // DIRTY_BLOCK_SIZE, ys[discovered] // DIRTY_BLOCK_SIZE
+        ] = True
+        return np.bincount(groups[discovered], minlength=len(tile_ids))
+
+    def set_invisible(self, position: Tile, agent_id: int):
         if check_valid_agent_id(agent_id):
-            self.visibility_map[(position.x, position.y)] &= ~(1 << agent_id)
+            self.visibility_map[self.tile_xy(position)] &= ~(1 << agent_id)
+            self.mark_dirty(position)
 
-    def is_visible(self, position: MapPosition, agent_id: int) -> bool:
+    def is_visible(self, position: Tile, agent_id: int) -> bool:
         """
         Check if a tile is visible to an agent.
-        :param position: The position of the tile.
+        :param position: The tile id or position of the tile.
         :param agent_id: The ID of the agent.
         :return: True if the tile is visible to the agent, False otherwise.
         """
+        return self.is_visible_at(*self.tile_xy(position), agent_id)
+
+    def is_visible_at(self, x: int, y: int, agent_id: int) -> bool:
+        """
+        is_visible for the tile at x, y, without a MapPosition.
+        """
         if not check_valid_agent_id(agent_id):
             return False
 
         bit = 1 << agent_id
-        numb = self.visibility_map[(position.x, position.y)]
+        numb = self.visibility_map[x, y]
         result = numb & (bit)
         # should return bool
         if result > 0:
@@ -298,3 +688,38 @@ class Map:
             return False
 
     # TODO: maybe enable bulk operations here later, to make exploration in general more efficient
+
+
+class SquareGrid:
+    """
+    The tiles of a map as squares[x][y], the squares are created on access.
+    """
+
+    def __init__(self, map: Map):
+        self.map = map
+
+    def __len__(self) -> int:
+        return self.map.width
+
+    def __getitem__(self, x: int) -> "SquareColumn":
+        if not 0 <= x < self.map.width:
+            raise IndexError("x is outside of the map")
+        return SquareColumn(self.map, x)
+
+
+class SquareColumn:
+    """
+    The tiles of a map with the same x.
+    """
+
+    def __init__(self, map: Map, x: int):
+        self.map = map
+        self.x = x
+
+    def __len__(self) -> int:
+        return self.map.height
+
+    def __getitem__(self, y: int) -> Map_Square:
+        if not 0 <= y < self.map.height:
+            raise IndexError("y is outside of the map")
+        return Map_Square.view(self.map, self.x, y)
@@ -1,4 +1,30 @@
+from typing import Union
+
+
 class MapPosition:
     def __init__(self, x: int, y: int):
         self.x = x
         self.y = y
+
+    def __eq__(self, other):
+        if not isinstance(other, MapPosition):
+            return NotImplemented
+        return self.x == other.x and self.y == other.y
+
+    def __hash__(self):
+        return hash((self.x, self.y))
+
+    def __repr__(self):
+        return f"MapPosition({self.x}, {self.y})"
+
+    def tile_id(self, width: int) -> int:
+        """The tile id y * width + x of the position on a map of the given width."""
+        return self.y * width + self.x
+
+    @classmethod
+    def from_tile_id(cls, tile_id: int, width: int) -> "MapPosition":
+        return cls(tile_id % width, tile_id // width)
+
+
+# a tile of the map, as tile id y * width + x or as a MapPosition
+Tile = Union[int, MapPosition]
@@ -1,8 +1,7 @@
-from typing import Tuple
-
-import pygame
+import numpy as np
 
 from strategyRLEnv.map.map_settings import (COLOR_DEFAULT_BORDER,
+                                            LAND_MONEY_VALUES,
                                             OWNER_DEFAULT_TILE, BuildingType,
                                             LandType, ResourceType,
                                             land_type_color)
@@ -13,50 +12,73 @@ from strategyRLEnv.objects.Building import Building
 class Map_Square:
     """
     Class for a single square/ tile on the map
+
+    A square is a view of one tile of a map, its land type, resource, owner, visibility, income,
+    building and unit are read from and written to the layers of the map, which are the only copy
+    of the tile state. A land money value or land color set on a square is kept by the map, in
+    land_money_values and land_colors, and only changes the income and the drawing of the tile.
+    The map creates squares on demand, see Map.tile_at. A square created on its own gets a
+    private map of a single tile.
     """
 
+    default_border_color = COLOR_DEFAULT_BORDER
+    default_color = land_type_color(LandType.LAND)
+
     def __init__(self, tile_id: int, position: MapPosition, land_value=LandType.LAND):
-        # coordinates and ids
+        # local import, the map module imports the squares
+        from strategyRLEnv.map.Map import Map
+
+        tile_map = Map(np.array([[[LandType.LAND.value, ResourceType.NONE.value]]]))
+        tile_map.width = 1
+        tile_map.height = 1
+        tile_map.tiles = 1
+        tile_map.reset()
+
+        self.map = tile_map
+        self.x = 0
+        self.y = 0
         self.tile_id = tile_id
-        self.position = position
-
-        # land properties
-        self.land_type = LandType.LAND
-        self.resource = ResourceType.NONE
-        self.resources = []
+        self._position = position
 
         if land_value is not None:
             self.set_land_type(land_value)
 
-        # owner specific
-        self.owner_id = OWNER_DEFAULT_TILE
-
-        self.visibility_bitmask = 0  # init to zero, no agent can see this tile
-
-        self.building = None
-
-        self._land_money_value = 1  # determined by land type
-        self.tile_income = 0  # current income of the tile
-
-        self.unit = None
-
-        # ui stuff
-        self.default_border_color = COLOR_DEFAULT_BORDER
-        self.default_color = land_type_color(LandType.LAND)
-
-        self.land_type_color = land_type_color(LandType.LAND)
-        self.owner_color = COLOR_DEFAULT_BORDER
+    @classmethod
+    def view(cls, map, x: int, y: int) -> "Map_Square":
+        """
+        The square of the tile at x, y of the map, without copying any state.
+        """
+        square = cls.__new__(cls)
+        square.map = map
+        square.x = x
+        square.y = y
+        square.tile_id = y * map.width + x
+        square._position = None
+        return square
+
+    def __eq__(self, other):
+        if not isinstance(other, Map_Square):
+            return NotImplemented
+        return self.map is other.map and self.x == other.x and self.y == other.y
+
+    def __hash__(self):
+        return hash((id(self.map), self.x, self.y))
+
+    @property
+    def position(self) -> MapPosition:
+        if self._position is None:
+            return MapPosition(self.x, self.y)
+        return self._position
 
     def reset(self, total_reset: bool = True):
-        self.set_owner(None, default=True)
-
-        self._land_money_value = 1
-
-        self.building = None
-        self.unit = None
+        map = self.map
+        map.ownership_map[self.x, self.y] = OWNER_DEFAULT_TILE
+        map.write_building(self, None)
+        map.write_unit(self, None)
+        map.land_money_values.pop(self.tile_key, None)
 
         if total_reset:
-            self.visibility_bitmask = 0
+            map.visibility_map[self.x, self.y] = 0
 
     def update(self, env):
         """
@@ -66,11 +88,14 @@ class Map_Square:
         """
         building_income = 0
         # update buildings
-        if self.building is not None:
-            self.building.update(env)
-            building_income = self.building.get_income()
+        building = self.building
+        if building is not None:
+            building.update(env)
+            building_income = building.get_income()
 
-        self.tile_income = building_income + self._land_money_value
+        self.map.tile_income_map[self.x, self.y] = (
+            building_income + self._land_money_value
+        )
 
     def set_owner(self, agent, default=False):
         """
@@ -78,16 +103,72 @@ class Map_Square:
         """
         if default:
             self.owner_id = OWNER_DEFAULT_TILE
-            self.owner_color = COLOR_DEFAULT_BORDER
         else:
+            self.map.owner_colors[agent.id] = agent.color
             self.owner_id = agent.id
-            self.owner_color = agent.color
 
     def get_owner(self):
         return self.owner_id
 
+    @property
+    def owner_id(self) -> int:
+        return int(self.map.ownership_map[self.x, self.y])
+
+    @owner_id.setter
+    def owner_id(self, owner_id):
+        self.map.write_owner(self, owner_id)
+
+    @property
+    def owner_color(self):
+        if self.owner_id == OWNER_DEFAULT_TILE:
+            return COLOR_DEFAULT_BORDER
+        return self.map.owner_colors.get(self.owner_id, COLOR_DEFAULT_BORDER)
+
+    @property
+    def visibility_bitmask(self) -> int:
+        return int(self.map.visibility_map[self.x, self.y])
+
+    @visibility_bitmask.setter
+    def visibility_bitmask(self, bitmask: int):
+        self.map.visibility_map[self.x, self.y] = bitmask
+        self.map.mark_dirty(self)
+
+    @property
+    def building(self):
+        return self.map.buildings.get(self.tile_key)
+
+    @building.setter
+    def building(self, building):
+        self.map.write_building(self, building)
+
+    @property
+    def unit(self):
+        return self.map.units.get(self.tile_key)
+
+    @unit.setter
+    def unit(self, unit):
+        self.map.write_unit(self, unit)
+
+    @property
+    def tile_key(self) -> int:
+        """The key of the tile in the building and unit stores of its map."""
+        return self.y * self.map.width + self.x
+
+    @property
+    def tile_income(self) -> float:
+        return float(self.map.tile_income_map[self.x, self.y])
+
+    @property
+    def resource(self) -> ResourceType:
+        return ResourceType(self.map.resources_map[self.x, self.y])
+
+    @property
+    def resources(self):
+        # the resources are not tracked as a list per tile
+        return []
+
     def add_resource(self, resource_type: ResourceType):
-        self.resource = resource_type
+        self.map.resources_map[self.x, self.y] = resource_type.value
 
     def get_resources(self):
         return self.resources
@@ -95,6 +176,37 @@ class Map_Square:
     def remove_resource(self, resource_value):
         self.resources.remove(resource_value)
 
+    @property
+    def land_type(self) -> LandType:
+        return LandType(self.map.landtype_map[self.x, self.y])
+
+    @land_type.setter
+    def land_type(self, land_value: LandType):
+        self.map.write_land_type(self, land_value)
+        self.map.land_colors.pop(self.tile_key, None)
+
+    @property
+    def land_type_color(self):
+        color = self.map.land_colors.get(self.tile_key)
+        if color is None:
+            return land_type_color(self.land_type)
+        return color
+
+    @land_type_color.setter
+    def land_type_color(self, color):
+        self.map.land_colors[self.tile_key] = color
+
+    @property
+    def _land_money_value(self):
+        value = self.map.land_money_values.get(self.tile_key)
+        if value is None:
+            return LAND_MONEY_VALUES[self.land_type]
+        return value
+
+    @_land_money_value.setter
+    def _land_money_value(self, value):
+        self.map.land_money_values[self.tile_key] = value
+
     def set_land_type(self, land_value: LandType):
         """
         Set the land type of the square
@@ -103,7 +215,6 @@ class Map_Square:
         """
         if land_value != self.land_type:
             self.land_type = land_value
-            self.land_type_color = land_type_color(land_value)
 
     def get_land_type(self) -> LandType:
         return self.land_type
@@ -147,81 +258,6 @@ class Map_Square:
             return True
         return False
 
-    # drawing stuff #
-    def draw(
-        self, screen, square_size: int, new_x: int, new_y: int, new_square_size: int
-    ):
-        """
-        Draw the square on the screen
-        :param screen:
-        :param square_size:
-        :param new_x:
-        :param new_y:
-        :param new_square_size:
-        :return:
-        """
-
-        pygame.draw.rect(
-            screen,
-            self.land_type_color,
-            (
-                self.position.x * square_size,
-                self.position.y * square_size,
-                square_size,
-                square_size,
-            ),
-        )
-        grain_color = (255, 255, 0)
-        metal_color = (192, 192, 192)
-        if self.resource != ResourceType.NONE:
-            if self.resource == ResourceType.GRAIN:
-                resource_color = grain_color
-
-            elif self.resource == ResourceType.METAL:
-                resource_color = metal_color
-
-            pygame.draw.line(
-                screen,
-                resource_color,
-                (
-                    self.position.x * square_size + square_size * 0.3,
-                    self.position.y * square_size + square_size,
-                ),
-                (
-                    self.position.x * square_size + square_size * 0.3,
-                    self.position.y * square_size + square_size / 2,
-                ),
-            )
-
-            pygame.draw.line(
-                screen,
-                resource_color,
-                (
-                    self.position.x * square_size + square_size * 0.6,
-                    self.position.y * square_size,
-                ),
-                (
-                    self.position.x * square_size + square_size * 0.6,
-                    self.position.y * square_size + square_size / 2,
-                ),
-            )
-
-        if self.owner_color != COLOR_DEFAULT_BORDER:
-            pygame.draw.rect(
-                screen,
-                self.owner_color,
-                (
-                    self.position.x * square_size,
-                    self.position.y * square_size,
-                    square_size,
-                    square_size,
-                ),
-                1,
-            )
-
-        if self.building is not None:
-            self.building.draw(screen, square_size, self.owner_color)
-
     # observation stuff #
     def get_full_info(self):
         # these are the features the agent can observe
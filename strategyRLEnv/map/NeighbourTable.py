@@ -0,0 +1,106 @@
+import weakref
+from typing import List, Tuple
+
+import numpy as np
+
+
+def neighbour_offsets(radius: int, diagonal: bool) -> List[Tuple[int, int]]:
+    """
+    The (dx, dy) offsets of the neighbours of a tile, in the order of Map.get_surrounding_tiles.
+
+    With diagonal the offsets are the square around the tile, x-major. Without diagonal they are
+    the tiles in line with the tile, first along x and then along y.
+    """
+    steps = [step for step in range(-radius, radius + 1) if step != 0]
+    if not diagonal:
+        return [(step, 0) for step in steps] + [(0, step) for step in steps]
+    return [
+        (i, j)
+        for i in range(-radius, radius + 1)
+        for j in range(-radius, radius + 1)
+        if i != 0 or j != 0
+    ]
+
+
+class NeighbourTable:
+    """
+    The neighbours of every tile of a map within a radius, edge-clipped, in CSR form.
+
+    Tiles are identified by their tile id y * width + x. The neighbours of tile t are
+    indices[indptr[t]:indptr[t + 1]], in the order of neighbour_offsets. The arrays are read-only
+    and shared by all maps of the same size, see neighbour_table.
+
+    Attributes:
+        width (int): The width of the map.
+        height (int): The height of the map.
+        radius (int): The radius of the neighbourhood.
+        diagonal (bool): Whether the diagonal tiles are neighbours.
+        indptr (np.ndarray): int32 array of length width * height + 1, start of the neighbours of a tile,
+            int64 for tables with 2**31 entries or more.
+        indices (np.ndarray): int32 array of the tile ids of the neighbours.
+    """
+
+    def __init__(self, width: int, height: int, radius: int, diagonal: bool = True):
+        self.width = width
+        self.height = height
+        self.radius = radius
+        self.diagonal = diagonal
+
+        offsets = np.array(neighbour_offsets(radius, diagonal), dtype=np.int64)
+        offsets = offsets.reshape(-1, 2)
+        dxs = offsets[:, 0]
+        dys = offsets[:, 1]
+
+        # whether the offsets stay on the map, per x and per y
+        xs = np.arange(width)[:, None] + dxs[None, :]
+        ys = np.arange(height)[:, None] + dys[None, :]
+        x_on_map = (xs >= 0) & (xs < width)
+        y_on_map = (ys >= 0) & (ys < height)
+
+        # neighbours per tile, tile id y * width + x
+        counts = (y_on_map[:, None, :] & x_on_map[None, :, :]).sum(axis=2).ravel()
+        # int32 unless the table has 2**31 entries or more
+        index_dtype = np.int32 if counts.sum() < 2**31 else np.int64
+        self.indptr = np.zeros(width * height + 1, dtype=index_dtype)
+        np.cumsum(counts, out=self.indptr[1:])
+
+        # filled one row of tiles at a time, a (tiles, offsets) grid of the whole map would need
+        # 8 bytes per entry for the ids of np.nonzero
+        deltas = (dys * width + dxs).astype(np.int32)
+        row_ids = np.arange(width, dtype=np.int32)[:, None] + deltas[None, :]
+        self.indices = np.empty(self.indptr[-1], dtype=np.int32)
+        for y in range(height):
+            on_map = x_on_map & y_on_map[y][None, :]
+            start = self.indptr[y * width]
+            end = self.indptr[(y + 1) * width]
+            self.indices[start:end] = (row_ids + y * width)[on_map]
+        for array in (self.indptr, self.indices):
+            array.flags.writeable = False
+
+    def __len__(self) -> int:
+        return self.width * self.height
+
+    def of(self, tile_id: int) -> np.ndarray:
+        """The tile ids of the neighbours of a tile, a read-only view into the table."""
+        return self.indices[self.indptr[tile_id] : self.indptr[tile_id + 1]]
+
+
+# the tables in use, by (width, height, radius, diagonal). The maps hold the tables, a table is
+# freed when no map of its size uses it anymore
+_tables = weakref.WeakValueDictionary()
+
+
+def neighbour_table(
+    width: int, height: int, radius: int, diagonal: bool = True
+) -> NeighbourTable:
+    """
+    The neighbour table of a map size, built on first use and shared while a map holds it.
+
+    The tables only depend on the size of the map, a new topology of the same size reuses them.
+    """
+    key = (width, height, radius, diagonal)
+    table = _tables.get(key)
+    if table is None:
+        table = NeighbourTable(width, height, radius, diagonal)
+        _tables[key] = table
+    return table
@@ -1,7 +1,6 @@
 import math
 import os
 import pickle
-import random
 import uuid
 
 import numpy as np
@@ -10,43 +9,29 @@ from strategyRLEnv.map.Map import Map
 from strategyRLEnv.map.map_settings import LandType, ResourceType
 from strategyRLEnv.map.MapAgent import Map_Agent
 from strategyRLEnv.map.MapPosition import MapPosition
-from strategyRLEnv.map.MapSquare import Map_Square
 
 
 def topology_to_map(topology_array):
-    # Convert the topology array to a map
+    # Convert the topology array to a map, its layers hold the land types and resources
 
     created_map = Map(topology_array)
     created_map.width = len(topology_array[0])
     created_map.height = len(topology_array)
     created_map.tiles = created_map.height * created_map.width
-
-    squares = [
-        [None for _ in range(created_map.height)] for _ in range(created_map.width)
-    ]
-
-    # Create map squares
-    for x_index in range(created_map.width):
-        for y_index in range(created_map.height):
-            square = Map_Square(
-                y_index * created_map.width + x_index, MapPosition(x_index, y_index)
-            )
-            square.set_land_type(LandType(topology_array[y_index][x_index][0]))
-            square.add_resource(ResourceType(topology_array[y_index][x_index][1]))
-            squares[x_index][y_index] = square
-
-    created_map.squares = squares
     created_map.reset()
 
     return created_map
 
 
-def generate_finished_map(connected_env, map_settings=None, path_to_map_file=None):
+def generate_finished_map(
+    connected_env, map_settings=None, path_to_map_file=None, rng=None
+):
+    """
+    :param rng: the np.random.Generator the map is generated with, a fresh unseeded one if None
+    """
     if path_to_map_file:
         with open(path_to_map_file, "rb") as file:
             map_array = pickle.load(file)
-        height = len(map_array)
-        width = len(map_array[0])
         finished_map = topology_to_map(map_array)
     else:
         if not map_settings:
@@ -67,17 +52,12 @@ def generate_finished_map(connected_env, map_settings=None, path_to_map_file=Non
             mountain_percentage,
             dessert_percentage,
             resource_density,
+            rng,
         )
         finished_map = topology_to_map(topology_array[0])
 
     finished_map.env = connected_env
 
-    if height > width:
-        finished_map.tile_size = int(connected_env.screen.get_height() / height)
-    else:
-        finished_map.tile_size = int(connected_env.screen.get_width() / width)
-    finished_map.tile_size = max(1, finished_map.tile_size)
-
     return finished_map
 
 
@@ -87,15 +67,13 @@ def generate_map_topologies(numb, map_settings, seed=None, path=None):
     Args:
         numb: number of maps to generate
         map_settings: dictionary with settings for the map generation
-        seed: seed for random number generation
+        seed: seed for random number generation, the same seed generates the same maps
         path: path to save the maps to
 
     Returns:
 
     """
-
-    if seed:
-        raise NotImplementedError("Seed is not implemented yet")
+    rng = np.random.default_rng(seed)
 
     # Ensure output directory exists
     os.makedirs(path, exist_ok=True)
@@ -118,6 +96,7 @@ def generate_map_topologies(numb, map_settings, seed=None, path=None):
         mountain_percentage,
         dessert_percentage,
         resource_density,
+        rng,
     )
 
     for i in range(numb):
@@ -135,7 +114,7 @@ def generate_map_topologies(numb, map_settings, seed=None, path=None):
 
 
 def let_map_agent_run(
-    map_arrays, land_type_percentage, tiles, LAND_TYPE_VALUE, position
+    map_arrays, land_type_percentage, tiles, LAND_TYPE_VALUE, position, rng
 ):
     if land_type_percentage < 0:
         return
@@ -165,7 +144,7 @@ def let_map_agent_run(
         while agents:
             left_agents = len(agents)
             # Generate random walks on GPU
-            walks = np.random.randint(0, 8, size=left_agents)
+            walks = rng.integers(0, 8, size=left_agents)
 
             # We iterate over a snapshot copy of agents
             # so we can safely remove them from the original list
@@ -186,15 +165,18 @@ def create_topologies(
     mountain_percentage,
     dessert_percentage,
     resource_density=0.05,
+    rng=None,
 ):
-    # Initialize the 2D list with the appropriate dimensions
+    if rng is None:
+        rng = np.random.default_rng()
 
+    # Initialize the 2D list with the appropriate dimensions
     topology_arrays = [np.zeros((width, height, 1), dtype=np.int64) for _ in range(num)]
     resource_arr = [np.zeros((width, height, 1), dtype=np.int64) for _ in range(num)]
     total_tiles = width * height
 
     # use numpy to generate 6 random ints between 0 and 100
-    random_values = np.random.randint(0, width, 6)
+    random_values = rng.integers(0, width, 6)
 
     # mountain agents
     topology_arrays = let_map_agent_run(
@@ -203,6 +185,7 @@ def create_topologies(
         total_tiles,
         LandType.MOUNTAIN,
         MapPosition(random_values[0], random_values[1]),
+        rng,
     )
 
     # dessert agents
@@ -212,6 +195,7 @@ def create_topologies(
         total_tiles,
         LandType.DESERT,
         MapPosition(random_values[2], random_values[3]),
+        rng,
     )
 
     # water agents
@@ -221,6 +205,7 @@ def create_topologies(
         total_tiles,
         LandType.OCEAN,
         MapPosition(random_values[4], random_values[5]),
+        rng,
     )
 
     # expand topology arrays unsqueeze
@@ -239,11 +224,11 @@ def create_topologies(
                         map_arr[row][col][0] = LandType.MARSH.value
 
                 if land == LandType.LAND.value:
-                    if random.random() < resource_density:
+                    if rng.random() < resource_density:
                         map_arr[row][col][1] = ResourceType.GRAIN.value
 
                 if land == LandType.MOUNTAIN.value:
-                    if random.random() < resource_density:
+                    if rng.random() < resource_density:
                         map_arr[row][col][1] = ResourceType.METAL.value
 
     return map_arrays
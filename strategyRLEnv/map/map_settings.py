@@ -71,6 +71,16 @@ def land_type_color(land_type: LandType):
         return COLOR_DEFAULT_LAND
 
 
+# money a tile yields per turn by its land type, without buildings
+LAND_MONEY_VALUES = {
+    LandType.LAND: 1,
+    LandType.OCEAN: 1,
+    LandType.RIVER: 1,
+    LandType.MARSH: 1,
+    LandType.MOUNTAIN: 1,
+    LandType.DESERT: 1,
+}
+
 BUILDING_IDS = {
     BuildingType.CITY: 0,
     BuildingType.ROAD: 1,
@@ -78,6 +88,8 @@ BUILDING_IDS = {
     BuildingType.FARM: 3,
     BuildingType.MINE: 4,
 }
+# building id of a tile without building
+DEFAULT_BUILDING_VALUE = -1
 
 ALLOWED_BUILDING_PLACEMENTS = {
     BuildingType.CITY: {
@@ -1,7 +1,3 @@
-from typing import Tuple
-
-import pygame
-
 from strategyRLEnv.map import MapPosition
 from strategyRLEnv.map.map_settings import BuildingType, city_health
 from strategyRLEnv.objects.Building import Building
@@ -19,24 +15,6 @@ class City(Building, Ownable, Destroyable):
             health=city_health,
         )
 
-    def draw(
-        self,
-        screen: pygame.Surface,
-        square_size: int,
-        owner_color: Tuple[int, int, int],
-    ):
-        # Draw the city image centered on the tile
-        pygame.draw.rect(
-            screen,
-            owner_color,
-            (
-                self.position.x * square_size,
-                self.position.y * square_size,
-                square_size,
-                square_size,
-            ),
-        )
-
     def destroy(self, env):
         super().destroy(env)
         env.agents[self.owner.id].remove_city(self)
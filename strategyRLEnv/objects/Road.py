@@ -1,9 +1,6 @@
-from typing import Dict, Tuple
+from typing import Dict
 
-import pygame
-
-from strategyRLEnv.map.map_settings import (BuildingType, bridge_color,
-                                            road_color)
+from strategyRLEnv.map.map_settings import BuildingType
 from strategyRLEnv.map.MapPosition import MapPosition
 from strategyRLEnv.objects.Building import Building
 
@@ -22,28 +19,6 @@ class Road(Building):
         self.shape = shape if shape else RoadShape()
         self.shape.left = True
 
-    def draw(
-        self,
-        screen: pygame.Surface,
-        square_size: int,
-        owner_color: Tuple[int, int, int],
-    ):
-        """
-        Draw the road on the screen.
-        :param owner_color:
-        :param square_size:
-        :param screen: Pygame display surface
-        """
-
-        draw_bridge_road(
-            screen,
-            self.position.x,
-            self.position.y,
-            square_size,
-            self.shape,
-            road_color,
-        )
-
     def update(self, env):
         super().update(env)
         update_road_bridge_shape(self, env.map)
@@ -55,29 +30,6 @@ class Bridge(Building):
 
         self.shape = shape if shape else RoadShape()
 
-    def draw(
-        self,
-        screen: pygame.Surface,
-        square_size: int,
-        owner_color: Tuple[int, int, int],
-    ):
-        """
-        Draw the road on the screen.
-        :param shape:
-        :param square_size:
-        :param owner_color:
-        :param screen: Pygame display surface
-        """
-
-        draw_bridge_road(
-            screen,
-            self.position.x,
-            self.position.y,
-            square_size,
-            self.shape,
-            bridge_color,
-        )
-
     def update(self, env):
         super().update(env)
         update_road_bridge_shape(self, env.map)
@@ -142,54 +94,3 @@ def update_road_bridge_shape(road_or_bridge, map):
                 right.get_road_or_bridge().shape.left = True
 
     road_or_bridge.shape = shape
-
-
-def draw_bridge_road(
-    screen: pygame.Surface,
-    x,
-    y,
-    square_size: int,
-    shape: RoadShape,
-    color: Tuple[int, int, int],
-):
-    """
-    Draw the road on the screen based on the RoadShape.
-
-    :param color:
-    :param y:
-    :param x:
-    :param screen: Pygame display surface
-    :param square_size: Size of the square tile
-    :param shape: RoadShape indicating connections
-    """
-    center_x = x * square_size + square_size // 2
-    center_y = y * square_size + square_size // 2
-    half_size = square_size // 2
-
-    road_width = max(2, square_size // 8)  # Adjust road thickness as needed
-
-    # Define end points for each direction
-    directions = {
-        "up": (center_x, center_y - half_size),
-        "down": (center_x, center_y + half_size),
-        "left": (center_x - half_size, center_y),
-        "right": (center_x + half_size, center_y),
-    }
-
-    # Draw roads based on active connections
-    if shape.up:
-        pygame.draw.line(
-            screen, color, (center_x, center_y), directions["up"], road_width
-        )
-    if shape.down:
-        pygame.draw.line(
-            screen, color, (center_x, center_y), directions["down"], road_width
-        )
-    if shape.left:
-        pygame.draw.line(
-            screen, color, (center_x, center_y), directions["left"], road_width
-        )
-    if shape.right:
-        pygame.draw.line(
-            screen, color, (center_x, center_y), directions["right"], road_width
-        )
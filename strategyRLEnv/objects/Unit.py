@@ -1,8 +1,3 @@
-import random
-from typing import Tuple
-
-import pygame
-
 from strategyRLEnv.map import MapPosition
 from strategyRLEnv.map.map_settings import max_unit_strength
 from strategyRLEnv.objects.Destroyable import Destroyable
@@ -20,19 +15,21 @@ class Unit(Ownable):
         # check for other units around and adapt placement
 
         self.opponent_targets = []
-        surounding_tiles = env.map.get_surrounding_tiles(
-            self.position, 1, diagonal=True
+        map = env.map
+        surrounding = map.neighbour_ids(
+            self.position.x, self.position.y, 1, diagonal=True
         )
 
-        for tile in surounding_tiles:
-            if tile.unit is not None:
-                unit = tile.unit
+        for tile_id in surrounding.tolist():
+            unit = map.units.get(tile_id)
+            building = map.buildings.get(tile_id)
+            if unit is not None:
                 if unit.owner.id != self.owner.id:
                     self.opponent_targets.append(unit)
-            elif tile.building is not None:
-                if isinstance(tile.building, Ownable):
-                    if tile.building.owner.id != self.owner.id:
-                        self.opponent_targets.append(tile.building)
+            elif building is not None:
+                if isinstance(building, Ownable):
+                    if building.owner.id != self.owner.id:
+                        self.opponent_targets.append(building)
 
     def step(self, env):
         self.update(env)
@@ -41,7 +38,8 @@ class Unit(Ownable):
     def attack_random(self, env):
         if len(self.opponent_targets) < 1:
             return False
-        attacked_target = random.choice(self.opponent_targets)
+        target_index = env.np_random.integers(len(self.opponent_targets))
+        attacked_target = self.opponent_targets[target_index]
 
         # calculate the damage
         dmg_multiplier_self = 0.3
@@ -82,26 +80,3 @@ class Unit(Ownable):
         self.owner.remove_unit(self)
         tile.update(env)
         env.map.trigger_surrounding_tile_update(self.position)
-
-    def draw(
-        self,
-        screen: pygame.Surface,
-        square_size: int,
-        owner_color: Tuple[int, int, int],
-    ):
-        # Calculate the size of the diamond
-        rectangle_size = square_size / 3
-        x_offset = square_size * self.position.x
-        y_offset = square_size * self.position.y
-
-        center_x = x_offset + (square_size / 2)
-        center_y = y_offset + (square_size / 2)
-
-        # Define the vertices of the diamond
-        top = (center_x, center_y - rectangle_size)
-        right = (center_x + rectangle_size, center_y)
-        bottom = (center_x, center_y + rectangle_size)
-        left = (center_x - rectangle_size, center_y)
-        vertices = [top, right, bottom, left]
-
-        pygame.draw.polygon(screen, owner_color, vertices)
@@ -0,0 +1,353 @@
+"""
+Pygame rendering of the environment.
+
+This is the only module importing pygame, the simulation core (map, agents, actions, objects)
+never imports it. It is loaded by MapEnvironment only when a screen is needed.
+"""
+from typing import Tuple
+
+import numpy as np
+import pygame
+
+from strategyRLEnv.map.map_settings import (COLOR_DEFAULT_BORDER, BuildingType,
+                                            ResourceType, bridge_color,
+                                            road_color)
+from strategyRLEnv.objects.Road import RoadShape
+
+
+def setup_screen(screen_width: int, screen_height: int, render_mode: str):
+    """
+    Create the surface to draw on, a display window for 'human',
+    an off-screen surface without any display for every other mode.
+    """
+    if render_mode == "human":
+        pygame.init()
+        screen = pygame.display.set_mode((screen_width, screen_height))
+        pygame.display.set_caption("Agent-based Strategy RL")
+    else:
+        screen = pygame.Surface((screen_width, screen_height))
+    screen.fill((0, 0, 0))  # Fill the screen with black color
+    return screen
+
+
+def close():
+    pygame.quit()
+
+
+def flip():
+    pygame.display.flip()
+
+
+def capture_game_state_as_image(screen):
+    return np.transpose(pygame.surfarray.array3d(screen), axes=[1, 0, 2])
+
+
+def fit_tile_size(screen, map) -> int:
+    """
+    Largest tile size in pixels that fits the whole map on the screen.
+    """
+    if map.height > map.width:
+        tile_size = int(screen.get_height() / map.height)
+    else:
+        tile_size = int(screen.get_width() / map.width)
+    return max(1, tile_size)
+
+
+def draw_env(screen, env):
+    """
+    Draw the map and all agents of the environment on the screen.
+    """
+    env.map.tile_size = fit_tile_size(screen, env.map)
+    draw_map(screen, env.map, 1, 0, 0)
+    for agent in env.agents:
+        draw_agent(screen, agent, env.map.tile_size)
+
+
+def draw_map(screen, map, zoom_level, pan_x, pan_y):
+    """
+    Draw the map on the screen
+    :param screen:
+    :param map:
+    :param zoom_level:
+    :param pan_x:
+    :param pan_y:
+    :return:
+    """
+    for row in map.squares:
+        for square in row:
+            new_x = (square.position.x * zoom_level) + pan_x
+            new_y = (square.position.x * zoom_level) + pan_y
+            new_size = map.tile_size * zoom_level
+            draw_square(screen, square, map.tile_size, new_x, new_y, new_size)
+
+
+def draw_agent(screen, agent, square_size: int):
+    # draw the units
+    for unit in agent.units:
+        draw_unit(screen, unit, square_size, agent.color)
+
+
+def draw_square(
+    screen, square, square_size: int, new_x: int, new_y: int, new_square_size: int
+):
+    """
+    Draw the square on the screen
+    :param screen:
+    :param square:
+    :param square_size:
+    :param new_x:
+    :param new_y:
+    :param new_square_size:
+    :return:
+    """
+
+    pygame.draw.rect(
+        screen,
+        square.land_type_color,
+        (
+            square.position.x * square_size,
+            square.position.y * square_size,
+            square_size,
+            square_size,
+        ),
+    )
+    grain_color = (255, 255, 0)
+    metal_color = (192, 192, 192)
+    if square.resource != ResourceType.NONE:
+        if square.resource == ResourceType.GRAIN:
+            resource_color = grain_color
+
+        elif square.resource == ResourceType.METAL:
+            resource_color = metal_color
+
+        pygame.draw.line(
+            screen,
+            resource_color,
+            (
+                square.position.x * square_size + square_size * 0.3,
+                square.position.y * square_size + square_size,
+            ),
+            (
+                square.position.x * square_size + square_size * 0.3,
+                square.position.y * square_size + square_size / 2,
+            ),
+        )
+
+        pygame.draw.line(
+            screen,
+            resource_color,
+            (
+                square.position.x * square_size + square_size * 0.6,
+                square.position.y * square_size,
+            ),
+            (
+                square.position.x * square_size + square_size * 0.6,
+                square.position.y * square_size + square_size / 2,
+            ),
+        )
+
+    if square.owner_color != COLOR_DEFAULT_BORDER:
+        pygame.draw.rect(
+            screen,
+            square.owner_color,
+            (
+                square.position.x * square_size,
+                square.position.y * square_size,
+                square_size,
+                square_size,
+            ),
+            1,
+        )
+
+    if square.building is not None:
+        draw_building(screen, square.building, square_size, square.owner_color)
+
+
+def draw_building(
+    screen, building, square_size: int, owner_color: Tuple[int, int, int]
+):
+    """
+    Draw the building on the given screen.
+    """
+    building_type = building.building_type
+    if building_type == BuildingType.CITY:
+        draw_city(screen, building, square_size, owner_color)
+    elif building_type == BuildingType.ROAD:
+        draw_bridge_road(
+            screen,
+            building.position.x,
+            building.position.y,
+            square_size,
+            building.shape,
+            road_color,
+        )
+    elif building_type == BuildingType.BRIDGE:
+        draw_bridge_road(
+            screen,
+            building.position.x,
+            building.position.y,
+            square_size,
+            building.shape,
+            bridge_color,
+        )
+    elif building_type == BuildingType.FARM:
+        draw_farm(screen, building, square_size)
+    elif building_type == BuildingType.MINE:
+        draw_mine(screen, building, square_size)
+
+
+def draw_city(screen, city, square_size: int, owner_color: Tuple[int, int, int]):
+    # Draw the city image centered on the tile
+    pygame.draw.rect(
+        screen,
+        owner_color,
+        (
+            city.position.x * square_size,
+            city.position.y * square_size,
+            square_size,
+            square_size,
+        ),
+    )
+
+
+def draw_farm(screen, farm, square_size: int):
+    """
+    Draws diagonal lines filling the square from bottom left to top right.
+
+    :param screen: The Pygame surface to draw on.
+    :param farm: The farm to draw.
+    :param square_size: The size of the square in pixels.
+    """
+    # Calculate the top-left corner of the square
+    top_left_x = farm.position.x * square_size
+    top_left_y = farm.position.y * square_size
+
+    # Define the color for the lines
+    line_color = (0, 0, 0)  # Default to black if not specified
+
+    num_lines = 2
+
+    # Calculate spacing between lines
+    spacing = square_size / (num_lines + 1)
+
+    for i in range(1, num_lines + 1):
+        # Calculate the offset for each line
+        offset = spacing * i
+
+        # Start position on the left edge of the tile
+        start_pos = (top_left_x, top_left_y + square_size - offset)
+
+        # End position on the top edge of the tile
+        end_pos = (top_left_x + square_size, top_left_y + square_size - offset)
+
+        # Draw the diagonal line
+        pygame.draw.line(
+            screen, line_color, start_pos, end_pos, 2
+        )  # Width=2 for better visibility
+
+
+def draw_mine(screen, mine, square_size: int):
+    """
+    Draws triangle filling.
+
+    :param screen: The Pygame surface to draw on.
+    :param mine: The mine to draw.
+    :param square_size: The size of the square in pixels.
+    """
+    # Calculate the top-left corner of the square
+    top_left_x = mine.position.x * square_size
+    top_left_y = mine.position.y * square_size
+
+    # Define the color for the triangle
+    triangle_color = (0, 0, 0)  # Default to black if not specified
+
+    # Scaling factor to make the triangle smaller
+    scaling_factor = 0.6
+    base_width = int(square_size * scaling_factor)
+    height = int(square_size * scaling_factor)
+
+    # Centering coordinates
+    base_x_start = top_left_x + (square_size - base_width) // 2
+    base_y = top_left_y + square_size - (square_size - height) // 2
+    apex_y = base_y - height
+
+    # Vertices of the pyramid triangle
+    vertex1 = (base_x_start, base_y)  # Base Left
+    vertex2 = (base_x_start + base_width, base_y)  # Base Right
+    vertex3 = (top_left_x + square_size // 2, apex_y)  # Apex
+
+    # List of vertices
+    vertices = [vertex1, vertex2, vertex3]
+
+    # Draw the filled pyramid triangle
+    pygame.draw.polygon(screen, triangle_color, vertices, 0)
+
+
+def draw_unit(screen, unit, square_size: int, owner_color: Tuple[int, int, int]):
+    # Calculate the size of the diamond
+    rectangle_size = square_size / 3
+    x_offset = square_size * unit.position.x
+    y_offset = square_size * unit.position.y
+
+    center_x = x_offset + (square_size / 2)
+    center_y = y_offset + (square_size / 2)
+
+    # Define the vertices of the diamond
+    top = (center_x, center_y - rectangle_size)
+    right = (center_x + rectangle_size, center_y)
+    bottom = (center_x, center_y + rectangle_size)
+    left = (center_x - rectangle_size, center_y)
+    vertices = [top, right, bottom, left]
+
+    pygame.draw.polygon(screen, owner_color, vertices)
+
+
+def draw_bridge_road(
+    screen,
+    x,
+    y,
+    square_size: int,
+    shape: RoadShape,
+    color: Tuple[int, int, int],
+):
+    """
+    Draw the road on the screen based on the RoadShape.
+
+    :param color:
+    :param y:
+    :param x:
+    :param screen: Pygame display surface
+    :param square_size: Size of the square tile
+    :param shape: RoadShape indicating connections
+    """
+    center_x = x * square_size + square_size // 2
+    center_y = y * square_size + square_size // 2
+    half_size = square_size // 2
+
+    road_width = max(2, square_size // 8)  # Adjust road thickness as needed
+
+    # Define end points for each direction
+    directions = {
+        "up": (center_x, center_y - half_size),
+        "down": (center_x, center_y + half_size),
+        "left": (center_x - half_size, center_y),
+        "right": (center_x + half_size, center_y),
+    }
+
+    # Draw roads based on active connections
+    if shape.up:
+        pygame.draw.line(
+            screen, color, (center_x, center_y), directions["up"], road_width
+        )
+    if shape.down:
+        pygame.draw.line(
+            screen, color, (center_x, center_y), directions["down"], road_width
+        )
+    if shape.left:
+        pygame.draw.line(
+            screen, color, (center_x, center_y), directions["left"], road_width
+        )
+    if shape.right:
+        pygame.draw.line(
+            screen, color, (center_x, center_y), directions["right"], road_width
+        )
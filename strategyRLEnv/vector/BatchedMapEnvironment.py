@@ -0,0 +1,215 @@
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from gymnasium import spaces
+from gymnasium.vector import VectorEnv
+from gymnasium.vector.utils import batch_space
+
+from strategyRLEnv.ActionManager import check_action_array
+from strategyRLEnv.environment import MapEnvironment
+from strategyRLEnv.map.LayerBuffer import LayerBuffer
+from strategyRLEnv.map.Map import (MAP_LAYER_DTYPES, MAP_LAYER_NAMES,
+                                   write_map_features)
+
+
+def world_seeds(seed: Optional[int], num_envs: int) -> List[Optional[int]]:
+    """
+    The seed of every world of a vector env, one per child of SeedSequence(seed), so the worlds
+    differ from each other and the same seed gives the same worlds. None for all worlds if seed is None.
+    """
+    if seed is None:
+        return [None] * num_envs
+    return [
+        int(child.generate_state(1)[0])
+        for child in np.random.SeedSequence(seed).spawn(num_envs)
+    ]
+
+
+class BatchedMapEnvironment(VectorEnv):
+    """
+    Steps num_envs independent games of MapEnvironment with one call and returns batched observations.
+
+    The layer buffers of all worlds are the rows of one (num_envs, nbytes) buffer, so all
+    per tile layers are stored with a leading env dimension, e.g. ownership_map has shape
+    (num_envs, width, height) and the map of world i reads and writes ownership_map[i].
+    Observations of all worlds are built from these stacked layers in one pass instead of per world.
+    The game logic is not batched: the actions of each world are validated and applied by the
+    world's own MapEnvironment, one world after the other.
+
+    A world is reset automatically on the step after all its agents are done.
+
+    Attributes:
+        env_settings (Dict[str, Any]): The settings shared by all worlds.
+        num_agents (int): The number of agents per world.
+        num_envs (int): The number of worlds.
+        envs (List[MapEnvironment]): The single worlds.
+    """
+
+    metadata = {"render.modes": ["rgb_array"], "autoreset_mode": "NextStep"}
+
+    def __init__(
+        self,
+        env_settings: Any,
+        num_agents: int,
+        num_envs: int,
+        actions_per_agent: int = 1,
+        render_mode: str = "rgb_array",
+        seed: Optional[int] = None,
+    ):
+        if not isinstance(num_envs, int) or num_envs < 1:
+            raise ValueError("num_envs should be a positive integer")
+        if not isinstance(actions_per_agent, int) or actions_per_agent < 1:
+            raise ValueError("actions_per_agent should be a positive integer")
+
+        self.env_settings = env_settings
+        self.num_agents = num_agents
+        self.num_envs = num_envs
+        self.render_mode = render_mode
+
+        self.envs: List[MapEnvironment] = [
+            MapEnvironment(env_settings, num_agents, render_mode, env_seed)
+            for env_seed in world_seeds(seed, num_envs)
+        ]
+        first_env = self.envs[0]
+        self.width = first_env.map.width
+        self.height = first_env.map.height
+        self.features_per_tile = first_env.features_per_tile
+        self.agent_features = first_env.agent_features
+
+        # layer buffers of all worlds, [env, byte], and the stacked layers as views, [env, x, y]
+        nbytes = first_env.map.layers.nbytes
+        self.layers = LayerBuffer(
+            self.width,
+            self.height,
+            MAP_LAYER_DTYPES,
+            np.zeros((num_envs, nbytes), dtype=np.uint8),
+        )
+        for name in MAP_LAYER_NAMES:
+            setattr(self, name, self.layers.layer(name))
+
+        self.single_observation_space = first_env.observation_space
+        self.observation_space = batch_space(self.single_observation_space, num_envs)
+
+        # actions of all worlds, [env, agent, action, (action_id, x, y)]
+        self.single_action_space = first_env.action_space
+        nvec = np.broadcast_to(
+            self.single_action_space.nvec,
+            (num_envs, num_agents, actions_per_agent, 3),
+        )
+        self.action_space = spaces.MultiDiscrete(nvec)
+
+        self._autoreset_envs = np.zeros(num_envs, dtype=bool)
+
+    def reset(
+        self,
+        *,
+        seed: Optional[int] = None,
+        options: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        Resets all worlds and returns the batched initial observation.
+        Args:
+            seed: if given, world i is reset with world_seeds(seed, num_envs)[i]
+            options: may contain "map_file", the topology file used for all worlds
+        """
+        if seed is not None:
+            if not isinstance(seed, int):
+                raise ValueError("seed should be an integer")
+
+        map_file = None
+        if options is not None:
+            map_file = options.get("map_file")
+
+        for i, env_seed in enumerate(world_seeds(seed, self.num_envs)):
+            self._reset_world(i, env_seed, map_file)
+        self._autoreset_envs[:] = False
+
+        info = {"info": "no info here"}
+        return self._get_observation(), info
+
+    def step(self, actions):
+        """
+        Executes one step in every world, the worlds are stepped one after the other.
+
+        Args:
+            actions: integer array of shape (num_envs, num_agents, k, 3) with
+            actions[env][agent][i] = [action_id, x, y], use action_id -1 (ACTION_PADDING) for padding
+
+        Returns:
+            observations, rewards, terminations, truncations of shape (num_envs, num_agents) and info
+        """
+        actions = np.asarray(actions)
+        if actions.ndim != 4 or actions.shape[-1] != 3:
+            raise ValueError(
+                "actions should be an integer array of shape (num_envs, num_agents, k, 3)"
+            )
+        if actions.shape[0] != self.num_envs:
+            raise ValueError("actions should contain one entry per environment")
+        # nvec holds the number of action types, the map width and height
+        check_action_array(actions, *self.single_action_space.nvec)
+
+        rewards = np.zeros((self.num_envs, self.num_agents), dtype=float)
+        terminations = np.zeros((self.num_envs, self.num_agents), dtype=bool)
+        truncations = np.zeros((self.num_envs, self.num_agents), dtype=bool)
+
+        for i, env in enumerate(self.envs):
+            if self._autoreset_envs[i]:
+                self._reset_world(i)
+                continue
+
+            env_rewards, env_dones, env_truncated = env._apply_step(actions[i])
+            rewards[i] = env_rewards
+            terminations[i] = env_dones
+            truncations[i] = env_truncated
+
+        self._autoreset_envs = np.all(terminations | truncations, axis=1)
+
+        return self._get_observation(), rewards, terminations, truncations, {}
+
+    def render(self):
+        """
+        Renders all worlds.
+
+        Returns:
+            tuple of the RGB arrays of all worlds
+        """
+        return tuple(env.render() for env in self.envs)
+
+    def close_extras(self, **kwargs):
+        for env in self.envs:
+            env.close()
+
+    def _reset_world(self, index: int, seed: Optional[int] = None, map_file=None):
+        """
+        Resets a single world and moves its map layers into the stacked layers.
+        """
+        env = self.envs[index]
+        env.reset(seed=seed, map_file=map_file)
+        env.map.bind_buffer(self.layers.buffer[index])
+
+    def _get_observation(self):
+        """
+        Constructs the batched observation dictionary of all worlds.
+
+        Returns:
+            observation (Dict[str, Any]): the observations with a leading env dimension
+        """
+        map_observation = np.zeros(
+            (self.num_envs, len(self.features_per_tile), self.width, self.height),
+            dtype=np.float32,
+        )
+        write_map_features(self, map_observation, self.envs[0].map_feature_extractors)
+
+        agent_observations = np.zeros(
+            (self.num_envs, self.num_agents, len(self.agent_features)),
+            dtype=np.float32,
+        )
+        for i, env in enumerate(self.envs):
+            for j, agent in enumerate(env.agents):
+                agent.get_observation(agent_observations[i, j])
+
+        return {
+            "map": map_observation,
+            "visibility_map": self.visibility_map.copy(),
+            "agents": agent_observations,
+        }
@@ -0,0 +1,308 @@
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from typing import Any, Dict, Optional
+
+import numpy as np
+from gymnasium import spaces
+from gymnasium.vector import VectorEnv
+from gymnasium.vector.utils import batch_space
+
+from strategyRLEnv.ActionManager import check_action_array
+from strategyRLEnv.environment import MapEnvironment
+from strategyRLEnv.vector.BatchedMapEnvironment import world_seeds
+
+OBSERVATION_KEYS = ("map", "visibility_map", "agents")
+
+
+def create_shared_observation(observation_space, num_envs: int):
+    """
+    Allocate one shared memory block per observation key, laid out as the batched observation space.
+
+    :return: dict of key to SharedMemory
+    """
+    blocks = {}
+    for key in OBSERVATION_KEYS:
+        space = observation_space[key]
+        nbytes = num_envs * int(np.prod(space.shape)) * np.dtype(space.dtype).itemsize
+        blocks[key] = shared_memory.SharedMemory(create=True, size=max(1, nbytes))
+    return blocks
+
+
+def read_shared_observation(blocks, observation_space, num_envs: int):
+    """
+    Wrap the shared memory blocks in numpy arrays of shape (num_envs, ...).
+
+    :return: dict of key to np.ndarray
+    """
+    observation = {}
+    for key in OBSERVATION_KEYS:
+        space = observation_space[key]
+        observation[key] = np.ndarray(
+            (num_envs,) + space.shape, dtype=space.dtype, buffer=blocks[key].buf
+        )
+    return observation
+
+
+def _worker(
+    index: int,
+    num_envs: int,
+    env_settings: Any,
+    num_agents: int,
+    seed: Optional[int],
+    pipe,
+    parent_pipe,
+):
+    """
+    Runs a single MapEnvironment in a subprocess.
+    Observations are written into the shared memory slot of this worker,
+    over the pipe only commands, rewards and done flags are exchanged.
+    """
+    parent_pipe.close()
+    env = None
+    blocks = {}
+    observation = None
+    autoreset = False
+
+    try:
+        env = MapEnvironment(env_settings, num_agents, None, seed)
+        pipe.send(((env.observation_space, env.action_space), True))
+
+        while True:
+            command, data = pipe.recv()
+
+            if command == "attach":
+                blocks = {
+                    key: shared_memory.SharedMemory(name=name)
+                    for key, name in data.items()
+                }
+                shared = read_shared_observation(
+                    blocks, env.observation_space, num_envs
+                )
+                observation = {key: shared[key][index] for key in OBSERVATION_KEYS}
+                pipe.send((None, True))
+
+            elif command == "reset":
+                seed, map_file = data
+                env_observation, info = env.reset(seed=seed, map_file=map_file)
+                for key in OBSERVATION_KEYS:
+                    observation[key][...] = env_observation[key]
+                autoreset = False
+                pipe.send((info, True))
+
+            elif command == "step":
+                if autoreset:
+                    env_observation, _ = env.reset()
+                    rewards = np.zeros(num_agents, dtype=float)
+                    dones = np.zeros(num_agents, dtype=bool)
+                    truncated = np.zeros(num_agents, dtype=bool)
+                    for key in OBSERVATION_KEYS:
+                        observation[key][...] = env_observation[key]
+                else:
+                    rewards, dones, truncated = env._apply_step(data)
+                    # filled in place, the observation never leaves shared memory
+                    env._get_observation(observation)
+                autoreset = bool(np.all(np.logical_or(dones, truncated)))
+                pipe.send(((rewards, dones, truncated), True))
+
+            elif command == "close":
+                pipe.send((None, True))
+                break
+
+            else:
+                raise RuntimeError(f"Unknown command: {command}")
+
+    except (KeyboardInterrupt, Exception) as e:
+        pipe.send(((type(e), str(e)), False))
+
+    finally:
+        for block in blocks.values():
+            block.close()
+        if env is not None:
+            env.close()
+        pipe.close()
+
+
+class SharedMemoryVectorEnv(VectorEnv):
+    """
+    Runs num_envs MapEnvironment instances in subprocesses.
+
+    The workers write the observations directly into shared memory blocks laid out as
+    the batched observation space, so observations are never pickled. The pipes only carry
+    the actions and the rewards and done flags of each step.
+
+    The returned observations are views into the shared memory and are overwritten by the next
+    reset() or step(), unless copy is True.
+
+    A world is reset automatically on the step after all its agents are done.
+
+    Attributes:
+        env_settings (Dict[str, Any]): The settings shared by all worlds.
+        num_agents (int): The number of agents per world.
+        num_envs (int): The number of worlds and worker processes.
+    """
+
+    metadata = {"render.modes": [], "autoreset_mode": "NextStep"}
+
+    def __init__(
+        self,
+        env_settings: Any,
+        num_agents: int,
+        num_envs: int,
+        actions_per_agent: int = 1,
+        seed: Optional[int] = None,
+        context: Optional[str] = None,
+        copy: bool = False,
+    ):
+        if not isinstance(num_envs, int) or num_envs < 1:
+            raise ValueError("num_envs should be a positive integer")
+        if not isinstance(actions_per_agent, int) or actions_per_agent < 1:
+            raise ValueError("actions_per_agent should be a positive integer")
+
+        self.env_settings = env_settings
+        self.num_agents = num_agents
+        self.num_envs = num_envs
+        self.copy = copy
+
+        ctx = mp.get_context(context)
+        self.parent_pipes, self.processes = [], []
+        for index, env_seed in enumerate(world_seeds(seed, num_envs)):
+            parent_pipe, child_pipe = ctx.Pipe()
+            process = ctx.Process(
+                target=_worker,
+                name=f"Worker<{type(self).__name__}>-{index}",
+                args=(
+                    index,
+                    num_envs,
+                    env_settings,
+                    num_agents,
+                    env_seed,
+                    child_pipe,
+                    parent_pipe,
+                ),
+                daemon=True,
+            )
+            self.parent_pipes.append(parent_pipe)
+            self.processes.append(process)
+            process.start()
+            child_pipe.close()
+
+        self.single_observation_space, self.single_action_space = self._receive()[0]
+        self.observation_space = batch_space(self.single_observation_space, num_envs)
+
+        # actions of all worlds, [env, agent, action, (action_id, x, y)]
+        nvec = np.broadcast_to(
+            self.single_action_space.nvec,
+            (num_envs, num_agents, actions_per_agent, 3),
+        )
+        self.action_space = spaces.MultiDiscrete(nvec)
+
+        self._blocks = create_shared_observation(
+            self.single_observation_space, num_envs
+        )
+        self._observation = read_shared_observation(
+            self._blocks, self.single_observation_space, num_envs
+        )
+        names = {key: block.name for key, block in self._blocks.items()}
+        self._send([("attach", names)] * num_envs)
+        self._receive()
+
+    def reset(
+        self,
+        *,
+        seed: Optional[int] = None,
+        options: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        Resets all worlds and returns the batched initial observation.
+        Args:
+            seed: if given, world i is reset with world_seeds(seed, num_envs)[i]
+            options: may contain "map_file", the topology file used for all worlds
+        """
+        if seed is not None:
+            if not isinstance(seed, int):
+                raise ValueError("seed should be an integer")
+
+        map_file = None
+        if options is not None:
+            map_file = options.get("map_file")
+
+        self._send(
+            [
+                ("reset", (env_seed, map_file))
+                for env_seed in world_seeds(seed, self.num_envs)
+            ]
+        )
+        self._receive()
+
+        info = {"info": "no info here"}
+        return self._get_observation(), info
+
+    def step(self, actions):
+        """
+        Executes one step in every world.
+
+        Args:
+            actions: integer array of shape (num_envs, num_agents, k, 3) with
+            actions[env][agent][i] = [action_id, x, y], use action_id -1 (ACTION_PADDING) for padding
+
+        Returns:
+            observations, rewards, terminations, truncations of shape (num_envs, num_agents) and info
+        """
+        actions = np.asarray(actions)
+        if actions.ndim != 4 or actions.shape[-1] != 3:
+            raise ValueError(
+                "actions should be an integer array of shape (num_envs, num_agents, k, 3)"
+            )
+        if actions.shape[0] != self.num_envs:
+            raise ValueError("actions should contain one entry per environment")
+        # nvec holds the number of action types, the map width and height
+        check_action_array(actions, *self.single_action_space.nvec)
+
+        self._send([("step", env_actions) for env_actions in actions])
+        results = self._receive()
+
+        rewards = np.array([result[0] for result in results], dtype=float)
+        terminations = np.array([result[1] for result in results], dtype=bool)
+        truncations = np.array([result[2] for result in results], dtype=bool)
+
+        return self._get_observation(), rewards, terminations, truncations, {}
+
+    def close_extras(self, **kwargs):
+        # workers that failed before have already shut down
+        for pipe, process in zip(self.parent_pipes, self.processes):
+            try:
+                pipe.send(("close", None))
+                pipe.recv()
+            except (ConnectionError, EOFError):
+                pass
+            pipe.close()
+            process.join()
+
+        for block in self._blocks.values():
+            block.close()
+            block.unlink()
+        self._blocks = {}
+
+    def _get_observation(self):
+        if self.copy:
+            return {key: value.copy() for key, value in self._observation.items()}
+        return dict(self._observation)
+
+    def _send(self, commands):
+        for pipe, command in zip(self.parent_pipes, commands):
+            pipe.send(command)
+
+    def _receive(self):
+        results = []
+        errors = []
+        for index, pipe in enumerate(self.parent_pipes):
+            result, success = pipe.recv()
+            if success:
+                results.append(result)
+            else:
+                errors.append((index, result))
+
+        if errors:
+            index, (error_type, message) = errors[0]
+            raise error_type(f"Worker {index} failed: {message}")
+        return results
@@ -0,0 +1,222 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from gymnasium import spaces
+from gymnasium.vector import VectorEnv
+from gymnasium.vector.utils import batch_space, create_empty_array
+
+from strategyRLEnv.ActionManager import check_action_array
+from strategyRLEnv.environment import MapEnvironment
+from strategyRLEnv.vector.BatchedMapEnvironment import world_seeds
+
+
+class ThreadedVectorEnv(VectorEnv):
+    """
+    Steps num_envs MapEnvironment instances concurrently in a thread pool.
+
+    All worlds share one process and one copy of the imported modules. The NumPy work of a step
+    (observation layers, visibility bit operations) releases the GIL and runs in parallel,
+    the Python game logic is serialized by the GIL.
+
+    After every reset() and step() parallel_efficiency holds the achieved efficiency,
+    the summed cpu time of the worker threads divided by wall time times the number of threads.
+    1.0 means perfect scaling, 1 / num_threads means no overlap at all.
+
+    A world is reset automatically on the step after all its agents are done.
+
+    Attributes:
+        env_settings (Dict[str, Any]): The settings shared by all worlds.
+        num_agents (int): The number of agents per world.
+        num_envs (int): The number of worlds.
+        num_threads (int): The number of worker threads.
+        envs (List[MapEnvironment]): The single worlds.
+        parallel_efficiency (float): The parallel efficiency of the last reset() or step().
+    """
+
+    metadata = {"render.modes": ["rgb_array"], "autoreset_mode": "NextStep"}
+
+    def __init__(
+        self,
+        env_settings: Any,
+        num_agents: int,
+        num_envs: int,
+        actions_per_agent: int = 1,
+        num_threads: Optional[int] = None,
+        render_mode: str = "rgb_array",
+        seed: Optional[int] = None,
+    ):
+        if not isinstance(num_envs, int) or num_envs < 1:
+            raise ValueError("num_envs should be a positive integer")
+        if not isinstance(actions_per_agent, int) or actions_per_agent < 1:
+            raise ValueError("actions_per_agent should be a positive integer")
+        if num_threads is None:
+            num_threads = num_envs
+        if not isinstance(num_threads, int) or num_threads < 1:
+            raise ValueError("num_threads should be a positive integer")
+
+        self.env_settings = env_settings
+        self.num_agents = num_agents
+        self.num_envs = num_envs
+        self.num_threads = min(num_threads, num_envs)
+        self.render_mode = render_mode
+
+        self.envs: List[MapEnvironment] = [
+            MapEnvironment(env_settings, num_agents, render_mode, env_seed)
+            for env_seed in world_seeds(seed, num_envs)
+        ]
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.num_threads, thread_name_prefix=type(self).__name__
+        )
+
+        self.single_observation_space = self.envs[0].observation_space
+        self.observation_space = batch_space(self.single_observation_space, num_envs)
+
+        # actions of all worlds, [env, agent, action, (action_id, x, y)]
+        self.single_action_space = self.envs[0].action_space
+        nvec = np.broadcast_to(
+            self.single_action_space.nvec,
+            (num_envs, num_agents, actions_per_agent, 3),
+        )
+        self.action_space = spaces.MultiDiscrete(nvec)
+
+        self._observations = create_empty_array(
+            self.single_observation_space, n=num_envs
+        )
+        self._rewards = np.zeros((num_envs, num_agents), dtype=float)
+        self._terminations = np.zeros((num_envs, num_agents), dtype=bool)
+        self._truncations = np.zeros((num_envs, num_agents), dtype=bool)
+        self._autoreset_envs = np.zeros(num_envs, dtype=bool)
+
+        self.parallel_efficiency = 0.0
+
+    def reset(
+        self,
+        *,
+        seed: Optional[int] = None,
+        options: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        Resets all worlds and returns the batched initial observation.
+        Args:
+            seed: if given, world i is reset with world_seeds(seed, num_envs)[i]
+            options: may contain "map_file", the topology file used for all worlds
+        """
+        if seed is not None:
+            if not isinstance(seed, int):
+                raise ValueError("seed should be an integer")
+
+        map_file = None
+        if options is not None:
+            map_file = options.get("map_file")
+
+        env_seeds = world_seeds(seed, self.num_envs)
+
+        def reset_world(index):
+            self._reset_world(index, env_seeds[index], map_file)
+
+        self._run_parallel(reset_world)
+        self._autoreset_envs[:] = False
+
+        info = {
+            "info": "no info here",
+            "parallel_efficiency": self.parallel_efficiency,
+        }
+        return self._get_observation(), info
+
+    def step(self, actions):
+        """
+        Executes one step in every world, the worlds are stepped concurrently.
+
+        Args:
+            actions: integer array of shape (num_envs, num_agents, k, 3) with
+            actions[env][agent][i] = [action_id, x, y], use action_id -1 (ACTION_PADDING) for padding
+
+        Returns:
+            observations, rewards, terminations, truncations of shape (num_envs, num_agents) and info
+        """
+        actions = np.asarray(actions)
+        if actions.ndim != 4 or actions.shape[-1] != 3:
+            raise ValueError(
+                "actions should be an integer array of shape (num_envs, num_agents, k, 3)"
+            )
+        if actions.shape[0] != self.num_envs:
+            raise ValueError("actions should contain one entry per environment")
+        # nvec holds the number of action types, the map width and height
+        check_action_array(actions, *self.single_action_space.nvec)
+
+        def step_world(index):
+            if self._autoreset_envs[index]:
+                self._reset_world(index)
+                self._rewards[index] = 0.0
+                self._terminations[index] = False
+                self._truncations[index] = False
+                return
+
+            env = self.envs[index]
+            rewards, dones, truncated = env._apply_step(actions[index])
+            self._rewards[index] = rewards
+            self._terminations[index] = dones
+            self._truncations[index] = truncated
+            env._get_observation(self._observation_slot(index))
+
+        self._run_parallel(step_world)
+        self._autoreset_envs = np.all(
+            np.logical_or(self._terminations, self._truncations), axis=1
+        )
+
+        info = {"parallel_efficiency": self.parallel_efficiency}
+        return (
+            self._get_observation(),
+            self._rewards.copy(),
+            self._terminations.copy(),
+            self._truncations.copy(),
+            info,
+        )
+
+    def render(self):
+        """
+        Renders all worlds.
+
+        Returns:
+            tuple of the RGB arrays of all worlds
+        """
+        return tuple(env.render() for env in self.envs)
+
+    def close_extras(self, **kwargs):
+        self.executor.shutdown(wait=True)
+        for env in self.envs:
+            env.close()
+
+    def _reset_world(self, index: int, seed: Optional[int] = None, map_file=None):
+        observation, _ = self.envs[index].reset(seed=seed, map_file=map_file)
+        self._write_observation(index, observation)
+
+    def _write_observation(self, index: int, observation):
+        for key, value in observation.items():
+            self._observations[key][index] = value
+
+    def _observation_slot(self, index: int):
+        return {key: value[index] for key, value in self._observations.items()}
+
+    def _get_observation(self):
+        return {key: value.copy() for key, value in self._observations.items()}
+
+    def _run_parallel(self, function):
+        """
+        Runs function(index) for every world in the thread pool and measures the parallel efficiency.
+        """
+
+        # cpu time of the thread, time spent waiting for the GIL is not counted
+        def timed(index):
+            start = time.thread_time()
+            function(index)
+            return time.thread_time() - start
+
+        start = time.perf_counter()
+        busy_times = list(self.executor.map(timed, range(self.num_envs)))
+        wall_time = time.perf_counter() - start
+
+        if wall_time > 0:
+            self.parallel_efficiency = sum(busy_times) / (wall_time * self.num_threads)
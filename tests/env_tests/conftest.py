@@ -0,0 +1,36 @@
+import pytest
+
+from strategyRLEnv.map.MapPosition import MapPosition
+from strategyRLEnv.objects.City import City
+from strategyRLEnv.objects.Road import Road
+from strategyRLEnv.objects.Unit import Unit
+
+
+def populate_env(env):
+    """
+    Give both agents some land, a city, a road, units and visibility next to each other.
+    """
+    for agent, (center_x, center_y) in zip(env.agents, [(8, 8), (14, 9)]):
+        for x in range(center_x - 3, center_x + 4):
+            for y in range(center_y - 6, center_y + 7):
+                env.map.set_visible(MapPosition(x, y), agent.id)
+        for x in range(center_x - 1, center_x + 2):
+            for y in range(center_y - 1, center_y + 2):
+                env.map.claim_tile(agent, MapPosition(x, y))
+                agent.add_claimed_tile(MapPosition(x, y))
+
+        city_position = MapPosition(center_x, center_y)
+        env.map.add_building(City(agent, city_position, {}), city_position)
+        road_position = MapPosition(center_x, center_y + 1)
+        env.map.add_building(Road(road_position, {}), road_position)
+        unit = Unit(agent, MapPosition(center_x + 2, center_y))
+        agent.add_unit(unit)
+        env.map.add_unit(unit, unit.position)
+
+
+@pytest.fixture
+def populate():
+    """
+    populate_env, call it with the env to populate.
+    """
+    return populate_env
@@ -0,0 +1,189 @@
+import json
+
+import numpy as np
+import pytest
+
+from strategyRLEnv.ActionManager import ACTION_HANDLERS
+from strategyRLEnv.actions.ClaimAction import ClaimAction
+from strategyRLEnv.environment import MapEnvironment
+from strategyRLEnv.map.MapPosition import MapPosition
+
+
+def make_env(seed=None):
+    # open settings file
+    with open("test_env_settings.json", "r") as f:
+        env_settings = json.load(f)
+    env_settings["map_width"] = 36
+    env_settings["map_height"] = 36
+
+    env = MapEnvironment(env_settings, 2, None, seed=seed)
+    env.reset(seed=seed)
+    return env
+
+
+@pytest.fixture
+def env():
+    env = make_env()
+    yield env
+    env.close()
+
+
+def all_positions(env):
+    # every tile plus a border of positions outside the map
+    xs, ys = np.meshgrid(
+        np.arange(-1, env.map.width + 1),
+        np.arange(-1, env.map.height + 1),
+        indexing="ij",
+    )
+    return xs.ravel(), ys.ravel()
+
+
+def assert_kernels_match(env):
+    xs, ys = all_positions(env)
+    for name, handler in ACTION_HANDLERS.items():
+        assert handler.supports_batch(), name
+        for agent in env.agents:
+            agent_ids = np.full(len(xs), agent.id)
+            batch = handler.validate_batch(env, agent_ids, xs, ys)
+            assert batch.dtype == bool and batch.shape == xs.shape
+
+            on_map = env.map.positions_on_map(xs, ys)
+            expected = handler.validate_each(
+                env, agent_ids[on_map], xs[on_map], ys[on_map]
+            )
+            assert np.array_equal(batch[on_map], expected), (name, agent.id)
+            assert not batch[~on_map].any()
+
+
+def test_validate_batch_matches_validate_at(env, populate):
+    assert_kernels_match(env)
+
+    populate(env)
+    env.agents[1].money = 60
+    assert_kernels_match(env)
+
+    # compare again after some steps changed the map
+    rng = np.random.default_rng(1)
+    for _ in range(3):
+        actions = []
+        for rows in env.action_masks(sparse=True):
+            actions.append(rows[rng.integers(len(rows), size=3)])
+        env.step(np.stack(actions))
+        assert_kernels_match(env)
+
+
+def test_subclass_without_kernel_is_validated_per_action(env):
+    class ClaimEverywhere(ClaimAction):
+        @classmethod
+        def validate_at(cls, env, agent, x, y):
+            return True
+
+    assert ClaimAction.supports_batch()
+    assert not ClaimEverywhere.supports_batch()
+
+    env.action_manager.handlers[1] = ClaimEverywhere
+    env.step([[[1, 5, 5]], [[0, 0, 0]]])
+    assert env.map.ownership_map[5, 5] == env.agents[0].id
+
+
+def test_square_changes_reach_the_layers(env, populate):
+    # the actions read the layers, changes made directly on the squares must show up there
+    agent = env.agents[0]
+    tile = env.map.get_tile(MapPosition(3, 4))
+
+    tile.owner_id = agent.id
+    assert env.map.ownership_map[3, 4] == agent.id
+    assert env.map.dirty_blocks[0, 0]
+
+    populate(env)
+    city_tile = env.map.get_tile(MapPosition(8, 8))
+    tile.add_building(city_tile.building)
+    assert env.map.building_map[3, 4] == env.map.building_map[8, 8]
+    tile.remove_building()
+    assert env.map.building_map[3, 4] == -1
+
+
+def game_state(env):
+    buildings = {
+        tile_id: (
+            type(building).__name__,
+            building.get_income(),
+            vars(building.shape) if hasattr(building, "shape") else None,
+        )
+        for tile_id, building in env.map.buildings.items()
+    }
+    units = {
+        tile_id: (unit.owner.id, unit.strength)
+        for tile_id, unit in env.map.units.items()
+    }
+    agents = [
+        (
+            agent.money,
+            set(agent.get_claimed_tiles()),
+            len(agent.cities),
+            sorted(env.map.tile_id(unit.position) for unit in agent.units),
+        )
+        for agent in env.agents
+    ]
+    return env.map.snapshot(), buildings, units, agents
+
+
+def assert_same_state(env, other):
+    snapshot, *state = game_state(env)
+    other_snapshot, *other_state = game_state(other)
+    assert np.array_equal(snapshot, other_snapshot)
+    assert state == other_state
+
+
+def test_execute_batch_matches_execute_at_in_order(populate):
+    # one env executes the actions batched, the other one by one
+    env = make_env(seed=0)
+    other = make_env(seed=0)
+    populate(env)
+    populate(other)
+    assert_same_state(env, other)
+
+    def execute(name, rows):
+        handler = ACTION_HANDLERS[name]
+        agent_ids, xs, ys = np.array(rows).T
+        rewards = handler.execute_batch(env, agent_ids, xs, ys)
+        expected = [
+            handler.execute_at(other, other.agents[agent_id], x, y)
+            for agent_id, x, y in rows
+        ]
+        assert np.array_equal(rewards, expected), name
+        assert_same_state(env, other)
+
+    # claims next to each other discover the same hidden tiles
+    execute("claim", [(0, 10, 7), (1, 12, 9), (0, 10, 8), (1, 12, 10), (0, 10, 9)])
+    # roads next to each other and to the existing ones change each other's shape
+    execute("build_road", [(0, 9, 9), (0, 7, 9), (1, 14, 11), (0, 9, 10), (1, 13, 11)])
+    # a farm next to a road earns more
+    execute("build_farm", [(0, 7, 10), (1, 15, 8)])
+    # reinforce, place new units and claim an enemy tile
+    execute("place_unit", [(0, 10, 8), (1, 13, 8), (0, 13, 10), (0, 6, 6)])
+    # removing the road changes the income of the farm next to it, destroyed after it
+    execute("destroy", [(0, 8, 8), (0, 7, 9), (0, 7, 10), (1, 14, 11)])
+    execute("withdraw_unit", [(0, 10, 8), (1, 16, 9), (0, 6, 6)])
+
+    # and for legal actions of every type after some steps
+    rng = np.random.default_rng(2)
+    for _ in range(3):
+        for action_id, name in env.action_mapping.items():
+            if name == "wait":
+                continue
+            rows = []
+            for agent_id, legal in enumerate(env.action_masks(sparse=True)):
+                legal = legal[legal[:, 0] == action_id]
+                for _, x, y in legal[rng.permutation(len(legal))[:4]].tolist():
+                    rows.append((agent_id, x, y))
+            if not rows:
+                continue
+            # one action per tile, like the winners of the conflicts
+            _, first = np.unique(
+                [(x, y) for _, x, y in rows], axis=0, return_index=True
+            )
+            execute(name, [rows[i] for i in sorted(first)])
+
+    env.close()
+    other.close()
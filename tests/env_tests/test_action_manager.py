@@ -4,12 +4,15 @@ import numpy as np
 import pytest
 
 from strategyRLEnv.ActionManager import create_action
+from strategyRLEnv.actions.Action import Action
 from strategyRLEnv.actions.BuildCityAction import BuildCityAction
 from strategyRLEnv.actions.BuildFarmAction import BuildFarmAction
 from strategyRLEnv.actions.BuildRoadAction import (BuildBridgeAction,
                                                    BuildRoadAction)
 from strategyRLEnv.actions.ClaimAction import ClaimAction
 from strategyRLEnv.environment import MapEnvironment
+from strategyRLEnv.map.map_settings import LandType
+from strategyRLEnv.map.MapPosition import MapPosition
 
 
 class MockAgent:
@@ -133,33 +136,179 @@ def test_resolve_conflict(env):
     agent_1 = MockAgent(id=1)
     agent_2 = MockAgent(id=2)
 
-    build_city_1 = BuildCityAction(agent_1, (1, 1))
-    build_city1_2 = BuildCityAction(agent_1, (1, 1))
-    build_city_2 = BuildCityAction(agent_2, (2, 2))
-    build_city_2_1 = BuildCityAction(agent_2, (1, 1))
+    # equal positions are different objects, the tile index detects the conflict
+    build_city_1 = BuildCityAction(agent_1, MapPosition(1, 1))
+    build_city1_2 = BuildCityAction(agent_1, MapPosition(1, 1))
+    build_city_2 = BuildCityAction(agent_2, MapPosition(2, 2))
+    build_city_2_1 = BuildCityAction(agent_2, MapPosition(1, 1))
+    tile_1 = 1 * env.map.width + 1
+    tile_2 = 2 * env.map.width + 2
 
-    no_conflicts_map = {}
-    no_conflicts_map.setdefault((1, 1), []).append(build_city_1)
-    no_conflicts_map.setdefault((2, 2), []).append(build_city_2)
-
-    conflict_map_1 = {}
-    conflict_map_1.setdefault((1, 1), []).append(build_city_1)
-    conflict_map_1.setdefault((1, 1), []).append(build_city1_2)
-
-    conflict_map_2 = {}
-    conflict_map_2.setdefault((1, 1), []).append(build_city_1)
-    conflict_map_2.setdefault((1, 1), []).append(build_city_2_1)
-
-    env.action_manager.conflict_map = no_conflicts_map
-    out_proposed_actions = env.action_manager.resolve_conflict()
-    assert len(out_proposed_actions) == 2
+    out_proposed_actions = env.action_manager.resolve_conflict(
+        [build_city_1, build_city_2], np.array([tile_1, tile_2])
+    )
+    assert out_proposed_actions == [build_city_1, build_city_2]
 
-    env.action_manager.conflict_map = conflict_map_1
-    out_proposed_actions = env.action_manager.resolve_conflict()
+    out_proposed_actions = env.action_manager.resolve_conflict(
+        [build_city_1, build_city1_2], np.array([tile_1, tile_1])
+    )
     assert len(out_proposed_actions) == 1
-    # assert that conflicts resolved
 
-    env.action_manager.conflict_map = conflict_map_2
-    env.action_manager.resolve_conflict()
-    assert len(out_proposed_actions) == 1
-    # assert that conflicts resolved
+    # one winner per tile, in the order of the proposals
+    actions = [build_city_1, build_city_2, build_city_2_1]
+    winners = set()
+    for _ in range(50):
+        out_proposed_actions = env.action_manager.resolve_conflict(
+            actions, np.array([tile_1, tile_2, tile_1])
+        )
+        assert len(out_proposed_actions) == 2
+        assert out_proposed_actions == sorted(out_proposed_actions, key=actions.index)
+        (winner,) = [a for a in out_proposed_actions if a is not build_city_2]
+        winners.add(winner.agent.id)
+    assert winners == {1, 2}, "both agents should win the conflict sometimes"
+
+    assert env.action_manager.resolve_conflict([], np.array([], dtype=np.int64)) == []
+
+
+def test_resolve_conflict_is_seeded(env):
+    actions = [BuildCityAction(MockAgent(id=i), MapPosition(1, 1)) for i in range(10)]
+    tiles = np.full(len(actions), 1 * env.map.width + 1)
+
+    winners = []
+    for _ in range(2):
+        env.reset(seed=3)
+        winners.append(
+            [env.action_manager.resolve_conflict(actions, tiles)[0] for _ in range(5)]
+        )
+    assert winners[0] == winners[1]
+
+
+def test_dispatch_table(env):
+    handlers = env.action_manager.handlers
+    for action_id, name in env.action_mapping.items():
+        action = create_action(MockAgent(), name, MapPosition(1, 1))
+        if name == "wait":
+            assert handlers[action_id] is None and action is None
+        else:
+            assert handlers[action_id] is type(action)
+
+
+def test_apply_actions_without_action_objects(env, monkeypatch):
+    agent = env.agents[0]
+    env.map.claim_tile(agent, MapPosition(0, 0))
+    agent.add_claimed_tile(MapPosition(0, 0))
+    env.map.set_visible(MapPosition(1, 0), agent.id)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("apply_actions should not create action objects")
+
+    monkeypatch.setattr(Action, "__init__", fail)
+    rewards, dones = env.action_manager.apply_actions([[[1, 1, 0]], [[0, 0, 0]]])
+    assert env.map.ownership_map[1, 0] == agent.id
+    assert rewards[0] > 0
+
+
+def test_actions_over_budget_are_rejected(env):
+    agent = env.agents[0]
+    for x in range(2):
+        for y in range(2):
+            env.map.get_tile(MapPosition(x, y)).set_land_type(LandType.LAND)
+            env.map.set_visible(MapPosition(x, y), agent.id)
+    env.map.claim_tile(agent, MapPosition(0, 0))
+    agent.add_claimed_tile(MapPosition(0, 0))
+    # enough for two claims, each claim alone would be valid
+    agent.money = 250
+
+    claims = [[1, 1, 0], [1, 0, 1], [1, 1, 1]]
+    env.action_manager.apply_actions([claims, [[0, 0, 0]]])
+
+    assert agent.money == 50
+    assert env.map.ownership_map[1, 0] == agent.id
+    assert env.map.ownership_map[0, 1] == agent.id
+    assert env.map.ownership_map[1, 1] != agent.id
+
+
+def test_budget_admission_in_submission_order(env):
+    spent = np.array([100, 0, 100, 50, 300, 60], dtype=float)
+    agent_ids = np.array([0, 1, 0, 0, 1, 1])
+    env.agents[0].money = 200
+    env.agents[1].money = 350
+
+    admitted = env.action_manager.admit_within_budget(agent_ids, spent)
+    assert admitted.tolist() == [True, True, True, False, True, False]
+
+
+def test_submitted_actions_from_array_match_lists(env):
+    wait_id = [i for i, name in env.action_mapping.items() if name == "wait"][0]
+    actions = [
+        [[1, 1, 0], [wait_id, 0, 0], [2, 3, 4]],
+        [[1, 2, 2], [-1, 0, 0], [-1, 0, 0]],
+    ]
+    from_lists = env.action_manager._submitted_from_lists(
+        [[a for a in agent_actions if a[0] != -1] for agent_actions in actions]
+    )
+    from_array = env.action_manager._submitted_from_array(np.array(actions))
+    for list_part, array_part in zip(from_lists, from_array):
+        assert array_part.tolist() == list_part.tolist()
+    assert from_array[1].tolist() == [0, 0, 1]
+
+    with pytest.raises(ValueError):
+        env.action_manager._submitted_from_array(np.array([[[99, 0, 0]]]))
+
+
+def test_lost_conflicts_do_not_use_the_budget(env, monkeypatch):
+    agent, opponent = env.agents
+    for x in range(3):
+        for y in range(2):
+            env.map.get_tile(MapPosition(x, y)).set_land_type(LandType.LAND)
+            env.map.set_visible(MapPosition(x, y), agent.id)
+            env.map.set_visible(MapPosition(x, y), opponent.id)
+    env.map.claim_tile(agent, MapPosition(0, 0))
+    agent.add_claimed_tile(MapPosition(0, 0))
+    env.map.claim_tile(opponent, MapPosition(2, 0))
+    opponent.add_claimed_tile(MapPosition(2, 0))
+    # enough for one claim
+    agent.money = 150
+
+    # the agent loses the conflict over (1, 0), its first action
+    monkeypatch.setattr(
+        env.action_manager, "resolve_conflict", lambda actions, tiles: actions[1:]
+    )
+    env.action_manager.apply_actions([[[1, 1, 0], [1, 0, 1]], [[1, 1, 0]]])
+
+    assert env.map.ownership_map[1, 0] == opponent.id
+    assert env.map.ownership_map[0, 1] == agent.id
+    assert agent.money == 50
+
+
+def test_tile_of_an_unaffordable_winner_goes_to_another_contender(env, monkeypatch):
+    agent, opponent = env.agents
+    for x in range(3):
+        for y in range(2):
+            env.map.get_tile(MapPosition(x, y)).set_land_type(LandType.LAND)
+            env.map.set_visible(MapPosition(x, y), agent.id)
+            env.map.set_visible(MapPosition(x, y), opponent.id)
+    env.map.claim_tile(agent, MapPosition(0, 0))
+    agent.add_claimed_tile(MapPosition(0, 0))
+    env.map.claim_tile(opponent, MapPosition(2, 0))
+    opponent.add_claimed_tile(MapPosition(2, 0))
+    # enough for one claim
+    agent.money = 150
+    opponent_money = opponent.money
+
+    def first_action_of_each_tile(actions, tiles):
+        _, first = np.unique(tiles, return_index=True)
+        return [actions[i] for i in np.sort(first)]
+
+    # the agent wins (1, 0), its second claim, which it cannot pay for
+    monkeypatch.setattr(
+        env.action_manager, "resolve_conflict", first_action_of_each_tile
+    )
+    rewards, _ = env.action_manager.apply_actions([[[1, 0, 1], [1, 1, 0]], [[1, 1, 0]]])
+
+    # the opponent gets the tile and is not punished
+    assert env.map.ownership_map[0, 1] == agent.id
+    assert env.map.ownership_map[1, 0] == opponent.id
+    assert agent.money == 50
+    assert opponent.money == opponent_money - 100
+    assert rewards[1] != env.action_manager.invalid_action_penalty
@@ -0,0 +1,214 @@
+import json
+
+import numpy as np
+import pytest
+
+from strategyRLEnv.ActionManager import ACTION_PADDING, create_action
+from strategyRLEnv.Agent import AgentState
+from strategyRLEnv.environment import MapEnvironment
+from strategyRLEnv.map.MapPosition import MapPosition
+
+
+@pytest.fixture
+def env():
+    # open settings file
+    with open("test_env_settings.json", "r") as f:
+        env_settings = json.load(f)
+    env_settings["map_width"] = 36
+    env_settings["map_height"] = 36
+
+    env = MapEnvironment(env_settings, 2, None, seed=0)
+    env.reset(seed=0)
+    yield env
+    env.close()
+
+
+def brute_force_masks(env):
+    """
+    Masks built by calling validate() of every single action.
+    """
+    masks = np.zeros(
+        (env.num_agents, len(env.action_mapping), env.map.width, env.map.height),
+        dtype=bool,
+    )
+    for agent in env.agents:
+        if agent.state == AgentState.DONE:
+            continue
+        for action_id, name in env.action_mapping.items():
+            for x in range(env.map.width):
+                for y in range(env.map.height):
+                    if name == "wait":
+                        masks[agent.id, action_id, x, y] = True
+                        continue
+                    action = create_action(agent, name, MapPosition(x, y))
+                    masks[agent.id, action_id, x, y] = action.validate(env)
+    return masks
+
+
+def test_masks_without_visibility(env):
+    masks = env.action_masks()
+    assert masks.shape == (2, len(env.action_mapping), 36, 36)
+    assert np.array_equal(masks, brute_force_masks(env))
+
+    # only wait is possible without any visible tile
+    assert [rows.tolist() for rows in env.action_masks(sparse=True)] == [
+        [[0, 0, 0]],
+        [[0, 0, 0]],
+    ]
+
+
+def test_masks_match_validate(env, populate):
+    populate(env)
+    masks = env.action_masks()
+    assert np.array_equal(masks, brute_force_masks(env))
+    assert masks[:, 1:].any(), "some actions besides wait should be legal"
+
+    # play legal actions and compare after the incremental updates
+    rng = np.random.default_rng(0)
+    for _ in range(3):
+        actions = []
+        for rows in env.action_masks(sparse=True):
+            actions.append(rows[rng.integers(len(rows), size=2)])
+        env.step(np.stack(actions))
+        assert np.array_equal(env.action_masks(), brute_force_masks(env))
+
+
+def test_sparse_masks_match_dense(env, populate):
+    populate(env)
+    env.agents[1].money = 0
+
+    dense = env.action_masks()
+    sparse = env.action_masks(sparse=True)
+
+    for agent_id, rows in enumerate(sparse):
+        assert rows.shape[1] == 3
+        expected = dense[agent_id].copy()
+        expected[0] = False
+        wait_rows = rows[rows[:, 0] == 0]
+        assert wait_rows.tolist() == [[0, 0, 0]]
+        action_rows = rows[rows[:, 0] != 0]
+        assert len(action_rows) == expected.sum()
+        assert expected[tuple(action_rows.T)].all()
+
+    # agent 1 can only afford wait and the free roads and bridges
+    assert not dense[1, [1, 2, 5, 6, 7, 8, 9]].any()
+    assert dense[1, 3].any()
+
+
+def test_masks_are_bit_packed(env, populate):
+    populate(env)
+    masks = env.action_masks()
+
+    # one bit per tile, the 36 tiles of a column take 5 bytes
+    packed = env.legal_actions._masks
+    assert packed.dtype == np.uint8
+    assert packed.shape == (2, len(env.action_mapping), 36, 5)
+
+    # the bits are read back at every position, including the padded last byte
+    xs, ys = np.meshgrid(np.arange(36), np.arange(36), indexing="ij")
+    for action_id in range(1, len(env.action_mapping)):
+        valid, _ = env.legal_actions.validate_many(0, action_id, xs, ys)
+        assert np.array_equal(valid, masks[0, action_id])
+
+
+def test_done_agent_has_no_legal_actions(env, populate):
+    populate(env)
+    env.agents[0].kill()
+
+    assert not env.action_masks()[0].any()
+    assert len(env.action_masks(sparse=True)[0]) == 0
+
+
+def test_validate_many_matches_validate(env, populate):
+    populate(env)
+    env.agents[1].money = 150
+
+    xs, ys = np.meshgrid(np.arange(-1, 37), np.arange(-1, 37), indexing="ij")
+    for agent in env.agents:
+        for name in env.action_mapping.values():
+            if name == "wait":
+                continue
+            valid, costs = env.action_manager.validate_many(
+                agent.id, name, xs, ys, return_costs=True
+            )
+            assert valid.shape == costs.shape == xs.shape
+            # positions outside the map are never valid
+            assert not valid[[0, -1]].any() and not valid[:, [0, -1]].any()
+            for x, y, is_valid, cost in zip(
+                xs[1:-1, 1:-1].ravel(),
+                ys[1:-1, 1:-1].ravel(),
+                valid[1:-1, 1:-1].ravel(),
+                costs[1:-1, 1:-1].ravel(),
+            ):
+                action = create_action(agent, name, MapPosition(int(x), int(y)))
+                assert is_valid == action.validate(env), (name, x, y)
+                if is_valid:
+                    assert cost == action.get_cost(env)
+
+    # the action id works like the name
+    assert np.array_equal(
+        env.action_manager.validate_many(0, 1, xs, ys),
+        env.action_manager.validate_many(0, "claim", xs, ys),
+    )
+    with pytest.raises(ValueError):
+        env.action_manager.validate_many(0, "fly", xs, ys)
+
+
+def test_sampled_actions_are_legal(env, populate):
+    populate(env)
+    env.agents[1].money = 60
+
+    for _ in range(3):
+        samples = env.sample_legal_actions(20, np.random.default_rng(0))
+        assert samples.shape == (2, 20, 3)
+        for rows, legal in zip(samples, env.action_masks(sparse=True)):
+            legal = {tuple(row) for row in legal.tolist()}
+            assert {tuple(row) for row in rows.tolist()} <= legal
+        env.step(samples)
+
+    # the draws are uniform over the legal actions, wait counts once
+    legal = env.action_masks(sparse=True)[0]
+    samples = env.sample_legal_actions(50 * len(legal), np.random.default_rng(1))[0]
+    counts = np.unique(samples, axis=0, return_counts=True)[1]
+    assert len(counts) == len(legal)
+    assert 25 < counts.min() and counts.max() < 75
+
+
+def test_sampling_is_seeded(env, populate):
+    populate(env)
+    first = env.sample_legal_actions(5, np.random.default_rng(3))
+    assert np.array_equal(first, env.sample_legal_actions(5, np.random.default_rng(3)))
+
+    env.agents[0].kill()
+    samples = env.sample_legal_actions(5)
+    assert (samples[0] == ACTION_PADDING).all()
+    assert (samples[1] != ACTION_PADDING).all()
+
+
+def test_default_sampling_leaves_the_game_rng_alone(env, populate):
+    populate(env)
+    state = env.np_random.bit_generator.state
+    first = env.sample_legal_actions(5)
+    assert env.np_random.bit_generator.state == state
+
+    # the default stream is seeded with the env
+    env.reset(seed=0)
+    populate(env)
+    assert np.array_equal(env.sample_legal_actions(5), first)
+
+
+def test_masks_use_the_handlers(env, populate):
+    populate(env)
+    claim = create_action(env.agents[0], "claim", MapPosition(0, 0)).__class__
+
+    class ClaimEverywhere(claim):
+        @classmethod
+        def validate_at(cls, env, agent, x, y):
+            return True
+
+    # an action type without a kernel is validated per tile, on every query
+    env.legal_actions.handlers[1] = ClaimEverywhere
+    assert env.action_masks()[:, 1].all()
+    env.legal_actions.handlers[1] = claim
+    env.map.dirty_blocks[...] = True
+    assert np.array_equal(env.action_masks(), brute_force_masks(env))
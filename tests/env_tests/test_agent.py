@@ -206,7 +206,15 @@ def test_agent_claimed_tiles(setup):
 
     new_position = MapPosition(4, 4)
     agent.add_claimed_tile(new_position)
-    assert new_position in agent.get_claimed_tiles()
+    assert env.map.tile_id(new_position) in agent.get_claimed_tiles()
+
+    # the same tile as a tile id or another MapPosition is not claimed twice
+    agent.add_claimed_tile(4 * env.map.width + 4)
+    agent.add_claimed_tile(MapPosition(4, 4))
+    assert len(agent.get_claimed_tiles()) == 2
+
+    agent.remove_claimed_tile(MapPosition(4, 4))
+    assert len(agent.get_claimed_tiles()) == 1
 
 
 def test_agent_add_remove_city(setup):
@@ -0,0 +1,124 @@
+import json
+
+import gymnasium as gym
+import numpy as np
+import pytest
+
+import strategyRLEnv  # noqa: F401, registers the environment
+from strategyRLEnv.map.map_settings import OWNER_DEFAULT_TILE
+from strategyRLEnv.vector.BatchedMapEnvironment import BatchedMapEnvironment
+
+
+@pytest.fixture
+def env_settings():
+    # open settings file
+    with open("test_env_settings.json", "r") as f:
+        env_settings = json.load(f)
+    return env_settings
+
+
+@pytest.fixture
+def batched_env(env_settings):
+    env = BatchedMapEnvironment(env_settings, 2, 3, actions_per_agent=2)
+    env.reset()
+    yield env
+    env.close()
+
+
+def test_reset_shapes(batched_env):
+    observation, info = batched_env.reset()
+
+    assert observation["map"].shape == (3, 6, 10, 10)
+    assert observation["agents"].shape == (3, 2, 3)
+    assert observation["visibility_map"].shape == (3, 10, 10)
+    assert batched_env.observation_space.contains(observation)
+
+
+def test_layers_are_shared_with_worlds(batched_env):
+    for i, world in enumerate(batched_env.envs):
+        assert np.shares_memory(world.map.ownership_map, batched_env.ownership_map)
+        assert world.map.ownership_map is not batched_env.ownership_map
+        assert np.shares_memory(world.map.layers.buffer, batched_env.layers.buffer[i])
+
+        world.map.ownership_map[1, 1] = 1
+        assert batched_env.ownership_map[i, 1, 1] == 1
+        observation = batched_env._get_observation()
+        assert observation["map"][i, 2, 1, 1] == 1
+
+    batched_env.reset()
+    assert np.all(batched_env.ownership_map == OWNER_DEFAULT_TILE)
+
+
+def test_step(batched_env):
+    actions = batched_env.action_space.sample()
+    assert actions.shape == (3, 2, 2, 3)
+
+    observation, rewards, terminations, truncations, info = batched_env.step(actions)
+    assert observation["map"].shape == (3, 6, 10, 10)
+    assert rewards.shape == (3, 2)
+    assert terminations.shape == (3, 2)
+    assert truncations.shape == (3, 2)
+    assert terminations.dtype == bool
+    assert isinstance(info, dict)
+
+    with pytest.raises(ValueError):
+        batched_env.step(np.zeros((2, 2, 1, 3), dtype=np.int64))
+
+    with pytest.raises(ValueError):
+        batched_env.step(np.zeros((3, 2, 3), dtype=np.int64))
+
+    # padding rows are skipped, their coordinates are not checked
+    padding = np.full((3, 2, 1, 3), -1, dtype=np.int32)
+    _, rewards, _, _, _ = batched_env.step(padding)
+    assert rewards.shape == (3, 2)
+
+    out_of_map = np.zeros((3, 2, 1, 3), dtype=np.int32)
+    out_of_map[0, 0, 0] = [1, batched_env.width, 0]
+    with pytest.raises(ValueError):
+        batched_env.step(out_of_map)
+
+
+def test_autoreset_after_all_agents_done(batched_env):
+    world = batched_env.envs[1]
+    for agent in world.agents:
+        agent.kill()
+
+    wait = np.zeros((3, 2, 1, 3), dtype=np.int64)
+    _, _, terminations, _, _ = batched_env.step(wait)
+    assert np.all(terminations[1])
+    assert not np.any(terminations[0])
+
+    _, rewards, terminations, _, _ = batched_env.step(wait)
+    assert not np.any(terminations[1])
+    assert np.all(rewards[1] == 0)
+    assert len(world.done_agents) == 0
+
+
+def test_make_vec(env_settings):
+    envs = gym.make_vec(
+        "strategyRLEnv/MapEnvironment-v0",
+        num_envs=2,
+        env_settings=env_settings,
+        num_agents=2,
+    )
+    assert isinstance(envs.unwrapped, BatchedMapEnvironment)
+    observation, _ = envs.reset(seed=1)
+    assert observation["map"].shape == (2, 6, 10, 10)
+    envs.close()
+
+
+def test_worlds_are_seeded_apart(env_settings):
+    observations = []
+    for _ in range(2):
+        env = BatchedMapEnvironment(env_settings, 2, 4, seed=5)
+        observations.append(env.reset()[0]["map"])
+        env.close()
+
+    # the worlds of one vector env differ, the same seed gives the same worlds
+    worlds = observations[0]
+    assert all(
+        not np.array_equal(worlds[i], worlds[j])
+        for i in range(4)
+        for j in range(i + 1, 4)
+    )
+    assert np.array_equal(observations[0], observations[1])
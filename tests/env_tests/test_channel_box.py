@@ -0,0 +1,62 @@
+import pickle
+
+import numpy as np
+import pytest
+from gymnasium import spaces
+from gymnasium.vector.utils import batch_space
+
+from strategyRLEnv.ChannelBox import ChannelBox
+
+
+@pytest.fixture
+def channel_box():
+    low = np.array([0, -1, 0], dtype=np.float32).reshape(3, 1, 1)
+    high = np.array([5, 63, 500], dtype=np.float32).reshape(3, 1, 1)
+    return ChannelBox(low, high, (3, 40, 30), dtype=np.float32, seed=0)
+
+
+def test_channel_box_matches_box(channel_box):
+    box = spaces.Box(
+        low=np.broadcast_to(channel_box.compact_low, (3, 40, 30)).copy(),
+        high=np.broadcast_to(channel_box.compact_high, (3, 40, 30)).copy(),
+        dtype=np.float32,
+    )
+
+    assert channel_box.shape == (3, 40, 30)
+    assert channel_box == box
+    assert channel_box.is_bounded()
+
+    sample = channel_box.sample()
+    assert box.contains(sample)
+    assert channel_box.contains(sample)
+
+    sample[1, 0, 0] = -2
+    assert not channel_box.contains(sample)
+
+
+def test_channel_box_stores_compact_bounds(channel_box):
+    # the full bounds are views without own memory
+    assert channel_box.low.strides == (4, 0, 0)
+    assert not channel_box.high.flags.writeable
+
+    data = pickle.dumps(channel_box)
+    assert len(data) < 3 * 40 * 30
+    restored = pickle.loads(data)
+    assert isinstance(restored, ChannelBox)
+    assert restored == channel_box
+    assert restored.low.strides == (4, 0, 0)
+
+
+def test_batch_channel_box(channel_box):
+    batched = batch_space(channel_box, 4)
+
+    assert isinstance(batched, ChannelBox)
+    assert batched.shape == (4, 3, 40, 30)
+    assert batched.contains(batched.sample())
+
+
+def test_channel_box_invalid_bounds():
+    with pytest.raises(ValueError):
+        ChannelBox(np.zeros((3, 1, 1)), np.ones((3, 1, 1)), (2, 10, 10))
+    with pytest.raises(ValueError):
+        ChannelBox(1, 0, (10, 10))
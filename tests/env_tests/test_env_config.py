@@ -0,0 +1,65 @@
+import dataclasses
+import json
+
+import pytest
+
+from strategyRLEnv.EnvConfig import EnvConfig
+from strategyRLEnv.environment import MapEnvironment
+
+
+@pytest.fixture
+def env_settings():
+    with open("test_env_settings.json", "r") as f:
+        return json.load(f)
+
+
+def test_config_tables(env_settings):
+    config = EnvConfig.from_settings(env_settings)
+    actions = env_settings["actions"]
+
+    for name, action_id in config.action_ids.items():
+        assert config.action_names[action_id] == name
+        assert config.cost[action_id] == actions[name]["cost"]
+        assert config.reward[action_id] == actions[name].get("reward", 0)
+        assert config.money_gain_per_turn[action_id] == actions[name].get(
+            "money_gain_per_turn", 0
+        )
+    assert config.invalid_action_penalty == -1000
+    assert config.city_clearance_radius == 2
+    assert config.agent_initial_budget == 10000
+
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        config.city_clearance_radius = 3
+    with pytest.raises(ValueError):
+        config.cost[0] = 5
+
+
+def test_disabled_actions_follow_enabled(env_settings):
+    env_settings["actions"]["claim"]["cost"] = -1
+    env = MapEnvironment(env_settings, 2, None)
+    config = env.config
+
+    assert config.num_action_types == len(env.action_mapping)
+    assert "claim" not in env.action_mapping.values()
+    for action_id, name in env.action_mapping.items():
+        assert config.action_ids[name] == action_id
+    # the claim settings used by destroy stay available
+    assert config.action_names[config.num_action_types :] == ("claim",)
+    env.close()
+
+
+@pytest.mark.parametrize(
+    "change",
+    [
+        lambda settings: settings.pop("actions"),
+        lambda settings: settings["actions"]["claim"].update(cost="100"),
+        lambda settings: settings["actions"].update(build_city=200),
+        lambda settings: settings["actions"].pop("invalid_action_penalty"),
+        lambda settings: settings.update(city_clearance_radius=-1),
+        lambda settings: settings.update(agent_initial_budget=None),
+    ],
+)
+def test_malformed_settings_fail_at_init(env_settings, change):
+    change(env_settings)
+    with pytest.raises(ValueError):
+        MapEnvironment(env_settings, 2, None)
@@ -1,10 +1,15 @@
 import json
+import os
+import subprocess
+import sys
 
 import gymnasium as gym
 import numpy as np
 import pytest
+from gymnasium.utils.env_checker import check_env
 
 from strategyRLEnv.environment import MapEnvironment
+from strategyRLEnv.map.map_settings import max_agent_id
 from strategyRLEnv.map.MapPosition import MapPosition
 from strategyRLEnv.objects.Unit import Unit
 from tests.env_tests.test_action_manager import MockAgent
@@ -46,6 +51,12 @@ def test_reset(env):
         env.reset(seed="invalid")
 
 
+def test_too_many_agents(env):
+    # the owner layers and the visibility bits hold at most max_agent_id agents
+    with pytest.raises(ValueError):
+        MapEnvironment(env.env_settings, max_agent_id + 1, None)
+
+
 def test_step(env):
     # Test step function
     env.reset()
@@ -153,6 +164,37 @@ def test_observation_space(env):
     ), "Observation should be valid in the observation space"
 
 
+class FirstAgentView(gym.Wrapper):
+    """
+    The environment as seen by agent 0, as check_env expects one action and scalar results per step.
+    All agents take the given action.
+    """
+
+    def step(self, action):
+        actions = np.tile(action, (self.unwrapped.num_agents, 1, 1))
+        observation, rewards, terminations, truncations, info = self.env.step(actions)
+        return (
+            observation,
+            float(rewards[0]),
+            bool(terminations[0]),
+            bool(truncations[0]),
+            info,
+        )
+
+
+def test_check_env(env):
+    check_env(FirstAgentView(env), skip_render_check=True)
+
+
+def test_reset_options(env):
+    _, info = env.reset(seed=0, options={})
+    assert "info" in info
+
+    # the map file of the options is used
+    with pytest.raises(FileNotFoundError):
+        env.reset(options={"map_file": "missing_map_file.pickle"})
+
+
 def test_render(env):
     # Test render function in different modes
     with open("test_env_settings.json", "r") as f:
@@ -200,6 +242,47 @@ def test_seed(env):
     assert True, "Seeding should not raise any errors"
 
 
+def run_seeded(env, seed):
+    # the map, the agents and a few steps of random legal actions
+    env.reset(seed=seed)
+    states = [env.map.landtype_map.copy(), env.map.resources_map.copy()]
+    for _ in range(3):
+        env.step(env.sample_legal_actions(2))
+    states.append(env.map.ownership_map.copy())
+    states.append(np.array([agent.money for agent in env.agents]))
+    states.append(
+        np.array([(agent.position.x, agent.position.y) for agent in env.agents])
+    )
+    return states
+
+
+def test_seeded_runs_are_reproducible():
+    with open("test_env_settings.json", "r") as f:
+        env_settings = json.load(f)
+    env_settings["agent_initial_budget_distribution"] = "gauss"
+    env = MapEnvironment(env_settings, 2, None, seed=5)
+    other_env = MapEnvironment(env_settings, 2, None, seed=5)
+    assert np.array_equal(env.map.landtype_map, other_env.map.landtype_map)
+
+    # the global random state is not used
+    np.random.seed(0)
+    first_run = run_seeded(env, 7)
+    np.random.seed(1)
+    for states, other_states in zip(first_run, run_seeded(other_env, 7)):
+        assert np.array_equal(states, other_states)
+
+    other_states = run_seeded(env, 8)
+    assert not np.array_equal(first_run[0], other_states[0])
+
+    # resets without a seed continue the stream, the next map is different
+    env.reset(seed=7)
+    first_map = env.map.landtype_map.copy()
+    env.reset()
+    assert not np.array_equal(first_map, env.map.landtype_map)
+    env.close()
+    other_env.close()
+
+
 def test_killed_agent(env):
     # Test killed agent
     env.reset()
@@ -219,3 +302,138 @@ def test_killed_agent(env):
 
     observation, reward, terminated, truncated, info = env.step([[wait_action]])
     assert reward[0] < -10000, "killed agent should receive large negative reward"
+
+
+def test_core_imports_without_pygame():
+    # the simulation core must run without loading pygame
+    code = (
+        "import sys, json\n"
+        "import strategyRLEnv.environment, strategyRLEnv.ActionManager\n"
+        "import strategyRLEnv.objects.City, strategyRLEnv.objects.Farm\n"
+        "import strategyRLEnv.objects.Mine, strategyRLEnv.objects.Road\n"
+        "import strategyRLEnv.objects.Unit, strategyRLEnv.map.MapSquare\n"
+        "assert 'pygame' not in sys.modules\n"
+    )
+    environment = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    subprocess.run([sys.executable, "-c", code], check=True, env=environment)
+
+
+def test_headless_environment():
+    # no display or surface is created without a render mode
+    code = (
+        "import sys, json\n"
+        "from strategyRLEnv.environment import MapEnvironment\n"
+        "settings = json.load(open('test_env_settings.json'))\n"
+        "env = MapEnvironment(settings, 2, None)\n"
+        "env.reset()\n"
+        "env.step([[[0, 0, 0]], [[1, 1, 1]]])\n"
+        "assert env.render() is None\n"
+        "assert env.screen is None\n"
+        "env.close()\n"
+        "assert 'pygame' not in sys.modules\n"
+    )
+    environment = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    subprocess.run([sys.executable, "-c", code], check=True, env=environment)
+
+
+def test_screen_is_created_on_first_render(env):
+    env.reset()
+    assert env.screen is None
+
+    frame = env.render()
+    assert env.screen is not None
+    assert frame.shape == (env.screen_height, env.screen_width, 3)
+    assert env.map.tile_size == env.screen_width // env.map.width
+
+
+def test_reuse_observation_buffers():
+    with open("test_env_settings.json", "r") as f:
+        env_settings = json.load(f)
+
+    env = MapEnvironment(env_settings, 2, None, reuse_observation_buffers=True)
+
+    observation, _ = env.reset()
+    map_observation, visibility_map = env.map.get_observation()
+    reference_observation = {
+        "map": map_observation,
+        "visibility_map": visibility_map,
+        "agents": np.stack([agent.get_observation() for agent in env.agents]),
+    }
+    for key in reference_observation:
+        assert np.array_equal(observation[key], reference_observation[key])
+        assert observation[key].dtype == env.observation_space[key].dtype
+        assert not observation[key].flags.writeable
+
+    next_observation, *_ = env.step([[[1, 0, 0]], [[1, 0, 0]]])
+
+    # the same memory is reused, the views of the last step show the new state
+    for key in observation:
+        assert np.shares_memory(next_observation[key], observation[key])
+    map_observation, _ = env.map.get_observation()
+    assert np.array_equal(observation["map"], map_observation)
+
+    with pytest.raises(ValueError):
+        next_observation["map"][0, 0, 0] = 1
+
+    env.close()
+
+
+def test_split_static_observation():
+    with open("test_env_settings.json", "r") as f:
+        env_settings = json.load(f)
+
+    env = MapEnvironment(env_settings, 2, None, split_static_observation=True)
+    observation, info = env.reset()
+
+    static_observation = info["static_observation"]
+    assert env.observation_space.contains(observation)
+    assert env.static_observation_space.contains(static_observation)
+    assert static_observation is env.static_observation()
+    assert not static_observation.flags.writeable
+    assert np.array_equal(static_observation[0], env.map.landtype_map)
+    assert np.array_equal(static_observation[1], env.map.resources_map)
+
+    # the map observation holds the dynamic features only
+    observation, *_ = env.step([[[1, 0, 0]], [[1, 0, 0]]])
+    full_map_observation, _ = env.map.get_observation()
+    assert observation["map"].shape[0] == len(env.dynamic_map_features)
+    assert np.array_equal(observation["map"], full_map_observation[2:])
+
+    env.reset()
+    assert env.static_observation() is not static_observation
+    env.close()
+
+
+def test_step_with_action_array(env):
+    env.reset()
+    claim = 1
+
+    # agent 0 claims a tile next to its own tile, agent 1 only sends padding
+    agent = env.agents[0]
+    env.map.claim_tile(agent, MapPosition(0, 0))
+    agent.add_claimed_tile(MapPosition(0, 0))
+    env.map.set_visible(MapPosition(1, 0), agent.id)
+    actions = np.full((2, 2, 3), -1, dtype=np.int32)
+    actions[0, 0] = [claim, 1, 0]
+
+    observation, reward, terminated, truncated, info = env.step(actions)
+    assert env.map.ownership_map[1, 0] == agent.id
+    assert observation["map"][2][1][0] == agent.id
+    assert reward[1] == env.action_manager.invalid_action_penalty
+
+    with pytest.raises(ValueError):
+        env.step(actions.astype(np.float32))
+    with pytest.raises(ValueError):
+        env.step(np.zeros((2, 1, 2), dtype=np.int32))
+    with pytest.raises(ValueError):
+        env.step(np.full((3, 1, 3), -1, dtype=np.int32))
+
+    invalid = actions.copy()
+    invalid[1, 0] = [len(env.action_mapping), 0, 0]
+    with pytest.raises(ValueError):
+        env.step(invalid)
+
+    invalid = actions.copy()
+    invalid[1, 0] = [claim, env.map.width, 0]
+    with pytest.raises(ValueError):
+        env.step(invalid)
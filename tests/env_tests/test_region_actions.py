@@ -0,0 +1,96 @@
+import json
+
+import numpy as np
+import pytest
+
+from strategyRLEnv.environment import MapEnvironment
+from strategyRLEnv.map.map_settings import LandType
+from strategyRLEnv.map.MapPosition import MapPosition
+
+
+@pytest.fixture
+def env():
+    with open("test_env_settings.json", "r") as f:
+        env_settings = json.load(f)
+    env_settings["map_width"] = 36
+    env_settings["map_height"] = 36
+
+    env = MapEnvironment(env_settings, 2, None, region_size=16)
+    env.reset()
+    yield env
+    env.close()
+
+
+def test_region_action_space(env, populate):
+    # 36 tiles are three regions, the last one cut off by the border
+    assert env.action_space.nvec.tolist() == [len(env.action_mapping), 3, 3]
+
+    populate(env)
+    tile_masks = env.legal_actions.dense()
+    masks = env.action_masks()
+    assert masks.shape == (2, len(env.action_mapping), 3, 3)
+    for region_x in range(3):
+        for region_y in range(3):
+            block = tile_masks[
+                :,
+                :,
+                region_x * 16 : (region_x + 1) * 16,
+                region_y * 16 : (region_y + 1) * 16,
+            ]
+            assert np.array_equal(
+                masks[:, :, region_x, region_y], block.any(axis=(2, 3))
+            )
+
+    for rows, agent_masks in zip(env.action_masks(sparse=True), masks):
+        assert agent_masks[tuple(rows[rows[:, 0] != 0].T)].all()
+        assert len(rows) - 1 == agent_masks[1:].sum()
+
+    with pytest.raises(ValueError):
+        env.step(np.array([[[1, 3, 0]], [[0, 0, 0]]]))
+
+
+def test_region_action_picks_best_legal_tile(populate):
+    with open("test_env_settings.json", "r") as f:
+        env_settings = json.load(f)
+    env_settings["map_width"] = 36
+    env_settings["map_height"] = 36
+
+    # prefer the tiles with the highest y
+    env = MapEnvironment(
+        env_settings,
+        2,
+        None,
+        region_size=16,
+        region_score=lambda env: np.broadcast_to(
+            np.arange(env.map.height), (env.map.width, env.map.height)
+        ),
+    )
+    env.reset()
+    for x in range(16):
+        for y in range(16):
+            env.map.get_tile(MapPosition(x, y)).set_land_type(LandType.LAND)
+    populate(env)
+    agent = env.agents[0]
+
+    claim = 1
+    legal = env.legal_actions.dense()[0, claim, :16, :16]
+    xs, ys = np.nonzero(legal)
+    expected = min(zip(xs[ys == ys.max()], ys[ys == ys.max()]))
+
+    env.step(np.array([[[claim, 0, 0]], [[0, 0, 0]]]))
+    assert env.map.ownership_map[expected] == agent.id
+
+    # without a legal tile in the region the action fails
+    _, rewards, *_ = env.step([[[claim, 2, 2]], [[0, 0, 0]]])
+    assert rewards[0] == env.config.invalid_action_penalty
+    assert env.map.get_tile(MapPosition(32, 32)).owner_id != agent.id
+    env.close()
+
+
+def test_sampled_region_actions(env, populate):
+    populate(env)
+    legal = env.action_masks()
+    samples = env.sample_legal_actions(10, np.random.default_rng(0))
+    for agent_id, rows in enumerate(samples):
+        assert legal[agent_id][tuple(rows.T)].all()
+    env.step(samples)
@@ -0,0 +1,84 @@
+import json
+
+import numpy as np
+import pytest
+
+from strategyRLEnv.vector.SharedMemoryVectorEnv import SharedMemoryVectorEnv
+
+
+@pytest.fixture
+def vector_env():
+    # open settings file
+    with open("test_env_settings.json", "r") as f:
+        env_settings = json.load(f)
+
+    env = SharedMemoryVectorEnv(env_settings, 2, 2, actions_per_agent=2)
+    yield env
+    env.close()
+
+
+def test_reset(vector_env):
+    observation, info = vector_env.reset(seed=3)
+
+    assert observation["map"].shape == (2, 6, 10, 10)
+    assert observation["agents"].shape == (2, 2, 3)
+    assert observation["visibility_map"].shape == (2, 10, 10)
+    assert vector_env.observation_space.contains(observation)
+
+
+def test_observation_is_shared_memory(vector_env):
+    observation, _ = vector_env.reset()
+
+    for key in ["map", "visibility_map", "agents"]:
+        assert not observation[key].flags.owndata
+
+    # next step writes into the same memory
+    wait = np.zeros((2, 2, 1, 3), dtype=np.int64)
+    new_observation, _, _, _, _ = vector_env.step(wait)
+    assert np.shares_memory(observation["map"], new_observation["map"])
+
+
+def test_step(vector_env):
+    vector_env.reset()
+    actions = vector_env.action_space.sample()
+
+    observation, rewards, terminations, truncations, info = vector_env.step(actions)
+    assert observation["agents"].shape == (2, 2, 3)
+    assert rewards.shape == (2, 2)
+    assert terminations.shape == (2, 2)
+    assert truncations.shape == (2, 2)
+    assert vector_env.observation_space.contains(observation)
+
+    with pytest.raises(ValueError):
+        vector_env.step(np.zeros((3, 2, 1, 3), dtype=np.int64))
+
+
+def test_invalid_actions_are_rejected(vector_env):
+    vector_env.reset()
+    invalid_action = np.full((2, 2, 1, 3), 99, dtype=np.int64)
+    with pytest.raises(ValueError):
+        vector_env.step(invalid_action)
+
+
+def test_worker_error_is_raised(vector_env):
+    vector_env.reset()
+    # bypass the checks of step(), the worker fails on the unknown action type
+    invalid_action = np.full((2, 1, 3), 99, dtype=np.int64)
+    vector_env._send([("step", invalid_action)] * 2)
+    with pytest.raises(ValueError):
+        vector_env._receive()
+
+
+def test_worlds_are_seeded_apart():
+    with open("test_env_settings.json", "r") as f:
+        env_settings = json.load(f)
+
+    observations = []
+    for _ in range(2):
+        env = SharedMemoryVectorEnv(env_settings, 2, 2, seed=5)
+        observations.append(env.reset()[0]["map"].copy())
+        env.close()
+
+    # the worlds of one vector env differ, the same seed gives the same worlds
+    assert not np.array_equal(observations[0][0], observations[0][1])
+    assert np.array_equal(observations[0], observations[1])
@@ -0,0 +1,74 @@
+import json
+
+import numpy as np
+import pytest
+
+from strategyRLEnv.vector.ThreadedVectorEnv import ThreadedVectorEnv
+
+
+@pytest.fixture
+def vector_env():
+    # open settings file
+    with open("test_env_settings.json", "r") as f:
+        env_settings = json.load(f)
+
+    env = ThreadedVectorEnv(env_settings, 2, 3, actions_per_agent=2, num_threads=2)
+    yield env
+    env.close()
+
+
+def test_reset(vector_env):
+    observation, info = vector_env.reset(seed=1)
+
+    assert observation["map"].shape == (3, 6, 10, 10)
+    assert observation["agents"].shape == (3, 2, 3)
+    assert observation["visibility_map"].shape == (3, 10, 10)
+    assert vector_env.observation_space.contains(observation)
+    assert "parallel_efficiency" in info
+
+
+def test_step(vector_env):
+    vector_env.reset()
+    actions = vector_env.action_space.sample()
+
+    observation, rewards, terminations, truncations, info = vector_env.step(actions)
+    assert vector_env.observation_space.contains(observation)
+    assert rewards.shape == (3, 2)
+    assert terminations.shape == (3, 2)
+    assert truncations.shape == (3, 2)
+
+    assert info["parallel_efficiency"] == vector_env.parallel_efficiency
+    assert 0.0 <= vector_env.parallel_efficiency <= 1.0 + 1e-6
+
+    with pytest.raises(ValueError):
+        vector_env.step(np.zeros((3, 2, 3), dtype=np.int64))
+
+
+def test_observation_matches_worlds(vector_env):
+    observation, _ = vector_env.reset()
+    wait = np.zeros((3, 2, 1, 3), dtype=np.int64)
+    observation, _, _, _, _ = vector_env.step(wait)
+
+    for i, world in enumerate(vector_env.envs):
+        world_observation = world._get_observation()
+        assert np.array_equal(observation["map"][i], world_observation["map"])
+        assert np.array_equal(
+            observation["visibility_map"][i], world_observation["visibility_map"]
+        )
+
+
+def test_worlds_are_seeded_apart():
+    with open("test_env_settings.json", "r") as f:
+        env_settings = json.load(f)
+
+    observations = []
+    for _ in range(2):
+        env = ThreadedVectorEnv(env_settings, 2, 3, seed=5)
+        observations.append(env.reset()[0]["map"])
+        env.close()
+
+    # the worlds of one vector env differ, the same seed gives the same worlds
+    worlds = observations[0]
+    assert not np.array_equal(worlds[0], worlds[1])
+    assert not np.array_equal(worlds[1], worlds[2])
+    assert np.array_equal(observations[0], observations[1])
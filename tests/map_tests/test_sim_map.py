@@ -1,18 +1,29 @@
+import gc
 import json
 import uuid
+import weakref
+from multiprocessing import shared_memory
 
+import numpy as np
 import pytest
 
 from strategyRLEnv.Agent import Agent
 from strategyRLEnv.environment import MapEnvironment
-from strategyRLEnv.map.Map import check_valid_agent_id
+from strategyRLEnv.map.LayerBuffer import LayerBuffer
+from strategyRLEnv.map.Map import (MAP_LAYER_DTYPES, MAP_LAYER_NAMES,
+                                   check_valid_agent_id)
 from strategyRLEnv.map.map_settings import (OWNER_DEFAULT_TILE, BuildingType,
-                                            LandType, max_agent_id)
-from strategyRLEnv.map.mapGenerator import generate_finished_map
+                                            LandType, max_agent_id,
+                                            max_unit_strength)
+from strategyRLEnv.map.mapGenerator import (create_topologies,
+                                            generate_finished_map,
+                                            generate_map_topologies)
 from strategyRLEnv.map.MapPosition import MapPosition
 from strategyRLEnv.map.MapSquare import Map_Square
+from strategyRLEnv.map.NeighbourTable import neighbour_offsets, neighbour_table
 from strategyRLEnv.objects.City import City
 from strategyRLEnv.objects.Mine import Mine
+from tests.env_tests.test_action_manager import MockAgent
 
 
 @pytest.fixture
@@ -267,7 +278,6 @@ def test_tile_is_next_to_any_building(map_instance):
 
     # now add a mine
     building_2 = Mine(7, position3, {"building_type_id": 5})
-    tile3 = map_instance.get_tile(position3)
     map_instance.add_building(building_2, position3)
     # should still return true
     bool_value, return_tile = map_instance.tile_is_next_to_any_building(
@@ -470,3 +480,239 @@ def test_get_surrounding_tiles(map_instance):
         assert (
             tile_position in expected_positions1_no_diagonal
         ), f"Tile ({tile.position.x}, {tile.position.y}) not expected in edge position surroundings."
+
+
+def test_neighbour_tables_match_offsets():
+    # brute force the neighbours on a map which is not square
+    width, height = 7, 5
+    for radius in (1, 2, 3):
+        for diagonal in (True, False):
+            table = neighbour_table(width, height, radius, diagonal)
+            assert table is neighbour_table(width, height, radius, diagonal)
+            assert not table.indices.flags.writeable
+            assert table.indptr.dtype == table.indices.dtype == np.int32
+            for x in range(width):
+                for y in range(height):
+                    expected = [
+                        (y + dy) * width + x + dx
+                        for dx, dy in neighbour_offsets(radius, diagonal)
+                        if 0 <= x + dx < width and 0 <= y + dy < height
+                    ]
+                    assert table.of(y * width + x).tolist() == expected
+
+
+def test_neighbour_queries_use_tile_ids(map_instance):
+    map_instance, mock_city_params = map_instance
+    width = map_instance.width
+
+    tile_ids = map_instance.neighbour_ids(0, 2, 1, diagonal=False)
+    assert tile_ids.tolist() == [2 * width + 1, 1 * width, 3 * width]
+    tiles = map_instance.get_surrounding_tiles(MapPosition(0, 2), 1, diagonal=False)
+    assert [tile.tile_id for tile in tiles] == tile_ids.tolist()
+
+    # positions off the map still see the neighbours on the map
+    assert map_instance.neighbour_ids(-1, 0, 1).tolist() == [0, width]
+    assert len(map_instance.neighbour_ids(4, 4, 0)) == 0
+
+    agent = MockAgent(0)
+    assert map_instance.set_visible_ids(tile_ids, agent.id) == 3
+    assert map_instance.set_visible_ids(tile_ids, agent.id) == 0
+    assert map_instance.is_visible(MapPosition(1, 2), agent.id)
+
+
+def test_neighbour_values_of_many_tiles(map_instance):
+    map_instance, mock_city_params = map_instance
+    width, height = map_instance.width, map_instance.height
+    layer = np.arange(width * height).reshape(height, width).T
+
+    # single tiles do not build a table, e.g. for the visibility range
+    map_instance.neighbour_ids(2, 2, 3)
+    assert len(map_instance._neighbour_tables) == 0
+
+    tile_ids = np.array([0, width + 1, width * height - 1, width + 1])
+    for radius in (1, 2):
+        groups, neighbour_ids, values = map_instance.neighbour_values_of(
+            layer, tile_ids, radius
+        )
+        assert np.array_equal(values, neighbour_ids)
+        for i, tile_id in enumerate(tile_ids.tolist()):
+            expected, _ = map_instance.neighbour_values(
+                layer, tile_id % width, tile_id // width, radius
+            )
+            assert neighbour_ids[groups == i].tolist() == expected.tolist()
+
+
+def test_neighbour_tables_are_held_by_the_maps(map_instance):
+    map_instance, mock_city_params = map_instance
+    width, height = map_instance.width, map_instance.height
+
+    # maps of the same size share the tables
+    table = map_instance.neighbours(2)
+    del table
+    gc.collect()
+    assert map_instance.neighbours(2) is neighbour_table(width, height, 2)
+
+    # a table no map holds is freed
+    table = weakref.ref(neighbour_table(width + 1, height, 1))
+    gc.collect()
+    assert table() is None
+
+
+def test_tiles_are_addressed_by_tile_id(map_instance):
+    map_instance, mock_city_params = map_instance
+    position = MapPosition(3, 2)
+    tile_id = 2 * map_instance.width + 3
+
+    assert map_instance.tile_id(position) == tile_id
+    assert map_instance.position_of(tile_id) == position
+    assert map_instance.get_tile(tile_id) == map_instance.get_tile(position)
+    assert map_instance.get_tile(tile_id).tile_id == tile_id
+    assert map_instance.check_position_on_map(map_instance.tiles - 1)
+    assert not map_instance.check_position_on_map(map_instance.tiles)
+    assert map_instance.get_tile(-1) is None
+
+    agent = MockAgent(1)
+    map_instance.claim_tile(agent, tile_id)
+    assert map_instance.ownership_map[3, 2] == agent.id
+    map_instance.set_visible(tile_id, agent.id)
+    assert map_instance.is_visible(position, agent.id)
+
+    # positions are values, usable as keys
+    assert MapPosition(3, 2) == position
+    assert len({MapPosition(3, 2), position, MapPosition(2, 3)}) == 2
+
+
+def test_layers_are_views_of_one_buffer(map_instance):
+    map_instance, mock_city_params = map_instance
+    buffer = map_instance.layers.buffer
+    for name in MAP_LAYER_NAMES:
+        layer = getattr(map_instance, name)
+        assert layer.shape == (map_instance.width, map_instance.height)
+        assert np.shares_memory(layer, buffer)
+
+    map_instance.ownership_map[2, 3] = 1
+    snapshot = map_instance.snapshot()
+    map_instance.ownership_map[2, 3] = 0
+    restored = LayerBuffer(
+        map_instance.width, map_instance.height, MAP_LAYER_DTYPES, snapshot
+    )
+    assert restored.layer("ownership_map")[2, 3] == 1
+
+    # export the layers to shared memory, the map keeps working on the shared block
+    landtype_map = map_instance.landtype_map.copy()
+    block = shared_memory.SharedMemory(create=True, size=buffer.nbytes)
+    try:
+        shared = np.ndarray(buffer.shape, dtype=np.uint8, buffer=block.buf)
+        map_instance.bind_buffer(shared)
+        assert np.array_equal(map_instance.landtype_map, landtype_map)
+
+        map_instance.claim_tile(MockAgent(1), MapPosition(4, 5))
+        other = LayerBuffer(
+            map_instance.width, map_instance.height, MAP_LAYER_DTYPES, shared
+        )
+        assert other.layer("ownership_map")[4, 5] == 1
+    finally:
+        # release the views of the block before closing it
+        map_instance.bind_buffer(buffer)
+        shared = other = None
+        block.close()
+        block.unlink()
+
+
+def test_layers_use_compact_dtypes(map_instance):
+    map_instance, mock_city_params = map_instance
+    for name, dtype in MAP_LAYER_DTYPES.items():
+        assert getattr(map_instance, name).dtype == dtype
+
+    # the largest values of every layer fit
+    last_agent = max_agent_id - 1
+    map_instance.ownership_map[0, 0] = last_agent
+    map_instance.unit_owner_map[0, 0] = last_agent
+    map_instance.unit_strength_map[0, 0] = max_unit_strength
+    map_instance.set_visible(MapPosition(0, 0), last_agent)
+    assert map_instance.ownership_map[0, 0] == last_agent
+    assert map_instance.unit_owner_map[0, 0] == last_agent
+    assert map_instance.unit_strength_map[0, 0] == max_unit_strength
+    assert map_instance.is_visible(MapPosition(0, 0), last_agent)
+
+    # the observation widens them
+    map_observation, _ = map_instance.get_observation()
+    assert map_observation.dtype == np.float32
+
+
+def test_landtype_map_orientation(map_instance):
+    map_instance, mock_city_params = map_instance
+
+    for x in range(map_instance.width):
+        for y in range(map_instance.height):
+            square = map_instance.get_tile(MapPosition(x, y))
+            assert map_instance.landtype_map[x, y] == square.get_land_type().value
+            assert map_instance.resources_map[x, y] == square.resource.value
+
+
+def test_selected_map_features():
+    with open("test_env_settings.json", "r") as f:
+        env_settings = json.load(f)
+    for feature in env_settings["map_features"]:
+        feature["select"] = feature["name"] in ("land_money_value", "tile_ownership")
+
+    env = MapEnvironment(env_settings, 2, None)
+    observation, _ = env.reset()
+
+    # channels follow the order of the settings
+    assert observation["map"].shape == (2, 10, 10)
+    assert env.observation_space.contains(observation)
+    assert np.array_equal(observation["map"][0], env.map.ownership_map)
+    assert np.all(observation["map"][1] == 1)
+
+    env_settings["map_features"].append(
+        {"name": "unknown", "select": True, "values": {"min": 0, "max": 1}}
+    )
+    with pytest.raises(ValueError):
+        MapEnvironment(env_settings, 2, None)
+
+
+def test_seeded_map_generation(tmp_path):
+    def generate(seed):
+        return create_topologies(
+            2, 20, 20, 0.2, 0.1, 0.1, 0.5, np.random.default_rng(seed)
+        )
+
+    assert np.array_equal(generate(4), generate(4))
+    assert not np.array_equal(generate(4), generate(5))
+
+    with open("test_env_settings.json", "r") as f:
+        env_settings = json.load(f)
+    maps = []
+    for path in [tmp_path / "first", tmp_path / "second"]:
+        generate_map_topologies(2, env_settings, seed=4, path=path)
+        # the file names end in a random id, the map index comes before it
+        files = sorted(path.iterdir(), key=lambda file: file.name.split("_")[-2])
+        maps.append([file.read_bytes() for file in files])
+    assert maps[0] == maps[1]
+
+
+def test_squares_are_views_of_the_layers(map_instance):
+    map_instance, mock_city_params = map_instance
+    position = MapPosition(2, 3)
+    tile = map_instance.get_tile(position)
+
+    # the layers are the tile state, a square reads and writes them
+    map_instance.ownership_map[2, 3] = 4
+    assert tile.owner_id == 4
+    tile.set_land_type(LandType.DESERT)
+    assert map_instance.landtype_map[2, 3] == LandType.DESERT.value
+
+    city = City(MockAgent(4), position, mock_city_params)
+    map_instance.add_building(city, position)
+    assert map_instance.get_tile(position).building is city
+    assert map_instance.buildings == {3 * map_instance.width + 2: city}
+
+    # squares of the same tile are equal
+    assert tile == map_instance.squares[2][3]
+    assert tile != map_instance.squares[3][2]
+    assert tile.tile_id == 3 * map_instance.width + 2
+
+    map_instance.reset()
+    assert map_instance.buildings == {}
+    assert tile.building is None and tile.owner_id == OWNER_DEFAULT_TILE
@@ -42,13 +42,13 @@ test_settings = {
     },
     "map_features": [
         {"name": "land_type", "select": True, "values": {"min": 0, "max": 5}},
-        {"name": "tile_ownership", "select": True, "values": {"min": 0, "max": 63}},
+        {"name": "tile_ownership", "select": True, "values": {"min": -1, "max": 63}},
         {
             "name": "land_money_value",
             "select": False,
             "values": {"min": 0, "max": 10000},
         },
-        {"name": "buildings", "select": True, "values": {"min": 0, "max": 10000000000}},
+        {"name": "buildings", "select": True, "values": {"min": -1, "max": 10000000000}},
         {"name": "resources", "select": True, "values": {"min": 0, "max": 10000000000}},
         {"name": "unit_strength", "select": True, "values": {"min": 0, "max": 500}},
     ],
@@ -78,13 +78,12 @@ def timing_test():
             t_0 = time.time()
             env.reset()
             t_1 = time.time()
-            action_space = env.action_space
 
             max_total_steps = 100
             total_steps_taken = 0
 
             while total_steps_taken < max_total_steps:
-                actions = [[action_space.sample()] for _ in range(numb)]
+                actions = env.sample_legal_actions(1)
 
                 new_observations, rewards, dones, all_done, infos = env.step(actions)
                 total_steps_taken += 1